@@ -0,0 +1,58 @@
+"""Общая часть общих кэшей: сериализация и сжатие значений.
+
+Целые числа хранятся как десятичная строка, чтобы хранилище могло
+увеличивать счетчики само, без чтения и записи из Python. Остальное
+сохраняется через pickle с однобайтовой меткой; при заданном
+COMPRESS_MIN_LENGTH длинные значения (HTML фрагментов и карточек)
+дополнительно сжимаются zlib.
+"""
+
+import pickle
+import zlib
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+PICKLED = b'p'
+COMPRESSED = b'z'
+
+
+class SerializingCache(BaseCache):
+
+    def __init__(self, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.compress_min_length = options.get('COMPRESS_MIN_LENGTH')
+        self.compress_level = options.get('COMPRESS_LEVEL', 6)
+
+    def dumps(self, value):
+        if type(value) is int:
+            return str(value).encode()
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        if (self.compress_min_length is not None
+                and len(data) >= self.compress_min_length):
+            return COMPRESSED + zlib.compress(data, self.compress_level)
+        return PICKLED + data
+
+    def loads(self, data):
+        data = bytes(data)
+        marker, payload = data[:1], data[1:]
+        if marker == COMPRESSED:
+            return pickle.loads(zlib.decompress(payload))
+        if marker == PICKLED:
+            return pickle.loads(payload)
+        return int(data)
+
+    def ttl(self, timeout=DEFAULT_TIMEOUT):
+        """Срок жизни в секундах: None — бессрочно, 0 — уже истек."""
+        if timeout == DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        if timeout is None:
+            return None
+        return max(timeout, 0)
+
+    def namespace(self):
+        """Начало всех ключей этого кэша или '' без KEY_PREFIX.
+
+        Верно для стандартной функции ключа «префикс:версия:ключ».
+        """
+        return f'{self.key_prefix}:' if self.key_prefix else ''
@@ -0,0 +1,122 @@
+"""Кэш на сервере с протоколом Redis (Redis, KeyDB, Valkey).
+
+LOCATION — URL сервера, например redis://localhost:6379/0. Клиент
+redis-py сам держит пул соединений и пересоздает его после fork.
+Счетчики версий feed_cache увеличиваются на сервере атомарно, поэтому
+инвалидация видна всем процессам сразу.
+"""
+
+import redis
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+
+from .base import SerializingCache
+
+# incr() по протоколу Django: отсутствующий ключ — ошибка, а не 0.
+INCR_EXISTING = """
+if redis.call('exists', KEYS[1]) == 1 then
+    return redis.call('incrby', KEYS[1], ARGV[1])
+end
+return false
+"""
+SCAN_COUNT = 500
+
+
+class RedisCache(SerializingCache):
+
+    def __init__(self, server, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._client = redis.Redis.from_url(
+            server, **options.get('CLIENT_KWARGS', {})
+        )
+        self._incr = self._client.register_script(INCR_EXISTING)
+
+    def _key(self, key, version):
+        key = self.make_key(key, version)
+        self.validate_key(key)
+        return key
+
+    def get(self, key, default=None, version=None):
+        value = self._client.get(self._key(key, version))
+        return default if value is None else self.loads(value)
+
+    def get_many(self, keys, version=None):
+        made = {self._key(key, version): key for key in keys}
+        if not made:
+            return {}
+        return {
+            made[name]: self.loads(value)
+            for name, value in zip(made, self._client.mget(list(made)))
+            if value is not None
+        }
+
+    def _set(self, client, key, value, ttl, only_new=False):
+        if ttl == 0:
+            # Истекший сразу ключ просто не записывается.
+            return False if only_new else client.delete(key)
+        return client.set(
+            key, self.dumps(value), nx=only_new,
+            px=None if ttl is None else int(ttl * 1000),
+        )
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._set(
+            self._client, self._key(key, version), value, self.ttl(timeout)
+        )
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        ttl = self.ttl(timeout)
+        with self._client.pipeline(transaction=False) as pipeline:
+            for key, value in data.items():
+                self._set(pipeline, self._key(key, version), value, ttl)
+            pipeline.execute()
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return bool(self._set(
+            self._client, self._key(key, version), value, self.ttl(timeout),
+            only_new=True,
+        ))
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        ttl = self.ttl(timeout)
+        if ttl is None:
+            return bool(self._client.persist(key)) or bool(
+                self._client.exists(key)
+            )
+        return bool(self._client.pexpire(key, int(ttl * 1000)))
+
+    def incr(self, key, delta=1, version=None):
+        value = self._incr(keys=[self._key(key, version)], args=[delta])
+        if value is None:
+            raise ValueError("Key '%s' not found" % key)
+        return value
+
+    def has_key(self, key, version=None):
+        return bool(self._client.exists(self._key(key, version)))
+
+    def delete(self, key, version=None):
+        self._client.delete(self._key(key, version))
+
+    def delete_many(self, keys, version=None):
+        names = [self._key(key, version) for key in keys]
+        if names:
+            self._client.delete(*names)
+
+    def clear(self):
+        """Удаляет ключи своего KEY_PREFIX, без него — всю базу."""
+        namespace = self.namespace()
+        if not namespace:
+            self._client.flushdb()
+            return
+        names = []
+        for name in self._client.scan_iter(
+            match=f'{namespace}*', count=SCAN_COUNT
+        ):
+            names.append(name)
+            if len(names) == SCAN_COUNT:
+                self._client.delete(*names)
+                names = []
+        if names:
+            self._client.delete(*names)
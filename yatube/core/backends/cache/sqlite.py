@@ -0,0 +1,198 @@
+"""Кэш в отдельном файле SQLite, общий для процессов одной машины.
+
+Подходит для разработки и одиночного сервера без Redis. Файл открыт
+в режиме WAL без fsync: потеря последних записей при сбое для кэша
+не страшна. Соединение свое у каждого потока и процесса, incr()
+выполняется под блокировкой записи SQLite и поэтому атомарен между
+процессами.
+"""
+
+import contextlib
+import os
+import sqlite3
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+
+from .base import SerializingCache
+
+CHUNK_SIZE = 500
+# Как часто (в записях) удалять просроченные ключи и лишние записи.
+CULL_EVERY = 100
+
+
+class SQLiteCache(SerializingCache):
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self.path = location
+        self._local = threading.local()
+        self._writes = 0
+
+    @property
+    def _db(self):
+        pid, connection = getattr(self._local, 'connection', (None, None))
+        if pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(
+                self.path, timeout=10, isolation_level=None,
+                check_same_thread=False,
+            )
+            connection.execute('PRAGMA journal_mode = WAL')
+            connection.execute('PRAGMA synchronous = OFF')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS cache ('
+                'key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL'
+                ') WITHOUT ROWID'
+            )
+            connection.execute(
+                'CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires)'
+            )
+            self._local.connection = (os.getpid(), connection)
+        return connection
+
+    @contextlib.contextmanager
+    def _write(self):
+        """Транзакция с блокировкой записи с самого начала."""
+        db = self._db
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            yield db
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        db.execute('COMMIT')
+
+    def _expires(self, timeout):
+        ttl = self.ttl(timeout)
+        return None if ttl is None else time.time() + ttl
+
+    def _maybe_cull(self, db):
+        self._writes += 1
+        if self._writes % CULL_EVERY:
+            return
+        db.execute('DELETE FROM cache WHERE expires <= ?', (time.time(),))
+        count = db.execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+        if count > self._max_entries:
+            # Ниже предела с запасом в 1/CULL_FREQUENCY, первыми
+            # уходят ключи, которым раньше истекать.
+            excess = (
+                count - self._max_entries
+                + self._max_entries // self._cull_frequency
+            )
+            db.execute(
+                'DELETE FROM cache WHERE key IN (SELECT key FROM cache '
+                'ORDER BY expires IS NULL, expires LIMIT ?)', (excess,)
+            )
+
+    def get(self, key, default=None, version=None):
+        return self.get_many([key], version).get(key, default)
+
+    def get_many(self, keys, version=None):
+        made = {self.make_key(key, version): key for key in keys}
+        for name in made:
+            self.validate_key(name)
+        found = {}
+        now = time.time()
+        names = list(made)
+        for start in range(0, len(names), CHUNK_SIZE):
+            chunk = names[start:start + CHUNK_SIZE]
+            rows = self._db.execute(
+                'SELECT key, value FROM cache WHERE key IN ({}) '
+                'AND (expires IS NULL OR expires > ?)'.format(
+                    ', '.join('?' * len(chunk))
+                ),
+                (*chunk, now),
+            )
+            for name, value in rows:
+                found[made[name]] = self.loads(value)
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.set_many({key: value}, timeout, version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        expires = self._expires(timeout)
+        rows = []
+        for key, value in data.items():
+            key = self.make_key(key, version)
+            self.validate_key(key)
+            rows.append((key, self.dumps(value), expires))
+        with self._write() as db:
+            db.executemany(
+                'INSERT OR REPLACE INTO cache (key, value, expires) '
+                'VALUES (?, ?, ?)', rows
+            )
+            self._maybe_cull(db)
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version)
+        self.validate_key(key)
+        with self._write() as db:
+            cursor = db.execute(
+                'INSERT INTO cache (key, value, expires) VALUES (?, ?, ?) '
+                'ON CONFLICT (key) DO UPDATE SET '
+                'value = excluded.value, expires = excluded.expires '
+                'WHERE cache.expires <= ?',
+                (key, self.dumps(value), self._expires(timeout), time.time())
+            )
+            self._maybe_cull(db)
+            return cursor.rowcount == 1
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version)
+        self.validate_key(key)
+        with self._write() as db:
+            cursor = db.execute(
+                'UPDATE cache SET expires = ? WHERE key = ? '
+                'AND (expires IS NULL OR expires > ?)',
+                (self._expires(timeout), key, time.time())
+            )
+            return cursor.rowcount == 1
+
+    def incr(self, key, delta=1, version=None):
+        name = self.make_key(key, version)
+        self.validate_key(name)
+        with self._write() as db:
+            row = db.execute(
+                'SELECT value FROM cache WHERE key = ? '
+                'AND (expires IS NULL OR expires > ?)', (name, time.time())
+            ).fetchone()
+            if row is None:
+                raise ValueError("Key '%s' not found" % key)
+            value = self.loads(row[0]) + delta
+            db.execute(
+                'UPDATE cache SET value = ? WHERE key = ?',
+                (self.dumps(value), name)
+            )
+            return value
+
+    def has_key(self, key, version=None):
+        return self.get(key, self, version) is not self
+
+    def delete(self, key, version=None):
+        self.delete_many([key], version)
+
+    def delete_many(self, keys, version=None):
+        names = [self.make_key(key, version) for key in keys]
+        with self._write() as db:
+            db.executemany(
+                'DELETE FROM cache WHERE key = ?', [(name,) for name in names]
+            )
+
+    def clear(self):
+        """Удаляет ключи своего KEY_PREFIX, без него — все."""
+        namespace = self.namespace()
+        with self._write() as db:
+            if namespace:
+                # Диапазон по первичному ключу вместо LIKE с экранированием.
+                db.execute(
+                    'DELETE FROM cache WHERE key >= ? AND key < ?',
+                    (namespace, namespace[:-1] + chr(ord(':') + 1))
+                )
+            else:
+                db.execute('DELETE FROM cache')
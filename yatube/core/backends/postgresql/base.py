@@ -0,0 +1,78 @@
+"""PostgreSQL с пулом соединений psycopg2 на процесс.
+
+Django держит одно соединение на поток и закрывает его по истечении
+CONN_MAX_AGE. Здесь закрытие возвращает соединение в пул, а новое
+берется из пула, так что соединение с сервером устанавливается,
+только когда пул растет. Размер пула задается ключом POOL настроек
+базы: {'MIN_SIZE': 1, 'MAX_SIZE': 10}. MAX_SIZE не должен быть
+меньше числа потоков, обслуживающих запросы.
+"""
+
+import threading
+
+from django.db.backends.postgresql import base, creation
+from psycopg2 import pool
+
+DEFAULT_POOL = {'MIN_SIZE': 1, 'MAX_SIZE': 10}
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # Соединения из пула не дадут удалить тестовую базу.
+        DatabaseWrapper.close_pools(test_database_name)
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+
+    _pools = {}
+    _pools_lock = threading.Lock()
+
+    def get_pool(self):
+        """Пул для алиаса и имени базы, создается при первом обращении."""
+        key = (self.alias, self.settings_dict['NAME'])
+        with self._pools_lock:
+            connection_pool = self._pools.get(key)
+            if connection_pool is None:
+                options = {
+                    **DEFAULT_POOL, **self.settings_dict.get('POOL', {})
+                }
+                connection_pool = pool.ThreadedConnectionPool(
+                    options['MIN_SIZE'], options['MAX_SIZE'],
+                    **self.get_connection_params()
+                )
+                self._pools[key] = connection_pool
+            return connection_pool
+
+    @classmethod
+    def close_pools(cls, name=None):
+        """Закрывает пулы базы name или все пулы процесса."""
+        with cls._pools_lock:
+            for key in list(cls._pools):
+                if name is None or key[1] == name:
+                    cls._pools.pop(key).closeall()
+
+    def get_new_connection(self, conn_params):
+        self.pool = self.get_pool()
+        connection = self.pool.getconn()
+        # Соединение, которое сервер закрыл, пока оно лежало в пуле.
+        while connection.closed:
+            self.pool.putconn(connection, close=True)
+            connection = self.pool.getconn()
+        options = self.settings_dict['OPTIONS']
+        try:
+            self.isolation_level = options['isolation_level']
+        except KeyError:
+            self.isolation_level = connection.isolation_level
+        else:
+            if self.isolation_level != connection.isolation_level:
+                connection.set_session(isolation_level=self.isolation_level)
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            # Пул сам откатит незавершенную транзакцию.
+            with self.wrap_database_errors:
+                self.pool.putconn(self.connection)
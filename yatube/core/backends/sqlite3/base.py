@@ -0,0 +1,31 @@
+"""SQLite с WAL и настройками под веб-нагрузку.
+
+Pragma выставляются на каждом новом соединении: в режиме WAL
+читатели не ждут писателя, busy_timeout заставляет второго писателя
+подождать вместо немедленной ошибки «database is locked». Значения
+можно переопределить ключом PRAGMAS в настройках базы.
+"""
+
+from django.db.backends.sqlite3 import base
+
+PRAGMAS = {
+    'journal_mode': 'WAL',
+    # В режиме WAL NORMAL не теряет целостность, только последние
+    # транзакции при сбое питания, и не делает fsync на каждый COMMIT.
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'temp_store': 'MEMORY',
+    # Отрицательное значение — размер кэша страниц в килобайтах.
+    'cache_size': -20000,
+    'mmap_size': 128 * 1024 * 1024,
+}
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        pragmas = {**PRAGMAS, **self.settings_dict.get('PRAGMAS', {})}
+        for name, value in pragmas.items():
+            connection.execute(f'PRAGMA {name} = {value}')
+        return connection
@@ -0,0 +1,57 @@
+"""Настройки кэша из переменных окружения.
+
+CACHE_BACKEND выбирает хранилище:
+sqlite (по умолчанию) — файл CACHE_LOCATION, общий для всех процессов
+машины, работает без внешних сервисов; redis — сервер по URL
+CACHE_LOCATION, общий для всех машин; locmem — память процесса, у
+каждого процесса свой кэш. CACHE_NAMESPACE — префикс ключей, чтобы
+несколько копий сайта делили один сервер. CACHE_COMPRESS_MIN_LENGTH —
+с какого размера в байтах сжимать значения, 0 выключает сжатие.
+"""
+
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+BACKENDS = {
+    'sqlite': 'core.backends.cache.sqlite.SQLiteCache',
+    'redis': 'core.backends.cache.redis.RedisCache',
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+}
+DEFAULT_REDIS_URL = 'redis://localhost:6379/0'
+DEFAULT_COMPRESS_MIN_LENGTH = 1024
+SHARED_MAX_ENTRIES = 100000
+
+
+def caches_from_env(environ, base_dir, default='sqlite'):
+    """Словарь для CACHES."""
+    backend = environ.get('CACHE_BACKEND', default).lower()
+    if backend not in BACKENDS:
+        raise ImproperlyConfigured(
+            f'Неизвестный CACHE_BACKEND «{backend}», '
+            f'ожидается один из: {", ".join(sorted(BACKENDS))}.'
+        )
+    config = {
+        'BACKEND': BACKENDS[backend],
+        'KEY_PREFIX': environ.get('CACHE_NAMESPACE', 'yatube'),
+    }
+    if backend == 'locmem':
+        return {'default': config}
+    try:
+        compress = int(environ.get(
+            'CACHE_COMPRESS_MIN_LENGTH', DEFAULT_COMPRESS_MIN_LENGTH
+        ))
+    except ValueError:
+        raise ImproperlyConfigured(
+            'CACHE_COMPRESS_MIN_LENGTH должно быть целым числом.'
+        )
+    config['OPTIONS'] = {
+        'MAX_ENTRIES': SHARED_MAX_ENTRIES,
+        'COMPRESS_MIN_LENGTH': compress or None,
+    }
+    config['LOCATION'] = environ.get(
+        'CACHE_LOCATION',
+        os.path.join(base_dir, 'cache.sqlite3') if backend == 'sqlite'
+        else DEFAULT_REDIS_URL
+    )
+    return {'default': config}
@@ -3,3 +3,25 @@ SYMBOLS_FOR_PREVIEW = 15
 POSTS_PER_PAGE = 10
 
 POSTS_FOR_PAGINATOR_TESTING = 13
+
+TIMELINE_BATCH_SIZE = 1000
+
+STATS_BATCH_SIZE = 500
+
+FEED_CACHE_TIMEOUT = 60 * 60
+
+POST_CARD_TIMEOUT = 60 * 60 * 24
+
+COMMENTS_PER_PAGE = 20
+
+SEARCH_BATCH_SIZE = 1000
+
+TRANSFER_BATCH_SIZE = 1000
+
+SEED_BATCH_SIZE = 1000
+
+REPLICA_PIN_COOKIE = 'use_primary_db'
+
+API_BATCH_MAX_IDS = 100
+
+API_POST_TIMEOUT = 60 * 60 * 24
@@ -0,0 +1,26 @@
+"""Счетчики версий в общем кэше.
+
+Кэши страниц и фрагментов хранят вместе с записью версии того, от чего
+она зависит; запись с устаревшей версией считается промахом. bump()
+увеличивает счетчики, get_many() читает их одним обращением к кэшу.
+Счетчики хранятся без срока, отсутствующий равен нулю.
+"""
+
+from django.core.cache import cache
+
+
+def bump(*keys):
+    """Увеличивает счетчики ключей."""
+    for key in keys:
+        cache.add(key, 0, None)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Счетчик вытеснили между add() и incr().
+            cache.set(key, 1, None)
+
+
+def get_many(keys):
+    """Текущие значения счетчиков: {ключ: версия} в порядке keys."""
+    found = cache.get_many(keys)
+    return {key: found.get(key, 0) for key in keys}
@@ -0,0 +1,88 @@
+"""Настройки базы данных из переменных окружения.
+
+DB_ENGINE выбирает базу: sqlite (по умолчанию) или postgresql.
+Для SQLite читается только DB_NAME — путь к файлу. Для PostgreSQL:
+DB_NAME, DB_USER, DB_PASSWORD, DB_HOST, DB_PORT, DB_CONN_MAX_AGE
+(сколько секунд держать соединение потока, 0 — закрывать после
+запроса) и DB_POOL_SIZE — наибольший размер пула соединений
+процесса, 0 выключает пул. DB_TEST_NAME задает имя тестовой базы.
+
+DB_REPLICAS — реплики для чтения через запятую: пути к файлам для
+SQLite, host или host:port для PostgreSQL. Остальные параметры
+реплики берутся у основной базы.
+"""
+
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+ENGINES = {
+    'sqlite': 'core.backends.sqlite3',
+    'sqlite3': 'core.backends.sqlite3',
+    'postgresql': 'django.db.backends.postgresql',
+    'postgres': 'django.db.backends.postgresql',
+}
+POOLED_ENGINE = 'core.backends.postgresql'
+DEFAULT_CONN_MAX_AGE = 60
+
+
+def _int(environ, name, default):
+    value = environ.get(name, '')
+    if not value:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ImproperlyConfigured(f'{name} должно быть целым числом.')
+
+
+def database_from_env(environ, base_dir):
+    """Словарь для DATABASES['default']."""
+    engine = environ.get('DB_ENGINE', 'sqlite').lower()
+    if engine not in ENGINES:
+        raise ImproperlyConfigured(
+            f'Неизвестный DB_ENGINE «{engine}», '
+            f'ожидается один из: {", ".join(sorted(ENGINES))}.'
+        )
+    config = {'ENGINE': ENGINES[engine]}
+    if environ.get('DB_TEST_NAME'):
+        config['TEST'] = {'NAME': environ['DB_TEST_NAME']}
+    if ENGINES[engine] == ENGINES['sqlite']:
+        config['NAME'] = environ.get(
+            'DB_NAME', os.path.join(base_dir, 'db.sqlite3')
+        )
+        return config
+    config.update({
+        'NAME': environ.get('DB_NAME', 'yatube'),
+        'USER': environ.get('DB_USER', ''),
+        'PASSWORD': environ.get('DB_PASSWORD', ''),
+        'HOST': environ.get('DB_HOST', ''),
+        'PORT': environ.get('DB_PORT', ''),
+        'CONN_MAX_AGE': _int(
+            environ, 'DB_CONN_MAX_AGE', DEFAULT_CONN_MAX_AGE
+        ),
+    })
+    pool_size = _int(environ, 'DB_POOL_SIZE', 0)
+    if pool_size:
+        config['ENGINE'] = POOLED_ENGINE
+        config['POOL'] = {'MIN_SIZE': 1, 'MAX_SIZE': pool_size}
+    return config
+
+
+def replicas_from_env(environ, primary):
+    """Словари DATABASES для реплик: replica1, replica2 и т. д."""
+    replicas = {}
+    entries = [
+        entry.strip() for entry in environ.get('DB_REPLICAS', '').split(',')
+        if entry.strip()
+    ]
+    for number, entry in enumerate(entries, 1):
+        # Под тестами реплика — та же тестовая база, что и основная.
+        config = {**primary, 'TEST': {'MIRROR': 'default'}}
+        if primary['ENGINE'] == ENGINES['sqlite']:
+            config['NAME'] = entry
+        else:
+            host, _, port = entry.partition(':')
+            config.update(HOST=host, PORT=port or primary['PORT'])
+        replicas[f'replica{number}'] = config
+    return replicas
@@ -0,0 +1,94 @@
+"""Дыры — части страницы, которые зависят от пользователя.
+
+Шаблон выводит такую часть тегом {% hole 'имя' аргументы %}. Обычно
+тег сразу рендерит шаблон дыры. Если страница может попасть в кэш
+страниц, тег оставляет метку с именем и аргументами, и тело страницы
+получается одинаковым для всех посетителей. Метки заменяет fill()
+при каждом ответе, из кэша или только что отрендеренном: это второй
+проход, в котором рендерятся только маленькие шаблоны дыр.
+
+Аргументы дыры — простые значения из тела страницы (id, имена URL),
+пользователь и токен CSRF берутся из запроса при заполнении. Текст
+пользователей экранируется, поэтому подделать метку в посте нельзя.
+"""
+
+import base64
+import hashlib
+import json
+import re
+
+from django.contrib import messages
+from django.template.loader import render_to_string
+
+MARKER = '<!--hole:{}-->'
+MARKER_RE = re.compile(rb'<!--hole:([A-Za-z0-9_=-]+)-->')
+
+_holes = {}
+
+
+def register(name, template_name):
+    """Регистрирует дыру: функцию контекста и шаблон.
+
+    Функция получает запрос и аргументы тега и возвращает контекст
+    для template_name.
+    """
+    def decorator(func):
+        _holes[name] = (template_name, func)
+        return func
+    return decorator
+
+
+def render(request, name, args):
+    return _render(request, name, args)[0]
+
+
+def _render(request, name, args):
+    """HTML дыры и простые значения ее контекста."""
+    template_name, get_context = _holes[name]
+    context = get_context(request, *args)
+    state = sorted(
+        (key, value) for key, value in context.items()
+        if value is None or isinstance(value, (bool, int, str))
+    )
+    return render_to_string(template_name, context, request), state
+
+
+def marker(request, name, args):
+    request.page_holes = True
+    payload = json.dumps([name, list(args)]).encode()
+    return MARKER.format(base64.urlsafe_b64encode(payload).decode())
+
+
+def fill(request, response):
+    """Заменяет метки в ответе содержимым дыр для этого запроса.
+
+    Тело общее, а страница у каждого пользователя своя, поэтому ETag
+    ответа смешивается с тем, от чего зависят дыры: пользователем,
+    числом его сообщений и простыми значениями контекстов дыр
+    (например, подписан ли он на автора). Сам HTML дыр в ETag не
+    попадает: токен CSRF в форме маскируется заново при каждом ответе.
+    """
+    states = []
+
+    def replace(match):
+        name, args = json.loads(base64.urlsafe_b64decode(match.group(1)))
+        part, state = _render(request, name, args)
+        states.append((name, args, state))
+        return part.encode(response.charset)
+
+    response.content = MARKER_RE.sub(replace, response.content)
+    if states and response.has_header('ETag'):
+        user = request.user
+        payload = repr((
+            user.pk if user.is_authenticated else None,
+            len(messages.get_messages(request)),
+            states,
+        ))
+        digest = hashlib.sha1(response['ETag'].encode())
+        digest.update(payload.encode())
+        response['ETag'] = '"{}"'.format(digest.hexdigest())
+
+
+@register('header', 'includes/header.html')
+def header(request, view_name):
+    return {'view_name': view_name}
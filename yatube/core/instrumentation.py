@@ -0,0 +1,209 @@
+"""Замеры запроса: SQL, шаблоны, кэш и отдельные участки кода.
+
+Метрики текущего запроса живут в памяти потока, пока их собирает
+InstrumentationMiddleware. Вне запроса (в командах, фоновых задачах)
+timer() и обертки кэша и шаблонов сразу передают управление дальше.
+Итоги запросов копятся в гистограмме по имени URL внутри процесса.
+"""
+
+import contextlib
+import functools
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.template.backends.django import Template
+
+BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+_local = threading.local()
+_MISS = object()
+
+
+class RequestMetrics:
+    """Время и число вызовов по каждой метрике одного запроса."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.seconds = defaultdict(float)
+        self.counts = defaultdict(int)
+        self.depth = defaultdict(int)
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+
+def current():
+    return getattr(_local, 'metrics', None)
+
+
+@contextlib.contextmanager
+def measure_request():
+    _local.metrics = metrics = RequestMetrics()
+    try:
+        yield metrics
+    finally:
+        _local.metrics = None
+
+
+@contextlib.contextmanager
+def timer(name):
+    """Прибавляет время блока к метрике name текущего запроса.
+
+    Вложенные блоки с тем же именем не считаются второй раз:
+    карточка поста внутри страницы — это время одной страницы.
+    """
+    metrics = current()
+    if metrics is None:
+        yield
+        return
+    metrics.depth[name] += 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.depth[name] -= 1
+        if not metrics.depth[name]:
+            metrics.seconds[name] += time.perf_counter() - start
+            metrics.counts[name] += 1
+
+
+def sql_wrapper(execute, sql, params, many, context):
+    """Обертка для connection.execute_wrapper()."""
+    with timer('db'):
+        return execute(sql, params, many, context)
+
+
+def _patch_cache(backend):
+    if backend.__dict__.get('_instrumented'):
+        return
+    get, get_many = backend.get, backend.get_many
+
+    @functools.wraps(get)
+    def instrumented_get(self, key, default=None, version=None):
+        metrics = current()
+        if metrics is None or metrics.depth['cache']:
+            return get(self, key, default, version)
+        with timer('cache'):
+            value = get(self, key, _MISS, version)
+        metrics.counts['cache_miss' if value is _MISS else 'cache_hit'] += 1
+        return default if value is _MISS else value
+
+    @functools.wraps(get_many)
+    def instrumented_get_many(self, keys, version=None):
+        metrics = current()
+        if metrics is None or metrics.depth['cache']:
+            return get_many(self, keys, version)
+        keys = list(keys)
+        with timer('cache'):
+            found = get_many(self, keys, version)
+        metrics.counts['cache_hit'] += len(found)
+        metrics.counts['cache_miss'] += len(keys) - len(found)
+        return found
+
+    backend.get = instrumented_get
+    backend.get_many = instrumented_get_many
+    backend._instrumented = True
+
+
+def _patch_templates():
+    if Template.__dict__.get('_instrumented'):
+        return
+    render = Template.render
+
+    @functools.wraps(render)
+    def instrumented_render(self, context=None, request=None):
+        with timer('template'):
+            return render(self, context, request)
+
+    Template.render = instrumented_render
+    Template._instrumented = True
+
+
+def install():
+    """Подключает замеры шаблонов и всех кэшей из CACHES."""
+    _patch_templates()
+    for alias in settings.CACHES:
+        _patch_cache(type(caches[alias]))
+
+
+def server_timing(metrics, total):
+    """Значение заголовка Server-Timing."""
+    parts = [f'total;dur={total * 1000:.1f}']
+    for name in sorted(metrics.seconds):
+        count = metrics.counts[name]
+        if name == 'db':
+            desc = f'{count} queries'
+        elif name == 'cache':
+            desc = (f'{metrics.counts["cache_hit"]} hits, '
+                    f'{metrics.counts["cache_miss"]} misses')
+        else:
+            desc = f'{count} calls'
+        parts.append(
+            f'{name};dur={metrics.seconds[name] * 1000:.1f};desc="{desc}"'
+        )
+    return ', '.join(parts)
+
+
+def _bucket(milliseconds):
+    for edge in BUCKETS_MS:
+        if milliseconds <= edge:
+            return f'le_{edge}'
+    return f'gt_{BUCKETS_MS[-1]}'
+
+
+class Histogram:
+    """Распределение времени ответа и средние метрики по именам URL."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+
+    def record(self, name, metrics, total):
+        milliseconds = total * 1000
+        with self._lock:
+            view = self._views.setdefault(name, {
+                'requests': 0,
+                'buckets': defaultdict(int),
+                'ms': defaultdict(float),
+                'counts': defaultdict(int),
+            })
+            view['requests'] += 1
+            view['buckets'][_bucket(milliseconds)] += 1
+            view['ms']['total'] += milliseconds
+            for metric, seconds in metrics.seconds.items():
+                view['ms'][metric] += seconds * 1000
+            for metric, count in metrics.counts.items():
+                view['counts'][metric] += count
+
+    def snapshot(self):
+        """Копия гистограммы: корзины и средние значения на запрос."""
+        labels = [f'le_{edge}' for edge in BUCKETS_MS]
+        labels.append(f'gt_{BUCKETS_MS[-1]}')
+        with self._lock:
+            return {
+                name: {
+                    'requests': view['requests'],
+                    'latency_ms': {
+                        label: view['buckets'][label] for label in labels
+                    },
+                    'mean_ms': {
+                        metric: round(value / view['requests'], 3)
+                        for metric, value in sorted(view['ms'].items())
+                    },
+                    'mean_counts': {
+                        metric: round(value / view['requests'], 3)
+                        for metric, value in sorted(view['counts'].items())
+                    },
+                }
+                for name, view in sorted(self._views.items())
+            }
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+
+
+histogram = Histogram()
@@ -0,0 +1,169 @@
+import os
+import random
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils.cache import get_conditional_response
+
+from . import holes, instrumentation, page_cache, profiling, routers
+from .constants import REPLICA_PIN_COOKIE
+
+
+class InstrumentationMiddleware:
+    """Замеряет каждый запрос и отдает итог в заголовке Server-Timing.
+
+    Время SQL считается через execute_wrapper всех подключений,
+    время шаблонов и попадания в кэш — обертками из instrumentation.
+    Итог запроса попадает в гистограмму по имени URL.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        instrumentation.install()
+
+    def __call__(self, request):
+        with instrumentation.measure_request() as metrics, \
+                ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(
+                    connection.execute_wrapper(instrumentation.sql_wrapper)
+                )
+            response = self.get_response(request)
+            total = metrics.elapsed()
+        match = getattr(request, 'resolver_match', None)
+        if match:
+            name = match.view_name
+        elif hasattr(request, 'page_cache_hit'):
+            name = f'{request.page_cache_hit} (page cache)'
+        else:
+            name = 'unresolved'
+        instrumentation.histogram.record(name, metrics, total)
+        response['Server-Timing'] = instrumentation.server_timing(
+            metrics, total
+        )
+        return response
+
+
+class ReplicaMiddleware:
+    """Отправляет чтение безопасных запросов в реплики.
+
+    Без DATABASE_REPLICAS убирается из цепочки. Запросы, которые
+    пишут, ставят cookie на REPLICA_PIN_SECONDS: пока она жива,
+    все чтения пользователя идут в основную базу.
+    """
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        pinned = (
+            request.method not in ('GET', 'HEAD', 'OPTIONS')
+            or REPLICA_PIN_COOKIE in request.COOKIES
+        )
+        with routers.replica_reads(pinned) as state:
+            response = self.get_response(request)
+        if state.wrote:
+            response.set_cookie(
+                REPLICA_PIN_COOKIE, '1',
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True, samesite='Lax',
+            )
+        return response
+
+
+class PageCacheMiddleware:
+    """Отдает сохраненные страницы и заполняет в них дыры.
+
+    Без PAGE_CACHE_URL_NAMES убирается из цепочки. Сохраняется тело
+    страницы с метками дыр, общее для всех посетителей; дыры
+    заполняются для каждого запроса (см. core.holes). Должен стоять
+    после CsrfViewMiddleware, AuthenticationMiddleware и
+    MessageMiddleware: при заполнении нужны пользователь и токен из
+    cookie, а cookie сессии и CSRF ставятся уже после сохранения.
+
+    Промах у анонимного посетителя — страница, которая почти наверняка
+    будет сохранена, — читает из основной базы вместе с ETag, остальные
+    запросы читают из реплик, и их страницы не сохраняются
+    (см. core.routers).
+
+    Заполнение меняет ETag (см. core.holes.fill), поэтому If-None-Match
+    сверяется здесь, после fill(), и при попадании, и при промахе:
+    view видит ETag без дыр и сам 304 на такой запрос не ответит.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PAGE_CACHE_URL_NAMES:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not page_cache.is_cacheable(request):
+            return self.get_response(request)
+        response = page_cache.fetch(request)
+        if response is None:
+            request.page_cacheable = True
+            response = self.get_response(request)
+            page_cache.store(request, response)
+            if not getattr(request, 'page_holes', False):
+                return response
+        holes.fill(request, response)
+        return get_conditional_response(
+            request, etag=response.get('ETag'), response=response
+        )
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (getattr(request, 'page_cacheable', False)
+                and request.method == 'GET'
+                and request.resolver_match.view_name
+                in settings.PAGE_CACHE_URL_NAMES
+                and not request.user.is_authenticated):
+            routers.pin()
+
+
+class ProfilingMiddleware:
+    """Профилирует долю запросов к выбранным URL.
+
+    Включается непустым PROFILE_URL_NAMES; иначе Django убирает
+    middleware из цепочки, и запросы ничего не платят. Выбранный
+    запрос выполняется под Sampler, свернутые стеки пишутся
+    в PROFILE_DIR, имя файла отдается в заголовке X-Profile.
+    Персонал может запросить профиль явно параметром ?profile=1.
+    Должен стоять последним в MIDDLEWARE.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILE_URL_NAMES:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.url_names = set(settings.PROFILE_URL_NAMES)
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def sampled(self, request):
+        if request.resolver_match.view_name not in self.url_names:
+            return False
+        if 'profile' in request.GET and request.user.is_staff:
+            return True
+        return random.random() < settings.PROFILE_SAMPLE_RATE
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not self.sampled(request):
+            return None
+        sampler = profiling.Sampler(settings.PROFILE_INTERVAL)
+        sampler.start()
+        try:
+            response = view_func(request, *view_args, **view_kwargs)
+            if hasattr(response, 'render') and callable(response.render):
+                response = response.render()
+        finally:
+            sampler.stop()
+        path = profiling.write_profile(
+            sampler, request.resolver_match.view_name
+        )
+        response['X-Profile'] = os.path.basename(path)
+        return response
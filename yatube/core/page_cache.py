@@ -0,0 +1,109 @@
+"""Кэш целых страниц.
+
+Сохраняется ответ 200 на GET к URL из PAGE_CACHE_URL_NAMES, если он
+не ставит cookie, не выдает токен CSRF и не читал из реплики. Части страницы, которые
+зависят от пользователя, шаблоны выводят дырами (core.holes), и
+сохраненное тело общее для всех посетителей; все остальное в
+шаблонах этих страниц не должно зависеть от пользователя. Запросы
+с cookie сообщений идут мимо кэша. Попадание отдается по пути
+запроса, без разрешения URL и вызова view.
+
+View помечают страницу суррогатными ключами через tag(), например
+post:<id> или author:<id>. Сохраненная страница помнит версии своих
+ключей, purge() увеличивает версии, и при следующем обращении
+страница с устаревшей версией считается промахом. Версии всех ключей
+страницы читаются одним get_many. Ключи также отдаются в заголовке
+Surrogate-Key для CDN, который умеет очищать кэш по ключам.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+from . import counters, routers
+
+PAGE_KEY = 'page:{}'
+VERSION_KEY = 'surrogate:{}'
+# Заголовки, которые относятся к одному ответу, а не к странице.
+UNCACHED_HEADERS = {'server-timing', 'x-profile'}
+
+
+def tag(request, *keys):
+    """Добавляет суррогатные ключи к странице текущего запроса.
+
+    Версии ключей запоминаются сразу: view вызывает tag() после
+    чтения данных, и очистка во время рендеринга не потеряется.
+    Для запросов, которые не попадут в кэш, ничего не делает.
+    """
+    if not getattr(request, 'page_cacheable', False):
+        return
+    if not hasattr(request, 'surrogate_keys'):
+        request.surrogate_keys = {}
+    new = set(keys) - set(request.surrogate_keys)
+    request.surrogate_keys.update(versions(new))
+
+
+def purge(*keys):
+    """Делает недействительными все страницы с этими ключами."""
+    counters.bump(*(VERSION_KEY.format(name) for name in keys))
+
+
+def versions(keys):
+    if not keys:
+        return {}
+    found = counters.get_many([VERSION_KEY.format(name) for name in keys])
+    return {name: found[VERSION_KEY.format(name)] for name in keys}
+
+
+def is_cacheable(request):
+    return (
+        request.method in ('GET', 'HEAD')
+        and 'messages' not in request.COOKIES
+    )
+
+
+def page_key(request):
+    url = f'{request.get_host()}{request.get_full_path()}'
+    return PAGE_KEY.format(hashlib.sha1(url.encode()).hexdigest())
+
+
+def fetch(request):
+    """Сохраненный ответ с метками дыр или None, если его нет или он
+    устарел."""
+    entry = cache.get(page_key(request))
+    if entry is None or versions(entry['keys']) != entry['keys']:
+        return None
+    request.page_cache_hit = entry['view_name']
+    response = HttpResponse(entry['content'], status=entry['status'])
+    for header, value in entry['headers']:
+        response[header] = value
+    return response
+
+
+def store(request, response):
+    match = getattr(request, 'resolver_match', None)
+    if (request.method != 'GET'
+            or response.status_code != 200
+            or response.streaming
+            or response.cookies
+            or request.META.get('CSRF_COOKIE_USED')
+            or routers.used_replica()
+            or match is None
+            or match.view_name not in settings.PAGE_CACHE_URL_NAMES):
+        return
+    keys = getattr(request, 'surrogate_keys', {})
+    if keys:
+        response['Surrogate-Key'] = ' '.join(sorted(keys))
+    headers = [
+        (header, value) for header, value in response.items()
+        if header.lower() not in UNCACHED_HEADERS
+    ]
+    cache.set(page_key(request), {
+        'view_name': match.view_name,
+        'status': response.status_code,
+        'headers': headers,
+        'content': response.content,
+        'keys': keys,
+    }, settings.PAGE_CACHE_TIMEOUT)
@@ -0,0 +1,128 @@
+"""Выборочное профилирование запросов в свернутые стеки.
+
+Sampler периодически снимает стек потока, который обрабатывает
+запрос, и считает одинаковые стеки. В главном потоке снимки делает
+сигнал SIGPROF по процессорному времени, в остальных (runserver
+обслуживает запросы в потоках) — служебный поток через
+sys._current_frames(). Итог пишется в формате «кадр;кадр;кадр N»,
+который понимают flamegraph.pl, speedscope и inferno.
+
+Для кадров рендеринга шаблона к имени функции добавляется имя
+шаблона, чтобы на графе были видны include и отдельные шаблоны.
+"""
+
+import os
+import signal
+import sys
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.template.base import Template
+from django.utils import timezone
+
+TEMPLATE_CODES = {Template.render.__code__, Template._render.__code__}
+STDLIB_DIR = os.path.dirname(os.__file__)
+
+
+def _short_path(filename):
+    marker = f'site-packages{os.sep}'
+    if marker in filename:
+        return filename.split(marker, 1)[1]
+    for root in (settings.BASE_DIR, STDLIB_DIR):
+        if filename.startswith(root + os.sep):
+            return os.path.relpath(filename, root)
+    return filename
+
+
+def _label(frame):
+    code = frame.f_code
+    label = f'{code.co_name} ({_short_path(code.co_filename)})'
+    if code in TEMPLATE_CODES:
+        origin = getattr(frame.f_locals.get('self'), 'origin', None)
+        if origin is not None and origin.template_name:
+            label += f' [{origin.template_name}]'
+    return label
+
+
+class Sampler:
+    """Снимает стеки одного потока каждые interval секунд."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.stacks = Counter()
+        self._thread_id = None
+        self._stopped = threading.Event()
+        self._watcher = None
+        self._previous_handler = None
+
+    def _record(self, frame):
+        labels = []
+        while frame is not None:
+            labels.append(_label(frame))
+            frame = frame.f_back
+        if labels:
+            self.stacks[';'.join(reversed(labels))] += 1
+
+    def _on_signal(self, signum, frame):
+        self._record(frame)
+
+    def _watch(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            self._record(frame)
+
+    @staticmethod
+    def can_use_signal():
+        return (
+            hasattr(signal, 'setitimer')
+            and threading.current_thread() is threading.main_thread()
+        )
+
+    def start(self):
+        self._thread_id = threading.get_ident()
+        if self.can_use_signal():
+            self._previous_handler = signal.signal(
+                signal.SIGPROF, self._on_signal
+            )
+            signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+            return
+        self._stopped.clear()
+        self._watcher = threading.Thread(
+            target=self._watch, name='yatube-sampler', daemon=True
+        )
+        self._watcher.start()
+
+    def stop(self):
+        if self._watcher is None:
+            signal.setitimer(signal.ITIMER_PROF, 0)
+            signal.signal(signal.SIGPROF, self._previous_handler)
+            return
+        self._stopped.set()
+        self._watcher.join()
+        self._watcher = None
+
+    def collapsed(self):
+        """Строки свернутых стеков, самые частые первыми."""
+        return [
+            f'{stack} {count}' for stack, count in self.stacks.most_common()
+        ]
+
+
+def profile_path(view_name):
+    """Файл для нового профиля: имя URL, время и pid процесса."""
+    name = view_name.replace(':', '-')
+    stamp = timezone.now().strftime('%Y%m%dT%H%M%S%f')
+    return os.path.join(
+        settings.PROFILE_DIR, f'{name}.{stamp}.{os.getpid()}.collapsed'
+    )
+
+
+def write_profile(sampler, view_name):
+    """Сохраняет стеки в PROFILE_DIR и возвращает путь к файлу."""
+    os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+    path = profile_path(view_name)
+    with open(path, 'w', encoding='utf-8') as out:
+        for line in sampler.collapsed():
+            out.write(line + '\n')
+    return path
@@ -0,0 +1,86 @@
+"""Чтение из реплик с закреплением за основной базой после записи.
+
+Реплики используются только внутри запроса, который обрабатывает
+ReplicaMiddleware: команды, миграции и фоновые задачи всегда
+работают с основной базой. Внутри запроса в основную базу идет
+чтение, если запрос закреплен (не GET или пользователь недавно
+писал), если уже была запись и если открыта транзакция — иначе
+чтение внутри atomic() не увидело бы собственных изменений.
+
+Общие кэши (страницы, фрагменты лент, карточки) не сохраняют то,
+что прочитано из реплики: их ключи содержат версии, которые запись
+увеличивает сразу, а реплика может еще не получить саму запись, и
+устаревший HTML жил бы под новой версией до следующей правки. Кэш
+проверяет used_replica(); там, где сохранение важнее, например при
+промахе кэша страниц у анонимного посетителя, запрос заранее
+закрепляется за основной базой через pin().
+"""
+
+import contextlib
+import random
+import threading
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_local = threading.local()
+
+
+class ReplicaState:
+    def __init__(self, pinned):
+        self.pinned = pinned
+        self.wrote = False
+        self.replica_used = False
+
+
+def current():
+    return getattr(_local, 'state', None)
+
+
+@contextlib.contextmanager
+def replica_reads(pinned=False):
+    """Разрешает чтение из реплик в блоке, если он не закреплен."""
+    _local.state = state = ReplicaState(pinned)
+    try:
+        yield state
+    finally:
+        _local.state = None
+
+
+def pin():
+    """Остаток запроса читает из основной базы."""
+    state = current()
+    if state is not None:
+        state.pinned = True
+
+
+def used_replica():
+    """Читал ли текущий запрос из реплики."""
+    state = current()
+    return state is not None and state.replica_used
+
+
+class ReplicaRouter:
+    """Запись — в default, чтение — в случайную из DATABASE_REPLICAS."""
+
+    def db_for_read(self, model, **hints):
+        state = current()
+        if (state is None or state.pinned or state.wrote
+                or not settings.DATABASE_REPLICAS
+                or connections[DEFAULT_DB_ALIAS].in_atomic_block):
+            return DEFAULT_DB_ALIAS
+        state.replica_used = True
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        state = current()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики хранят те же данные, что и основная база.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
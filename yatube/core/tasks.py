@@ -0,0 +1,77 @@
+"""Фоновая очередь задач внутри процесса, без внешнего брокера.
+
+Задачи выполняются по одной в служебном потоке. Одинаковые задачи,
+уже стоящие в очереди, повторно не добавляются. При
+TASKS_ALWAYS_EAGER задача выполняется сразу в вызывающем потоке.
+"""
+
+import logging
+import os
+import queue
+import threading
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+class Worker:
+    def __init__(self, name):
+        self.name = name
+        self._queue = queue.Queue()
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def submit(self, key, func, *args, **kwargs):
+        """Ставит задачу в очередь. False, если такая уже ждет."""
+        if settings.TASKS_ALWAYS_EAGER:
+            self._execute(key, func, args, kwargs)
+            return True
+        with self._lock:
+            self._ensure_thread()
+            if key in self._pending:
+                return False
+            self._pending.add(key)
+        self._queue.put((key, func, args, kwargs))
+        return True
+
+    def join(self):
+        """Ждет, пока очередь опустеет."""
+        self._queue.join()
+
+    def _ensure_thread(self):
+        if self._pid != os.getpid():
+            # После fork поток и очередь родителя недоступны.
+            self._queue = queue.Queue()
+            self._pending = set()
+            self._thread = None
+            self._pid = os.getpid()
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(
+                target=self._run, name=self.name, daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            key, func, args, kwargs = self._queue.get()
+            try:
+                self._execute(key, func, args, kwargs)
+            finally:
+                with self._lock:
+                    self._pending.discard(key)
+                connections.close_all()
+                self._queue.task_done()
+
+    @staticmethod
+    def _execute(key, func, args, kwargs):
+        try:
+            func(*args, **kwargs)
+        except Exception:
+            logger.exception('Задача %s завершилась с ошибкой', key)
+
+
+worker = Worker('yatube-worker')
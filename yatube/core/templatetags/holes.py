@@ -0,0 +1,18 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from .. import holes
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def hole(context, name, *args):
+    """Часть страницы, которая зависит от пользователя.
+
+    {% hole 'header' request.resolver_match.view_name %}
+    """
+    request = context.get('request')
+    if getattr(request, 'page_cacheable', False):
+        return mark_safe(holes.marker(request, name, args))
+    return holes.render(request, name, args)
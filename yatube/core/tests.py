@@ -1,6 +1,34 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
 from http import HTTPStatus
+from unittest import skipUnless
 
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, connections
+from django.test import (
+    Client, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Post
+from . import counters
+from .backends.cache.sqlite import SQLiteCache
+from .backends.sqlite3.base import DatabaseWrapper as SqliteWrapper
+from .caches import caches_from_env
+from .constants import REPLICA_PIN_COOKIE
+from .database import POOLED_ENGINE, database_from_env, replicas_from_env
+from .instrumentation import histogram, measure_request, timer
+from .profiling import Sampler
+
+User = get_user_model()
 
 
 class Test404(TestCase):
@@ -9,3 +37,415 @@ class Test404(TestCase):
         response = self.client.get('/nonexist-page/')
         self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
         self.assertTemplateUsed(response, "core/404.html")
+
+
+class InstrumentationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        histogram.reset()
+
+    def test_nested_timer_counted_once(self):
+        """Вложенный блок с тем же именем не удваивает время."""
+        with measure_request() as metrics:
+            with timer('template'):
+                with timer('template'):
+                    pass
+        self.assertEqual(metrics.counts['template'], 1)
+
+    def test_server_timing_and_histogram(self):
+        """Заголовок раскладывает время, гистограмма копит запросы."""
+        first = self.client.get(reverse('posts:index'))
+        second = self.client.get(reverse('posts:index'))
+        header = first['Server-Timing']
+        for metric in ('total;dur=', 'db;dur=', 'template;dur=', 'cache;'):
+            self.assertIn(metric, header)
+        self.assertRegex(second['Server-Timing'], r'[1-9]\d* hits')
+        view = histogram.snapshot()['posts:index']
+        self.assertEqual(view['requests'], 2)
+        self.assertEqual(sum(view['latency_ms'].values()), 2)
+        self.assertGreater(view['mean_counts']['db'], 0)
+
+    def test_histogram_is_staff_only(self):
+        url = reverse('performance')
+        self.client.get(reverse('posts:index'))
+        self.assertEqual(self.client.get(url).status_code, HTTPStatus.FOUND)
+        staff = User.objects.create_user(username='staff', is_staff=True)
+        self.client.force_login(staff)
+        views = self.client.get(url).json()['views']
+        self.assertEqual(views['posts:index']['requests'], 1)
+        self.client.post(url)
+        self.assertNotIn('posts:index', self.client.get(url).json()['views'])
+
+
+class ProfilingTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        author = User.objects.create_user(username='profiled')
+        for i in range(10):
+            Post.objects.create(author=author, text=f'Пост {i}')
+
+    def setUp(self):
+        cache.clear()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+
+    def profile_index(self):
+        with override_settings(
+            PROFILE_URL_NAMES=('posts:index',),
+            PROFILE_SAMPLE_RATE=1,
+            PROFILE_INTERVAL=0.001,
+            PROFILE_DIR=self.directory,
+        ):
+            client = Client()
+            return client.get(reverse('posts:index')), client
+
+    def test_sampled_request_writes_collapsed_stacks(self):
+        """Профиль — строки «кадр;кадр N» с шаблонами на стеке."""
+        response, client = self.profile_index()
+        self.assertTrue(response['X-Profile'].startswith('posts-index.'))
+        path = os.path.join(self.directory, response['X-Profile'])
+        with open(path, encoding='utf-8') as profile:
+            lines = profile.read().splitlines()
+        self.assertTrue(lines)
+        for line in lines:
+            self.assertRegex(line, r'^\S.*;.* \d+$')
+        self.assertTrue(any('index (posts/views.py)' in line
+                            for line in lines))
+        other = client.get(reverse('posts:all_groups'))
+        self.assertNotIn('X-Profile', other)
+
+    @override_settings(PROFILE_URL_NAMES=())
+    def test_disabled_by_default(self):
+        response = Client().get(reverse('posts:index'))
+        self.assertNotIn('X-Profile', response)
+
+    def test_thread_sampler(self):
+        """Вне главного потока стеки снимает служебный поток."""
+        sampler = Sampler(0.0005)
+        result = {}
+
+        def busy():
+            sampler.start()
+            result['signal'] = sampler.can_use_signal()
+            deadline = time.perf_counter() + 0.05
+            while time.perf_counter() < deadline:
+                pass
+            sampler.stop()
+
+        thread = threading.Thread(target=busy)
+        thread.start()
+        thread.join()
+        self.assertFalse(result['signal'])
+        self.assertTrue(any('busy (' in line for line in sampler.collapsed()))
+
+
+class DatabaseConfigTest(SimpleTestCase):
+    def test_sqlite_by_default(self):
+        config = database_from_env({}, '/srv/yatube')
+        self.assertEqual(config['ENGINE'], 'core.backends.sqlite3')
+        self.assertEqual(config['NAME'], '/srv/yatube/db.sqlite3')
+
+    def test_postgresql_with_pool(self):
+        config = database_from_env({
+            'DB_ENGINE': 'postgresql',
+            'DB_NAME': 'yatube',
+            'DB_HOST': 'db',
+            'DB_CONN_MAX_AGE': '300',
+            'DB_POOL_SIZE': '20',
+            'DB_TEST_NAME': 'yatube_ci',
+        }, '/srv/yatube')
+        self.assertEqual(config['ENGINE'], POOLED_ENGINE)
+        self.assertEqual(config['HOST'], 'db')
+        self.assertEqual(config['CONN_MAX_AGE'], 300)
+        self.assertEqual(config['POOL'], {'MIN_SIZE': 1, 'MAX_SIZE': 20})
+        self.assertEqual(config['TEST'], {'NAME': 'yatube_ci'})
+
+    def test_postgresql_without_pool(self):
+        config = database_from_env({'DB_ENGINE': 'postgres'}, '/srv')
+        self.assertEqual(config['ENGINE'], 'django.db.backends.postgresql')
+        self.assertEqual(config['CONN_MAX_AGE'], 60)
+        self.assertNotIn('POOL', config)
+
+    def test_replicas(self):
+        primary = database_from_env({'DB_ENGINE': 'postgresql'}, '/srv')
+        replicas = replicas_from_env(
+            {'DB_REPLICAS': 'r1, r2:6432'}, primary
+        )
+        self.assertEqual(sorted(replicas), ['replica1', 'replica2'])
+        self.assertEqual(
+            (replicas['replica2']['HOST'], replicas['replica2']['PORT']),
+            ('r2', '6432')
+        )
+        self.assertEqual(replicas['replica1']['TEST'], {'MIRROR': 'default'})
+        sqlite = replicas_from_env(
+            {'DB_REPLICAS': '/srv/replica.sqlite3'},
+            database_from_env({}, '/srv')
+        )
+        self.assertEqual(sqlite['replica1']['NAME'], '/srv/replica.sqlite3')
+
+    def test_invalid_values(self):
+        with self.assertRaises(ImproperlyConfigured):
+            database_from_env({'DB_ENGINE': 'oracle'}, '/srv')
+        with self.assertRaises(ImproperlyConfigured):
+            database_from_env(
+                {'DB_ENGINE': 'postgresql', 'DB_POOL_SIZE': 'many'}, '/srv'
+            )
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Только для SQLite.')
+class SqlitePragmaTest(SimpleTestCase):
+    def test_new_connection_uses_wal(self):
+        """Файловая база открывается в WAL с таймаутом блокировки."""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        wrapper = SqliteWrapper({
+            **connection.settings_dict,
+            'NAME': os.path.join(directory, 'wal.sqlite3'),
+            'PRAGMAS': {'busy_timeout': 1234},
+        }, alias='wal')
+        self.addCleanup(wrapper.close)
+        with wrapper.cursor() as cursor:
+            pragmas = {}
+            for name in ('journal_mode', 'synchronous', 'busy_timeout'):
+                cursor.execute(f'PRAGMA {name}')
+                pragmas[name] = cursor.fetchone()[0]
+        # synchronous = 1 — это NORMAL.
+        self.assertEqual(
+            pragmas,
+            {'journal_mode': 'wal', 'synchronous': 1, 'busy_timeout': 1234}
+        )
+
+
+@skipUnless(
+    connection.settings_dict['ENGINE'] == POOLED_ENGINE,
+    'Только для PostgreSQL с пулом соединений.'
+)
+class ConnectionPoolTest(TransactionTestCase):
+    def test_closed_connection_returns_to_pool(self):
+        connection.ensure_connection()
+        raw = connection.connection
+        connection.close()
+        connection.ensure_connection()
+        self.assertIs(connection.connection, raw)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Реплика — копия файла SQLite.')
+class ReplicaRoutingTest(TransactionTestCase):
+    """Основная тестовая база и отстающая реплика в отдельном файле."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='writer')
+        Post.objects.create(author=self.user, text='Старый пост')
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        path = os.path.join(directory, 'replica.sqlite3')
+        connection.ensure_connection()
+        replica = sqlite3.connect(path)
+        connection.connection.backup(replica)
+        replica.close()
+        connections.databases['replica'] = {
+            **connection.settings_dict, 'NAME': path
+        }
+        self.addCleanup(self.remove_replica)
+        Post.objects.create(author=self.user, text='Свежий пост')
+        settings = override_settings(DATABASE_REPLICAS=['replica'])
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def remove_replica(self):
+        connections['replica'].close()
+        del connections['replica']
+        del connections.databases['replica']
+
+    def test_reads_go_to_replica(self):
+        with CaptureQueriesContext(connections['replica']) as replica:
+            response = Client().get(reverse('posts:index'))
+        self.assertTrue(replica.captured_queries)
+        self.assertContains(response, 'Старый пост')
+        self.assertNotContains(response, 'Свежий пост')
+        self.assertNotIn(REPLICA_PIN_COOKIE, response.cookies)
+
+    def test_writer_sticks_to_primary(self):
+        """После записи автор видит свой пост, остальные — реплику."""
+        writer = Client()
+        writer.force_login(self.user)
+        response = writer.post(
+            reverse('posts:create_post'), {'text': 'Новый пост'}
+        )
+        self.assertIn(REPLICA_PIN_COOKIE, response.cookies)
+        cache.clear()
+        with CaptureQueriesContext(connections['replica']) as replica:
+            response = writer.get(reverse('posts:index'))
+        self.assertFalse(replica.captured_queries)
+        self.assertContains(response, 'Новый пост')
+        self.assertContains(response, 'Свежий пост')
+        cache.clear()
+        response = Client().get(reverse('posts:index'))
+        self.assertNotContains(response, 'Новый пост')
+
+    def cached_keys(self, marker):
+        return [key for key in cache._cache if marker in key]
+
+    def test_replica_reads_are_not_cached(self):
+        """Фрагменты, карточки и страницы из реплики не сохраняются."""
+        reader = Client()
+        reader.force_login(self.user)
+        # Реплика снята до входа: сессию она должна получить сама.
+        Session.objects.using('replica').bulk_create(
+            [Session.objects.get(pk=reader.session.session_key)]
+        )
+        with override_settings(PAGE_CACHE_URL_NAMES=('posts:index',)):
+            with CaptureQueriesContext(connections['replica']) as replica:
+                response = reader.get(reverse('posts:index'))
+                search = Client().get(reverse('posts:search'), {'q': 'пост'})
+        self.assertTrue(replica.captured_queries)
+        self.assertContains(response, 'Старый пост')
+        self.assertNotContains(response, 'Свежий пост')
+        self.assertContains(search, 'Старый пост')
+        for marker in ('template.cache.', 'post-card:', 'page:'):
+            with self.subTest(marker=marker):
+                self.assertFalse(self.cached_keys(marker))
+
+    def test_stored_pages_are_read_from_primary(self):
+        """Промах кэша страниц у анонима и промах пакетного API
+        читают основную базу и сохраняются."""
+        fresh = Post.objects.get(text='Свежий пост')
+        with override_settings(PAGE_CACHE_URL_NAMES=('posts:index',)):
+            with CaptureQueriesContext(connections['replica']) as replica:
+                page = Client().get(reverse('posts:index'))
+                batch = Client().get(
+                    reverse('posts:api_batch'), {'ids': fresh.pk}
+                )
+        self.assertFalse(replica.captured_queries)
+        self.assertContains(page, 'Свежий пост')
+        self.assertContains(batch, 'Свежий пост')
+        self.assertTrue(self.cached_keys('page:'))
+
+    def test_outside_requests_reads_primary(self):
+        self.assertEqual(Post.objects.count(), 2)
+
+
+class CountersTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_bump_and_read(self):
+        counters.bump('a', 'b')
+        counters.bump('a')
+        self.assertEqual(
+            counters.get_many(['b', 'a', 'missing']),
+            {'b': 1, 'a': 2, 'missing': 0},
+        )
+        cache.delete('a')
+        counters.bump('a')
+        self.assertEqual(counters.get_many(['a']), {'a': 1})
+
+
+class SharedCacheContract:
+    """Общие проверки для кэшей, которые делят процессы."""
+
+    def make_cache(self, prefix='yatube', **options):
+        raise NotImplementedError
+
+    def setUp(self):
+        self.cache = self.make_cache()
+        self.cache.clear()
+
+    def test_values_and_expiry(self):
+        self.cache.set('page', {'html': '<p>лента</p>'})
+        self.cache.set('gone', 1, 0)
+        self.assertEqual(self.cache.get('page'), {'html': '<p>лента</p>'})
+        self.assertIsNone(self.cache.get('gone'))
+        self.assertFalse(self.cache.add('page', 'другое'))
+        self.assertTrue(self.cache.add('new', 'значение'))
+        self.cache.set_many({'a': 1, 'b': 'два'})
+        self.assertEqual(
+            self.cache.get_many(['a', 'b', 'c']), {'a': 1, 'b': 'два'}
+        )
+        self.cache.delete_many(['a', 'b'])
+        self.assertFalse(self.cache.has_key('a'))
+
+    def test_versions_visible_to_other_processes(self):
+        """Счетчик версии, увеличенный одним процессом, виден другому."""
+        other = self.make_cache()
+        self.cache.add('feed-version:index', 0, None)
+        workers = [
+            threading.Thread(target=lambda: [
+                self.make_cache().incr('feed-version:index')
+                for _ in range(20)
+            ])
+            for _ in range(4)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual(other.get('feed-version:index'), 80)
+        with self.assertRaises(ValueError):
+            other.incr('missing')
+
+    def test_namespaces(self):
+        neighbour = self.make_cache(prefix='neighbour')
+        neighbour.set('key', 'сосед')
+        self.cache.set('key', 'свой')
+        self.cache.clear()
+        self.assertIsNone(self.cache.get('key'))
+        self.assertEqual(neighbour.get('key'), 'сосед')
+        neighbour.clear()
+
+    def test_compression(self):
+        compressed = self.make_cache(COMPRESS_MIN_LENGTH=100)
+        html = '<article>пост</article>' * 200
+        self.assertTrue(compressed.dumps(html).startswith(b'z'))
+        self.assertLess(len(compressed.dumps(html)), len(html) // 10)
+        self.assertTrue(compressed.dumps('short').startswith(b'p'))
+        compressed.set('fragment', html)
+        self.assertEqual(self.cache.get('fragment'), html)
+
+
+class SQLiteCacheTest(SharedCacheContract, SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.path = os.path.join(directory, 'cache.sqlite3')
+        super().setUp()
+
+    def make_cache(self, prefix='yatube', **options):
+        return SQLiteCache(
+            self.path, {'KEY_PREFIX': prefix, 'OPTIONS': options}
+        )
+
+    def test_cull(self):
+        cache = SQLiteCache(self.path, {'OPTIONS': {'MAX_ENTRIES': 10}})
+        for i in range(200):
+            cache.set(f'key{i}', i)
+        count = cache._db.execute('SELECT COUNT(*) FROM cache').fetchone()
+        self.assertLessEqual(count[0], 110)
+
+
+@skipUnless(os.environ.get('REDIS_URL'), 'Нужен REDIS_URL.')
+class RedisCacheTest(SharedCacheContract, SimpleTestCase):
+    def make_cache(self, prefix='yatube-test', **options):
+        from .backends.cache.redis import RedisCache
+        return RedisCache(
+            os.environ['REDIS_URL'], {'KEY_PREFIX': prefix, 'OPTIONS': options}
+        )
+
+
+class CacheConfigTest(SimpleTestCase):
+    def test_backends(self):
+        shared = caches_from_env({}, '/srv')['default']
+        self.assertEqual(shared['LOCATION'], '/srv/cache.sqlite3')
+        self.assertEqual(shared['OPTIONS']['COMPRESS_MIN_LENGTH'], 1024)
+        redis = caches_from_env({
+            'CACHE_BACKEND': 'redis',
+            'CACHE_NAMESPACE': 'staging',
+            'CACHE_COMPRESS_MIN_LENGTH': '0',
+        }, '/srv')['default']
+        self.assertEqual(redis['LOCATION'], 'redis://localhost:6379/0')
+        self.assertEqual(redis['KEY_PREFIX'], 'staging')
+        self.assertIsNone(redis['OPTIONS']['COMPRESS_MIN_LENGTH'])
+        with self.assertRaises(ImproperlyConfigured):
+            caches_from_env({'CACHE_BACKEND': 'memcached'}, '/srv')
@@ -1,5 +1,9 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
 from django.shortcuts import render
 
+from .instrumentation import BUCKETS_MS, histogram
+
 
 def page_not_found(request, exception):
     return render(request, 'core/404.html', {'path': request.path}, status=404)
@@ -15,3 +19,14 @@ def server_error(request):
 
 def permission_denied(request, exception):
     return render(request, 'core/403.html', status=403)
+
+
+@staff_member_required
+def performance(request):
+    """Гистограмма времени ответа по именам URL с начала процесса."""
+    if request.method == 'POST':
+        histogram.reset()
+    return JsonResponse(
+        {'buckets_ms': BUCKETS_MS, 'views': histogram.snapshot()},
+        json_dumps_params={'ensure_ascii': False, 'indent': 2},
+    )
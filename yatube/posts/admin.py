@@ -1,9 +1,20 @@
 from django.contrib import admin
 
+from . import search
 from .models import Comment, Follow, Group, Post
 
 
-class PostAdmin(admin.ModelAdmin):
+class IndexedSearchAdmin(admin.ModelAdmin):
+    """Поиск по тексту через полнотекстовый индекс, а не LIKE."""
+    search_fields = ('text',)
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        return search.filter_queryset(queryset, search_term), False
+
+
+class PostAdmin(IndexedSearchAdmin):
     list_display = (
         'pk',
         'text',
@@ -11,21 +22,19 @@ class PostAdmin(admin.ModelAdmin):
         'author',
         'group',
     )
-    search_fields = ('text',)
     list_filter = ('pub_date',)
     list_editable = ('group',)
     empty_value_display = '-пусто-'
 
 
-class GroupAdmin(admin.ModelAdmin):
+class GroupAdmin(IndexedSearchAdmin):
     list_display = ('title', 'slug', 'description')
     search_fields = ('title', 'description',)
     list_filter = ('title',)
 
 
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(IndexedSearchAdmin):
     list_display = ('author', 'text', 'post')
-    search_fields = ('post', 'author')
     list_filter = ('post',)
 
 
@@ -0,0 +1,215 @@
+"""JSON API для чтения лент, постов и комментариев.
+
+Ленты берутся из тех же querysets, что и страницы сайта, и листаются
+тем же курсором (?cursor=). Ответ собирается прямо из строк .values():
+объекты моделей не создаются, а ?fields=id,text,author оставляет в
+SELECT только нужные столбцы и join'ы. Ошибки отдаются в JSON
+с полем error.
+"""
+
+from functools import wraps
+
+from django.core.files.storage import default_storage
+from django.http import Http404, JsonResponse
+from django.views.decorators.http import require_GET
+
+from core.constants import (API_BATCH_MAX_IDS, COMMENTS_PER_PAGE,
+                            POSTS_PER_PAGE)
+from . import post_cache
+from .feeds import feed_posts
+from .models import Comment, Group, Post, User
+from .paginators import ValuesCursorPaginator, ValuesMergedCursorPaginator
+from .timeline import timeline_values
+
+
+def _media_url(name):
+    return default_storage.url(name) if name else None
+
+
+# Поле ответа: (поле для .values(), преобразование значения или None).
+POST_FIELDS = {
+    'id': ('id', None),
+    'text': ('text', None),
+    'pub_date': ('pub_date', None),
+    'updated': ('updated', None),
+    'image': ('image', _media_url),
+    'author': ('author__username', None),
+    'group': ('group__slug', None),
+}
+COMMENT_FIELDS = {
+    'id': ('id', None),
+    'post': ('post_id', None),
+    'text': ('text', None),
+    'created': ('created', None),
+    'author': ('author__username', None),
+}
+# Ключ курсора выбирается всегда, даже если клиент его не просил.
+POST_KEY = ('id', 'pub_date')
+COMMENT_KEY = ('id', 'created')
+
+
+class FieldError(ValueError):
+    """Ошибка в параметрах запроса, ответ 400."""
+
+
+def _json(data, status=200):
+    return JsonResponse(
+        data, status=status,
+        json_dumps_params={'ensure_ascii': False, 'separators': (',', ':')},
+    )
+
+
+def api_view(view):
+    """Только GET; 404 и ошибки параметров — ошибка в JSON."""
+    @require_GET
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except FieldError as error:
+            return _json({'error': str(error)}, status=400)
+        except Http404:
+            return _json({'error': 'Не найдено'}, status=404)
+    return wrapper
+
+
+def selected_fields(request, fields):
+    """Поля из ?fields= в порядке запроса, по умолчанию все."""
+    raw = request.GET.get('fields')
+    if raw is None:
+        return list(fields)
+    names = list(dict.fromkeys(
+        name.strip() for name in raw.split(',') if name.strip()
+    ))
+    unknown = [name for name in names if name not in fields]
+    if unknown or not names:
+        raise FieldError(
+            'Неизвестные поля: {}. Доступны: {}'.format(
+                ', '.join(unknown) or '—', ', '.join(fields)
+            )
+        )
+    return names
+
+
+def lookups(names, fields, key=()):
+    return list(dict.fromkeys(
+        (*key, *(fields[name][0] for name in names))
+    ))
+
+
+def serialize(rows, names, fields):
+    spec = [(name, *fields[name]) for name in names]
+    return [
+        {
+            name: convert(row[lookup]) if convert else row[lookup]
+            for name, lookup, convert in spec
+        }
+        for row in rows
+    ]
+
+
+def _pk_or_404(queryset, **filters):
+    pk = queryset.filter(**filters).values_list('pk', flat=True).first()
+    if pk is None:
+        raise Http404
+    return pk
+
+
+def _page(request, rows, names, fields, per_page,
+          paginator_class=ValuesCursorPaginator, **options):
+    paginator = paginator_class(rows, per_page, **options)
+    page = paginator.get_page(request.GET.get('cursor'))
+    return _json({
+        'results': serialize(page, names, fields),
+        'next': paginator.next_cursor,
+        'previous': paginator.previous_cursor,
+    })
+
+
+def _feed(request, **filters):
+    names = selected_fields(request, POST_FIELDS)
+    rows = feed_posts(**filters).values(
+        *lookups(names, POST_FIELDS, POST_KEY)
+    )
+    return _page(request, rows, names, POST_FIELDS, POSTS_PER_PAGE)
+
+
+@api_view
+def index(request):
+    return _feed(request)
+
+
+@api_view
+def group_posts(request, slug):
+    return _feed(request, group_id=_pk_or_404(Group.objects, slug=slug))
+
+
+@api_view
+def profile(request, username):
+    return _feed(
+        request, author_id=_pk_or_404(User.objects, username=username)
+    )
+
+
+@api_view
+def follow_index(request):
+    if not request.user.is_authenticated:
+        return _json({'error': 'Нужна авторизация'}, status=401)
+    names = selected_fields(request, POST_FIELDS)
+    fields = [
+        lookup for lookup in lookups(names, POST_FIELDS)
+        if lookup not in POST_KEY
+    ]
+    return _page(
+        request, timeline_values(request.user, *fields), names,
+        POST_FIELDS, POSTS_PER_PAGE,
+        paginator_class=ValuesMergedCursorPaginator,
+    )
+
+
+@api_view
+def post_detail(request, post_id):
+    names = selected_fields(request, POST_FIELDS)
+    row = Post.objects.filter(pk=post_id).values(
+        *lookups(names, POST_FIELDS)
+    ).first()
+    if row is None:
+        raise Http404
+    return _json(serialize([row], names, POST_FIELDS)[0])
+
+
+@api_view
+def posts_batch(request):
+    """Посты по списку ?ids=1,2,3 в том же порядке.
+
+    Несуществующие id перечисляются в missing. Строки берутся из
+    post_cache, база читается только для промахов.
+    """
+    names = selected_fields(request, POST_FIELDS)
+    try:
+        ids = list(dict.fromkeys(
+            int(pk) for pk in request.GET.get('ids', '').split(',') if pk
+        ))
+    except ValueError:
+        raise FieldError('ids — список чисел через запятую')
+    if not ids or len(ids) > API_BATCH_MAX_IDS:
+        raise FieldError(f'Нужно от 1 до {API_BATCH_MAX_IDS} id')
+    rows = post_cache.rows(ids)
+    return _json({
+        'results': serialize(
+            [rows[pk] for pk in ids if pk in rows], names, POST_FIELDS
+        ),
+        'missing': [pk for pk in ids if pk not in rows],
+    })
+
+
+@api_view
+def post_comments(request, post_id):
+    names = selected_fields(request, COMMENT_FIELDS)
+    rows = Comment.objects.filter(
+        post_id=_pk_or_404(Post.objects, pk=post_id)
+    ).values(*lookups(names, COMMENT_FIELDS, COMMENT_KEY))
+    return _page(
+        request, rows, names, COMMENT_FIELDS, COMMENTS_PER_PAGE,
+        date_field='created', descending=False,
+    )
@@ -0,0 +1,340 @@
+"""Синтетические данные и замеры страниц сайта под нагрузкой.
+
+seed() наполняет базу пользователями, группами, постами,
+комментариями и подписками через bulk_create. Авторы постов и цели
+подписок выбираются по степенному закону: немногие авторы пишут
+больше всех и собирают большую часть подписчиков, как на живом
+сайте. run() прогоняет ленты, страницу поста и те же данные через
+JSON API тестовым клиентом и собирает перцентили времени ответа,
+пропускную способность, число запросов к базе и размер ответа.
+"""
+
+import array
+import datetime
+import itertools
+import math
+import random
+import time
+from urllib.parse import urlencode
+
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core.constants import API_BATCH_MAX_IDS, SEED_BATCH_SIZE
+from .models import AuthorStats, Comment, Follow, Group, Post, User
+from .transfer import keep_dates, rebuild_derived
+
+WORDS = (
+    'кот', 'пес', 'утро', 'город', 'река', 'книга', 'поезд', 'море',
+    'осень', 'дождь', 'работа', 'друг', 'музыка', 'кофе', 'лес', 'дорога',
+    'новости', 'спорт', 'кино', 'сад', 'зима', 'весна', 'лето', 'код',
+    'сегодня', 'вчера', 'снова', 'очень', 'хорошо', 'долго', 'тихо',
+    'читаю', 'пишу', 'гуляю', 'думаю', 'смотрю', 'слушаю', 'жду',
+)
+VIEWS = (
+    'posts:index',
+    'posts:group_list',
+    'posts:profile',
+    'posts:follow_index',
+    'posts:post_detail',
+    'posts:api_index',
+    'posts:api_group',
+    'posts:api_profile',
+    'posts:api_follow',
+    'posts:api_post',
+    'posts:api_comments',
+    'posts:api_batch',
+)
+PERCENTILES = (50, 90, 95, 99)
+
+
+def _cum_weights(count, alpha):
+    """Накопленные веса степенного распределения 1 / rank ** alpha."""
+    return list(itertools.accumulate(
+        1 / rank ** alpha for rank in range(1, count + 1)
+    ))
+
+
+def _batched(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _insert(model, objects, batch_size, **kwargs):
+    total = 0
+    with keep_dates(model):
+        for batch in _batched(objects, batch_size):
+            model.objects.bulk_create(batch, **kwargs)
+            total += len(batch)
+    return total
+
+
+def _ids_after(model, last_id):
+    return array.array('q', model.objects.filter(pk__gt=last_id).order_by(
+        'pk'
+    ).values_list('pk', flat=True).iterator())
+
+
+def _last_id(model):
+    last = model.objects.order_by('-pk').values_list('pk', flat=True).first()
+    return last or 0
+
+
+def seed(users=1000, groups=20, posts=10000, comments=20000, follows=20,
+         alpha=1.2, days=365, prefix='bench', batch_size=SEED_BATCH_SIZE,
+         random_seed=None, pull_threshold=None):
+    """Добавляет в базу синтетические данные. Возвращает число строк.
+
+    follows — среднее число подписок пользователя, alpha — показатель
+    степенного закона популярности авторов. После вставки
+    пересобираются ленты, счетчики и поисковый индекс; pull_threshold
+    заменяет TIMELINE_PULL_THRESHOLD при классификации авторов.
+    Авторы постов и комментариев — только новые пользователи, поэтому
+    при users=0 ни постов, ни комментариев не создается.
+    """
+    rng = random.Random(random_seed)
+    now = timezone.now()
+    span = datetime.timedelta(days=days).total_seconds()
+
+    def moment():
+        return now - datetime.timedelta(seconds=rng.uniform(0, span))
+
+    def text(length):
+        words = (rng.choice(WORDS) for _ in range(length))
+        return ' '.join(words).capitalize()
+
+    created = {}
+    start = User.objects.filter(username__startswith=prefix).count()
+    last_user = _last_id(User)
+    password = make_password(None)
+    created['users'] = _insert(User, (
+        User(
+            username=f'{prefix}{start + i}',
+            first_name=rng.choice(('Анна', 'Иван', 'Мария', 'Петр')),
+            last_name=f'Тестов{start + i}',
+            password=password,
+            date_joined=moment(),
+        )
+        for i in range(users)
+    ), batch_size)
+    user_ids = _ids_after(User, last_user)
+    popular = list(user_ids)
+    rng.shuffle(popular)
+    popularity = _cum_weights(len(popular), alpha)
+
+    last_group = _last_id(Group)
+    created['groups'] = _insert(Group, (
+        Group(
+            title=f'Сообщество {prefix} {start + i}',
+            slug=f'{prefix}-{start + i}',
+            description=text(12),
+        )
+        for i in range(groups)
+    ), batch_size)
+    group_ids = list(_ids_after(Group, last_group)) or [None]
+    group_weights = _cum_weights(len(group_ids), alpha)
+
+    def post(author_id):
+        pub_date = moment()
+        return Post(
+            author_id=author_id,
+            group_id=(
+                rng.choices(group_ids, cum_weights=group_weights)[0]
+                if rng.random() < 0.8 else None
+            ),
+            text=text(rng.randint(5, 60)),
+            pub_date=pub_date,
+            updated=pub_date,
+        )
+
+    last_post = _last_id(Post)
+    created['posts'] = _insert(Post, (
+        post(author_id)
+        for batch in _batched(range(posts if popular else 0), batch_size)
+        for author_id in rng.choices(
+            popular, cum_weights=popularity, k=len(batch)
+        )
+    ), batch_size)
+    post_ids = _ids_after(Post, last_post)
+
+    created['comments'] = _insert(Comment, (
+        Comment(
+            post_id=rng.choice(post_ids),
+            author_id=rng.choice(user_ids),
+            text=text(rng.randint(3, 20)),
+            created=moment(),
+        )
+        for _ in range(comments if post_ids else 0)
+    ), batch_size)
+
+    def following(user_id):
+        count = int(rng.expovariate(1 / follows)) + 1
+        count = min(len(popular) - 1, count)
+        targets = set(rng.choices(popular, cum_weights=popularity, k=count))
+        targets.discard(user_id)
+        return (Follow(user_id=user_id, author_id=target)
+                for target in targets)
+
+    created['follows'] = _insert(Follow, (
+        follow for user_id in (user_ids if follows else ())
+        for follow in following(user_id)
+    ), batch_size, ignore_conflicts=True)
+    rebuild_derived(pull_threshold)
+    return created
+
+
+def percentile(values, percent):
+    """Перцентиль по ближайшему рангу."""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(percent / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def _summary(values, scale=1):
+    summary = {f'p{percent}': percentile(values, percent) * scale
+               for percent in PERCENTILES}
+    summary.update(
+        min=min(values) * scale,
+        max=max(values) * scale,
+        mean=sum(values) / len(values) * scale,
+    )
+    return summary
+
+
+def targets():
+    """URL каждой страницы на самых нагруженных объектах базы.
+
+    Возвращает пару: словарь {имя URL: адрес} и читателя с самым
+    большим числом подписок, от имени которого идут запросы.
+    """
+    urls = {
+        'posts:index': reverse('posts:index'),
+        'posts:api_index': reverse('posts:api_index'),
+    }
+    group = Group.objects.annotate(
+        total=Count('posts')
+    ).order_by('-total').first()
+    if group:
+        urls['posts:group_list'] = reverse(
+            'posts:group_list', args=[group.slug]
+        )
+        urls['posts:api_group'] = reverse(
+            'posts:api_group', args=[group.slug]
+        )
+    top = AuthorStats.objects.select_related('author').order_by(
+        '-posts_count'
+    ).first()
+    if top:
+        urls['posts:profile'] = reverse(
+            'posts:profile', args=[top.author.username]
+        )
+        urls['posts:api_profile'] = reverse(
+            'posts:api_profile', args=[top.author.username]
+        )
+    reader_id = Follow.objects.values('user').annotate(
+        total=Count('id')
+    ).order_by('-total').values_list('user', flat=True).first()
+    reader = User.objects.filter(pk=reader_id).first()
+    if reader:
+        urls['posts:follow_index'] = reverse('posts:follow_index')
+        urls['posts:api_follow'] = reverse('posts:api_follow')
+    post_id = Comment.objects.values('post').annotate(
+        total=Count('id')
+    ).order_by('-total').values_list('post', flat=True).first()
+    post_id = post_id or Post.objects.values_list('pk', flat=True).first()
+    latest = list(
+        Post.objects.values_list('pk', flat=True)[:API_BATCH_MAX_IDS]
+    )
+    if latest:
+        urls['posts:api_batch'] = '{}?{}'.format(
+            reverse('posts:api_batch'),
+            urlencode({'ids': ','.join(map(str, latest))}),
+        )
+    if post_id:
+        urls['posts:post_detail'] = reverse(
+            'posts:post_detail', args=[post_id]
+        )
+        urls['posts:api_post'] = reverse('posts:api_post', args=[post_id])
+        urls['posts:api_comments'] = reverse(
+            'posts:api_comments', args=[post_id]
+        )
+    return urls, reader
+
+
+def measure(client, url, requests, warmup=0, cold=False):
+    """Замеры одной страницы: время, пропускная способность (запросов
+    в секунду подряд), запросы к базе и размер ответа."""
+    for _ in range(warmup):
+        client.get(url)
+    timings, queries, sizes = [], [], []
+    for _ in range(requests):
+        if cold:
+            cache.clear()
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            response = client.get(url)
+            timings.append(time.perf_counter() - start)
+        if response.status_code != 200:
+            raise RuntimeError(f'{url} ответил {response.status_code}')
+        queries.append(len(captured.captured_queries))
+        sizes.append(len(response.content))
+    return {
+        'url': url,
+        'requests': requests,
+        'latency_ms': _summary(timings, 1000),
+        'throughput_rps': requests / sum(timings),
+        'queries': _summary(queries),
+        'bytes': _summary(sizes),
+    }
+
+
+def run(views=VIEWS, requests=50, warmup=5, cold=False):
+    """Прогоняет страницы и возвращает отчет для сохранения в JSON."""
+    urls, reader = targets()
+    client = Client()
+    if reader is not None:
+        client.force_login(reader)
+    report = {
+        'created': timezone.now().isoformat(),
+        'database': connection.vendor,
+        'cold_cache': cold,
+        'rows': {
+            model._meta.label_lower: model.objects.count()
+            for model in (User, Group, Post, Comment, Follow)
+        },
+        'views': {},
+    }
+    for name in views:
+        if name in urls:
+            report['views'][name] = measure(
+                client, urls[name], requests, warmup, cold
+            )
+    return report
+
+
+def compare(baseline, report):
+    """Строки с изменением p50 и p95 относительно прошлого отчета."""
+    lines = []
+    for name, current in report['views'].items():
+        previous = baseline.get('views', {}).get(name)
+        if not previous:
+            continue
+        changes = []
+        for key in ('p50', 'p95'):
+            before = previous['latency_ms'][key]
+            after = current['latency_ms'][key]
+            delta = (after - before) / before * 100 if before else 0
+            changes.append(f'{key} {before:.1f} → {after:.1f} мс '
+                           f'({delta:+.0f}%)')
+        lines.append(f'{name}: ' + ', '.join(changes))
+    return lines
@@ -0,0 +1,60 @@
+"""Кэш отрендеренных карточек постов (includes/post_form.html).
+
+Карточка зависит от поста, страницы, на которой выводится, имени
+автора и названия группы. Правка поста меняет Post.updated, смена
+имени автора увеличивает версию его области author:<id>, правка групп —
+общую версию groups из feed_cache, готовая миниатюра картинки —
+версию карточки card:<id>.
+Карточки, прочитанные из реплики, не сохраняются (см. core.routers).
+"""
+
+from django.core.cache import cache
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+
+from core import routers
+from core.constants import POST_CARD_TIMEOUT
+from . import feed_cache
+from .thumbnails import prefetch_thumbnails
+
+CARD_TEMPLATE = 'includes/post_form.html'
+
+
+def card_key(post, view_name, version):
+    return (
+        f'post-card:{view_name}:{post.pk}:'
+        f'{post.updated.timestamp()}:{version}'
+    )
+
+
+def render_cards(posts, request):
+    """HTML карточек по порядку постов.
+
+    Одно чтение get_many, рендер только промахов, одна запись set_many.
+    """
+    view_name = getattr(request.resolver_match, 'view_name', '')
+    found = feed_cache.version_map('groups', *{
+        feed_cache.scope('author', post.author_id) for post in posts
+    }, *{feed_cache.card_scope(post.pk) for post in posts})
+    keys = [
+        card_key(post, view_name, '{}.{}.{}'.format(
+            found['groups'],
+            found[feed_cache.scope('author', post.author_id)],
+            found[feed_cache.card_scope(post.pk)],
+        ))
+        for post in posts
+    ]
+    cached = cache.get_many(keys)
+    to_render = [
+        (post, key) for post, key in zip(posts, keys) if key not in cached
+    ]
+    missing = {}
+    if to_render:
+        prefetch_thumbnails([post for post, _ in to_render])
+        template = get_template(CARD_TEMPLATE)
+    for post, key in to_render:
+        missing[key] = template.render({'post': post, 'request': request})
+    if missing and not routers.used_replica():
+        cache.set_many(missing, POST_CARD_TIMEOUT)
+    cached.update(missing)
+    return [mark_safe(cached[key]) for key in keys]
@@ -0,0 +1,99 @@
+"""ETag для условных GET-запросов к лентам и странице поста.
+
+Валидатор — хэш всего, от чего зависит HTML страницы: id и времени
+правки постов на запрошенной странице ленты, счетчиков автора или
+комментариев, версий групп, пользователей и карточек постов из
+feed_cache, курсора и текущего пользователя. Посты читаются тем же
+CursorPaginator, что и во view, но только столбцы ключа и updated,
+одним запросом по индексу ленты. Если клиент прислал тот же ETag,
+condition() отвечает 304 без вызова view и рендеринга шаблона.
+
+Для несуществующих группы, автора или поста ETag нет, иначе condition()
+отдал бы его с ответом 404 и ответил бы 304 на повторный запрос.
+Пустая страница ленты проверяет существование отдельным запросом.
+
+Last-Modified не отдается: по времени правки нельзя заметить
+удаленный пост или переименованную группу.
+"""
+
+import hashlib
+
+from django.db.models import F, OuterRef, Subquery
+
+from core.constants import POSTS_PER_PAGE
+from . import feed_cache
+from .models import Comment, Follow, Group, Post, User
+from .paginators import CursorPaginator
+
+
+def _etag(request, post_ids, *parts):
+    user = request.user
+    payload = repr((
+        user.pk if user.is_authenticated else None,
+        request.GET.get('cursor', ''),
+        feed_cache.versions(
+            *feed_cache.GLOBAL_SCOPES, *map(feed_cache.card_scope, post_ids)
+        ),
+        *parts,
+    ))
+    return '"{}"'.format(hashlib.sha1(payload.encode()).hexdigest())
+
+
+def _page_rows(queryset, request, *annotations):
+    """(id, updated, аннотации...) постов страницы ленты."""
+    paginator = CursorPaginator(
+        queryset.only('pub_date', 'updated'), POSTS_PER_PAGE
+    )
+    page = paginator.get_page(request.GET.get('cursor'))
+    return [
+        (post.pk, post.updated.timestamp(),
+         *(getattr(post, name) for name in annotations))
+        for post in page
+    ]
+
+
+def _ids(rows):
+    return [row[0] for row in rows]
+
+
+def index_etag(request):
+    rows = _page_rows(Post.objects.all(), request)
+    return _etag(request, _ids(rows), rows)
+
+
+def group_etag(request, slug):
+    posts = Post.objects.filter(group__slug=slug)
+    rows = _page_rows(posts, request)
+    if not rows and not Group.objects.filter(slug=slug).exists():
+        return None
+    return _etag(request, _ids(rows), slug, rows)
+
+
+def profile_etag(request, username):
+    posts = Post.objects.filter(author__username=username).annotate(
+        author_posts=F('author__stats__posts_count')
+    )
+    following = (
+        request.user.is_authenticated
+        and Follow.objects.filter(
+            user=request.user, author__username=username
+        ).exists()
+    )
+    rows = _page_rows(posts, request, 'author_posts')
+    if not rows and not User.objects.filter(username=username).exists():
+        return None
+    return _etag(request, _ids(rows), username, following, rows)
+
+
+def post_detail_etag(request, post_id):
+    comments = Comment.objects.filter(post=OuterRef('pk')).order_by('-id')
+    row = Post.objects.filter(pk=post_id).annotate(
+        last_comment=Subquery(comments.values('id')[:1]),
+    ).order_by().values_list(
+        'updated', 'author__stats__posts_count', 'comments_count',
+        'last_comment',
+    ).first()
+    if row is None:
+        # Без ETag ответ 404 не станет 304 при повторном запросе.
+        return None
+    return _etag(request, [post_id], post_id, row[0].timestamp(), *row[1:])
@@ -0,0 +1,68 @@
+"""Кэш фрагментов лент с версионной инвалидацией.
+
+Ключ фрагмента складывается из типа ленты, ее области (группа, автор),
+курсора страницы и версий, в том числе версий карточек постов
+страницы. Версии увеличиваются сигналами при любом изменении постов,
+групп и пользователей, а версия карточки — готовой миниатюрой
+картинки поста (см. posts.thumbnails), поэтому устаревший фрагмент
+никогда не находится по новому ключу, а неизменившиеся страницы
+живут в кэше до FEED_CACHE_TIMEOUT.
+
+Лента, прочитанная из реплики, рендерится без кэша фрагментов:
+реплика может отставать от уже увеличенных версий (см. core.routers).
+"""
+
+from core import counters, routers
+from core.constants import FEED_CACHE_TIMEOUT
+
+VERSION_KEY = 'feed-version:{}'
+# Названия групп и имена авторов видны на любой ленте.
+GLOBAL_SCOPES = ('groups', 'users')
+# Поля пользователя, которые выводятся на лентах и в карточках.
+NAME_FIELDS = ('username', 'first_name', 'last_name')
+
+
+def scope(feed, scope_id=None):
+    return feed if scope_id is None else f'{feed}:{scope_id}'
+
+
+def card_scope(post_id):
+    """Область карточки поста: меняется, когда готова миниатюра."""
+    return scope('card', post_id)
+
+
+def bump(*scopes):
+    """Делает недействительными все фрагменты указанных областей."""
+    counters.bump(*(VERSION_KEY.format(name) for name in scopes))
+
+
+def version_map(*scopes):
+    """Текущие версии областей одним обращением к кэшу: {область: версия}."""
+    found = counters.get_many([VERSION_KEY.format(name) for name in scopes])
+    return {name: found[VERSION_KEY.format(name)] for name in scopes}
+
+
+def versions(*scopes):
+    """Текущие версии областей одной строкой."""
+    found = version_map(*scopes)
+    return '.'.join(str(found[name]) for name in scopes)
+
+
+def feed_cache_context(page_obj, feed, scope_id=None):
+    """Контекст для {% feed_cache %} вокруг ленты на шаблоне.
+
+    Пустой feed_cache_key — ленту нельзя сохранять в кэш.
+    """
+    if routers.used_replica():
+        return {'feed_cache_key': None}
+    feed_scope = scope(feed, scope_id)
+    cursor = page_obj.paginator.cursor or ''
+    return {
+        'feed_cache_timeout': FEED_CACHE_TIMEOUT,
+        'feed_cache_key': ':'.join((
+            feed_scope, cursor, versions(
+                feed_scope, *GLOBAL_SCOPES,
+                *(card_scope(post.pk) for post in page_obj)
+            ),
+        )),
+    }
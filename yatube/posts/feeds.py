@@ -0,0 +1,31 @@
+"""Общий queryset лент: ровно те поля, что нужны карточке поста."""
+
+from .models import Post
+
+# Поля, которые читает includes/post_form.html. Остальные поля поста
+# и связанных объектов откладываются, author и group подтягиваются
+# одним join'ом.
+CARD_FIELDS = (
+    'text',
+    'pub_date',
+    'updated',
+    'image',
+    'author',
+    'author__username',
+    'author__first_name',
+    'author__last_name',
+    'group',
+    'group__slug',
+    'group__title',
+)
+
+
+def card_fields(prefix=''):
+    return [f'{prefix}{field}' for field in CARD_FIELDS]
+
+
+def feed_posts(**filters):
+    """Посты для ленты с авторами и группами без N+1."""
+    return Post.objects.filter(**filters).select_related(
+        'author', 'group'
+    ).only(*card_fields())
@@ -0,0 +1,37 @@
+"""Дыры страниц постов: см. core.holes."""
+
+from core import holes
+from .forms import CommentForm
+from .models import Follow
+
+
+@holes.register('switcher', 'includes/switcher.html')
+def switcher(request, view_name):
+    return {'view_name': view_name}
+
+
+@holes.register('follow_button', 'includes/follow_button.html')
+def follow_button(request, username):
+    user = request.user
+    own_profile = user.is_authenticated and user.username == username
+    return {
+        'username': username,
+        'own_profile': own_profile,
+        'following': (
+            user.is_authenticated
+            and not own_profile
+            and Follow.objects.filter(
+                user=user, author__username=username
+            ).exists()
+        ),
+    }
+
+
+@holes.register('edit_button', 'includes/edit_button.html')
+def edit_button(request, post_id, author_id):
+    return {'post_id': post_id, 'author_id': author_id}
+
+
+@holes.register('comment_form', 'includes/comment_form.html')
+def comment_form(request, post_id):
+    return {'post_id': post_id, 'form': CommentForm()}
@@ -0,0 +1,71 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from sorl.thumbnail import default
+from sorl.thumbnail.images import ImageFile
+from sorl.thumbnail.kvstores.base import add_prefix
+
+from core.constants import POSTS_PER_PAGE
+from posts.models import Post
+from posts.thumbnails import (BatchedKVStore, QueuedThumbnailBackend,
+                              prefetch_thumbnails)
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает поштучное и пакетное разрешение миниатюр одной '
+        'страницы ленты на холодном кэше.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=POSTS_PER_PAGE)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        backend, kvstore = default.backend, default.kvstore
+        if not (isinstance(backend, QueuedThumbnailBackend)
+                and isinstance(kvstore, BatchedKVStore)):
+            raise CommandError(
+                'Нужны THUMBNAIL_BACKEND = QueuedThumbnailBackend '
+                'и THUMBNAIL_KVSTORE = BatchedKVStore'
+            )
+        posts = list(
+            Post.objects.exclude(image='').order_by('-pub_date')[
+                :options['posts']
+            ]
+        )
+        if not posts:
+            raise CommandError('В базе нет постов с картинками')
+        thumbnails = [
+            backend.thumbnail_file(ImageFile(post.image), geometry, opts)
+            for post in posts
+            for geometry, opts in settings.THUMBNAIL_PRESETS
+        ]
+        keys = [add_prefix(thumbnail.key) for thumbnail in thumbnails]
+
+        def one_by_one():
+            for thumbnail in thumbnails:
+                kvstore.get(thumbnail)
+
+        def batched():
+            prefetch_thumbnails(posts)
+            one_by_one()
+
+        for name, lookup in (('поштучно', one_by_one), ('пакетом', batched)):
+            timings = []
+            for _ in range(options['repeat']):
+                cache.delete_many(keys)
+                with CaptureQueriesContext(connection) as queries:
+                    start = time.perf_counter()
+                    lookup()
+                    timings.append(time.perf_counter() - start)
+            self.stdout.write(
+                f'{name}: {len(posts)} постов, '
+                f'{len(queries.captured_queries)} запросов к базе, '
+                f'медиана {statistics.median(timings) * 1000:.2f} мс'
+            )
@@ -0,0 +1,58 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.bench import VIEWS, compare, run
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет ленты, страницу поста и JSON API: перцентили времени '
+        'ответа, пропускную способность, число запросов к базе и размер '
+        'ответа. Отчет пишется в JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--view', action='append', choices=VIEWS,
+            help='Какие страницы мерить; по умолчанию все.'
+        )
+        parser.add_argument('--requests', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='Очищать кэш перед каждым запросом.'
+        )
+        parser.add_argument('--output', help='Куда сохранить отчет.')
+        parser.add_argument(
+            '--baseline', help='Прошлый отчет для сравнения.'
+        )
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1:
+            raise CommandError('Нужен хотя бы один запрос')
+        report = run(
+            views=options['view'] or VIEWS,
+            requests=options['requests'],
+            warmup=options['warmup'],
+            cold=options['cold'],
+        )
+        for name, result in report['views'].items():
+            latency = result['latency_ms']
+            self.stdout.write(
+                f'{name}: p50 {latency["p50"]:.1f} мс, '
+                f'p95 {latency["p95"]:.1f} мс, '
+                f'{result["throughput_rps"]:.0f} запр/с, '
+                f'запросов {result["queries"]["max"]}, '
+                f'{result["bytes"]["p50"]} байт'
+            )
+        if options['baseline']:
+            with open(options['baseline'], encoding='utf-8') as baseline:
+                for line in compare(json.load(baseline), report):
+                    self.stdout.write(line)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                json.dump(report, output, ensure_ascii=False, indent=2)
+            self.stdout.write(self.style.SUCCESS(
+                f'Отчет сохранен в {options["output"]}'
+            ))
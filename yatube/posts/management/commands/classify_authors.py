@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.timeline import classify_authors
+
+
+class Command(BaseCommand):
+    help = (
+        'Переклассифицирует авторов по числу подписчиков: популярные '
+        'подтягиваются в ленты при чтении, остальные раскладываются '
+        'по лентам при публикации.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threshold',
+            type=int,
+            default=settings.TIMELINE_PULL_THRESHOLD,
+            help='Порог подписчиков для популярного автора.',
+        )
+        parser.add_argument(
+            '--push-threshold',
+            type=int,
+            help='Меньше стольких подписчиков популярный автор '
+                 'возвращается к раскладке по лентам. По умолчанию '
+                 'TIMELINE_PUSH_THRESHOLD, но не больше --threshold.',
+        )
+
+    def handle(self, *args, **options):
+        promoted, demoted = classify_authors(
+            options['threshold'], options['push_threshold']
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Новых популярных авторов: {promoted}, '
+            f'вернулись к раскладке по лентам: {demoted}'
+        ))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from core.constants import TRANSFER_BATCH_SIZE
+from posts.transfer import DATA_FILE, MEDIA_DIR, export_data
+
+
+class Command(BaseCommand):
+    help = (
+        f'Выгружает пользователей, группы, посты, комментарии и подписки '
+        f'в папку: {DATA_FILE} в формате JSON Lines и картинки постов '
+        f'в {MEDIA_DIR}/. В выгрузку попадают хэши паролей.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory')
+        parser.add_argument(
+            '--chunk-size', type=int, default=TRANSFER_BATCH_SIZE
+        )
+
+    def handle(self, *args, **options):
+        counts = export_data(
+            options['directory'], chunk_size=options['chunk_size']
+        )
+        for label, count in sorted(counts.items()):
+            self.stdout.write(f'{label}: {count}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Выгружено в {options["directory"]}'
+        ))
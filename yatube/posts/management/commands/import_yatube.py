@@ -0,0 +1,30 @@
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError
+
+from core.constants import TRANSFER_BATCH_SIZE
+from posts.transfer import DATA_FILE, import_data
+
+
+class Command(BaseCommand):
+    help = (
+        f'Загружает выгрузку export_yatube из папки с {DATA_FILE} '
+        f'и пересобирает ленты, счетчики и поисковый индекс.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory')
+        parser.add_argument(
+            '--batch-size', type=int, default=TRANSFER_BATCH_SIZE
+        )
+
+    def handle(self, *args, **options):
+        try:
+            counts = import_data(
+                options['directory'], batch_size=options['batch_size']
+            )
+        except (OSError, ValueError, DatabaseError) as error:
+            raise CommandError(f'Загрузка отменена: {error}')
+        for label, count in sorted(counts.items()):
+            self.stdout.write(f'{label}: {count}')
+        self.stdout.write(self.style.SUCCESS('Загрузка завершена'))
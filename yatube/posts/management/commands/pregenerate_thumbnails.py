@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from core.tasks import worker
+from posts.models import Post
+from posts.thumbnails import pregenerate
+
+
+class Command(BaseCommand):
+    help = (
+        'Ставит в очередь миниатюры всех картинок постов и ждет, '
+        'пока они будут готовы.'
+    )
+
+    def handle(self, *args, **options):
+        images = Post.objects.exclude(image='').values_list(
+            'image', flat=True
+        )
+        count = 0
+        for name in images.iterator():
+            pregenerate(name)
+            count += 1
+        worker.join()
+        self.stdout.write(self.style.SUCCESS(
+            f'Миниатюры подготовлены для картинок: {count}'
+        ))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from posts.stats import recount_all
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает счетчики постов, комментариев и подписчиков '
+        'авторов и комментариев постов и исправляет расхождения.'
+    )
+
+    def handle(self, *args, **options):
+        fixed = recount_all()
+        self.stdout.write(self.style.SUCCESS(
+            f'Исправлено записей статистики: {fixed}'
+        ))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from core.constants import SEARCH_BATCH_SIZE
+from posts.search import INDEXED_FIELDS, KINDS, reindex
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересобирает поисковый индекс постов, комментариев и групп, '
+        'читая объекты порциями.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--kind', choices=sorted(KINDS.values()), action='append',
+            help='Что переиндексировать; по умолчанию все.'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=SEARCH_BATCH_SIZE
+        )
+
+    def handle(self, *args, **options):
+        kinds = options['kind'] or sorted(KINDS.values())
+        for model in INDEXED_FIELDS:
+            if KINDS[model] not in kinds:
+                continue
+            total = reindex(model, chunk_size=options['chunk_size'])
+            self.stdout.write(self.style.SUCCESS(
+                f'{model._meta.verbose_name_plural}: '
+                f'проиндексировано {total}'
+            ))
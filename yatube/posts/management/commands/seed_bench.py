@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand
+
+from core.constants import SEED_BATCH_SIZE
+from posts.bench import seed
+
+
+class Command(BaseCommand):
+    help = (
+        'Наполняет базу синтетическими пользователями, группами, постами, '
+        'комментариями и подписками для замеров производительности.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--comments', type=int, default=20000)
+        parser.add_argument(
+            '--follows', type=int, default=20,
+            help='Среднее число подписок пользователя.'
+        )
+        parser.add_argument(
+            '--alpha', type=float, default=1.2,
+            help='Показатель степенного закона популярности авторов.'
+        )
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help='За сколько дней распределить даты публикаций.'
+        )
+        parser.add_argument(
+            '--pull-threshold', type=int, default=None,
+            help='Порог подписчиков популярного автора; по умолчанию '
+                 'TIMELINE_PULL_THRESHOLD.'
+        )
+        parser.add_argument('--prefix', default='bench')
+        parser.add_argument('--seed', type=int, default=None)
+        parser.add_argument(
+            '--batch-size', type=int, default=SEED_BATCH_SIZE
+        )
+
+    def handle(self, *args, **options):
+        created = seed(
+            users=options['users'],
+            groups=options['groups'],
+            posts=options['posts'],
+            comments=options['comments'],
+            follows=options['follows'],
+            alpha=options['alpha'],
+            days=options['days'],
+            prefix=options['prefix'],
+            batch_size=options['batch_size'],
+            random_seed=options['seed'],
+            pull_threshold=options['pull_threshold'],
+        )
+        for name, count in created.items():
+            self.stdout.write(f'{name}: {count}')
+        self.stdout.write(self.style.SUCCESS('Данные для замеров готовы'))
@@ -0,0 +1,105 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:31
+
+import itertools
+import re
+from collections import Counter
+
+from django.db import OperationalError, migrations, models
+
+FTS_TABLES = ('posts_post_search', 'posts_comment_search')
+BATCH_SIZE = 1000
+
+
+def tokenize(text):
+    return [
+        term for term in re.findall(r'\w+', text.lower()) if len(term) <= 64
+    ]
+
+
+def create_fts_tables(schema_editor):
+    """Создает таблицы FTS5. False, если SQLite собран без FTS5."""
+    if schema_editor.connection.vendor != 'sqlite':
+        return False
+    with schema_editor.connection.cursor() as cursor:
+        try:
+            for table in FTS_TABLES:
+                cursor.execute(
+                    f'CREATE VIRTUAL TABLE {table} USING fts5('
+                    f"body, tokenize='unicode61 remove_diacritics 0')"
+                )
+        except OperationalError:
+            return False
+    return True
+
+
+def build_index(apps, schema_editor):
+    fts = create_fts_tables(schema_editor)
+    SearchTerm = apps.get_model('posts', 'SearchTerm')
+    for kind, table in zip(('post', 'comment'), FTS_TABLES):
+        model = apps.get_model('posts', kind.capitalize())
+        rows = model.objects.values_list('id', 'text').iterator(
+            chunk_size=BATCH_SIZE
+        )
+        if fts:
+            with schema_editor.connection.cursor() as cursor:
+                while True:
+                    chunk = list(itertools.islice(rows, BATCH_SIZE))
+                    if not chunk:
+                        break
+                    cursor.executemany(
+                        f'INSERT INTO {table} (rowid, body) '
+                        f'VALUES (%s, %s)',
+                        [(pk, ' '.join(tokenize(text))) for pk, text in chunk]
+                    )
+            continue
+        SearchTerm.objects.bulk_create(
+            (
+                SearchTerm(
+                    kind=kind, term=term, object_id=pk, frequency=frequency
+                )
+                for pk, text in rows
+                for term, frequency in Counter(tokenize(text)).items()
+            ),
+            batch_size=BATCH_SIZE,
+        )
+
+
+def drop_fts_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for table in FTS_TABLES:
+            cursor.execute(f'DROP TABLE IF EXISTS {table}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_post_updated'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchTerm',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=16, verbose_name='Тип объекта')),
+                ('term', models.CharField(max_length=64, verbose_name='Терм')),
+                ('object_id', models.PositiveIntegerField(verbose_name='ID объекта')),
+                ('frequency', models.PositiveIntegerField(verbose_name='Частота')),
+            ],
+            options={
+                'verbose_name': 'Терм поиска',
+                'verbose_name_plural': 'Термы поиска',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='searchterm',
+            index=models.Index(fields=['kind', 'term'], name='search_kind_term_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='searchterm',
+            index=models.Index(fields=['kind', 'object_id'], name='search_kind_object_idx'),
+        ),
+        migrations.RunPython(build_index, drop_fts_tables),
+    ]
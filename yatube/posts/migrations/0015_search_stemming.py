@@ -0,0 +1,225 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:48
+
+import itertools
+import re
+from collections import Counter
+
+from django.db import migrations
+
+GROUP_TABLE = 'posts_group_search'
+INDEXED_FIELDS = (
+    ('post', 'Post', ('text',)),
+    ('comment', 'Comment', ('text',)),
+    ('group', 'Group', ('title', 'description')),
+)
+BATCH_SIZE = 1000
+
+# Копия posts.stemmer на момент миграции: миграция не должна зависеть
+# от того, как стеммер поменяется потом.
+VOWELS = 'аеиоуыэюя'
+CYRILLIC_WORD = re.compile('[а-я]+')
+
+# Вторая группа окончаний срезается, только если перед ними «а» или «я».
+PERFECTIVE_GERUND = (
+    ('ив', 'ивши', 'ившись', 'ыв', 'ывши', 'ывшись'),
+    ('в', 'вши', 'вшись'),
+)
+REFLEXIVE = (('ся', 'сь'), ())
+ADJECTIVE = (
+    (
+        'ее', 'ие', 'ые', 'ое', 'ими', 'ыми', 'ей', 'ий', 'ый', 'ой',
+        'ем', 'им', 'ым', 'ом', 'его', 'ого', 'ему', 'ому', 'их', 'ых',
+        'ую', 'юю', 'ая', 'яя', 'ою', 'ею',
+    ),
+    (),
+)
+PARTICIPLE = (('ивш', 'ывш', 'ующ'), ('ем', 'нн', 'вш', 'ющ', 'щ'))
+VERB = (
+    (
+        'ила', 'ыла', 'ена', 'ейте', 'уйте', 'ите', 'или', 'ыли', 'ей',
+        'уй', 'ил', 'ыл', 'им', 'ым', 'ен', 'ило', 'ыло', 'ено', 'ят',
+        'ует', 'уют', 'ит', 'ыт', 'ены', 'ить', 'ыть', 'ишь', 'ую', 'ю',
+    ),
+    (
+        'ла', 'на', 'ете', 'йте', 'ли', 'й', 'л', 'ем', 'н', 'ло', 'но',
+        'ет', 'ют', 'ны', 'ть', 'ешь', 'нно',
+    ),
+)
+NOUN = (
+    (
+        'а', 'ев', 'ов', 'ие', 'ье', 'е', 'иями', 'ями', 'ами', 'еи', 'ии',
+        'и', 'ией', 'ей', 'ой', 'ий', 'й', 'иям', 'ям', 'ием', 'ем', 'ам',
+        'ом', 'о', 'у', 'ах', 'иях', 'ях', 'ы', 'ь', 'ию', 'ью', 'ю', 'ия',
+        'ья', 'я',
+    ),
+    (),
+)
+SUPERLATIVE = (('ейше', 'ейш'), ())
+
+
+def _candidates(endings):
+    plain, after_a = endings
+    return sorted(
+        [(ending, False) for ending in plain]
+        + [(ending, True) for ending in after_a],
+        key=lambda candidate: -len(candidate[0]),
+    )
+
+
+ENDINGS = {
+    name: _candidates(endings) for name, endings in (
+        ('gerund', PERFECTIVE_GERUND),
+        ('reflexive', REFLEXIVE),
+        ('adjective', ADJECTIVE),
+        ('participle', PARTICIPLE),
+        ('verb', VERB),
+        ('noun', NOUN),
+        ('superlative', SUPERLATIVE),
+    )
+}
+
+
+def _remove(word, rv, group):
+    """Срезает самое длинное окончание группы из RV или возвращает None."""
+    for ending, after_a in ENDINGS[group]:
+        cut = len(word) - len(ending)
+        if not word.endswith(ending) or cut < rv:
+            continue
+        if after_a and (cut - 1 < rv or word[cut - 1] not in 'ая'):
+            continue
+        return word[:cut]
+    return None
+
+
+def _rv(word):
+    for position, char in enumerate(word):
+        if char in VOWELS:
+            return position + 1
+    return len(word)
+
+
+def stem(word):
+    """Основа русского слова. Прочие слова возвращаются как есть."""
+    if not CYRILLIC_WORD.fullmatch(word):
+        return word
+    rv = _rv(word)
+    stemmed = _remove(word, rv, 'gerund')
+    if stemmed is None:
+        word = _remove(word, rv, 'reflexive') or word
+        stemmed = _remove(word, rv, 'adjective')
+        if stemmed is not None:
+            stemmed = _remove(stemmed, rv, 'participle') or stemmed
+        else:
+            stemmed = (
+                _remove(word, rv, 'verb') or _remove(word, rv, 'noun')
+                or word
+            )
+    word = stemmed
+    if word.endswith('и') and len(word) - 1 >= rv:
+        word = word[:-1]
+    word = _remove(word, rv, 'superlative') or word
+    if word.endswith('нн') and len(word) - 1 >= rv:
+        return word[:-1]
+    if word.endswith('ь') and len(word) - 1 >= rv:
+        return word[:-1]
+    return word
+
+
+def tokenize(text):
+    """Токенизатор posts.search на момент миграции."""
+    text = text.casefold().replace('ё', 'е')
+    terms = (stem(word) for word in re.findall(r'\w+', text))
+    return [term for term in terms if len(term) <= 64]
+
+
+def unstemmed_tokenize(text):
+    """Токенизатор миграции 0014: слова целиком, без стемминга."""
+    return [
+        term for term in re.findall(r'\w+', text.lower()) if len(term) <= 64
+    ]
+
+
+def has_fts5(schema_editor):
+    connection = schema_editor.connection
+    return (
+        connection.vendor == 'sqlite'
+        and 'posts_post_search' in connection.introspection.table_names()
+    )
+
+
+def documents(model, fields, alias, tokenize):
+    rows = model.objects.using(alias).order_by().values_list(
+        'pk', *fields
+    ).iterator(chunk_size=BATCH_SIZE)
+    while True:
+        chunk = list(itertools.islice(rows, BATCH_SIZE))
+        if not chunk:
+            return
+        yield [(row[0], tokenize(' '.join(row[1:]))) for row in chunk]
+
+
+def fill_index(apps, schema_editor, indexed_fields, tokenize):
+    """Заново заполняет индексы перечисленных типов объектов."""
+    connection = schema_editor.connection
+    alias = connection.alias
+    fts = has_fts5(schema_editor)
+    SearchTerm = apps.get_model('posts', 'SearchTerm')
+    for kind, model_name, fields in indexed_fields:
+        model = apps.get_model('posts', model_name)
+        if fts:
+            table = f'posts_{kind}_search'
+            with connection.cursor() as cursor:
+                cursor.execute(f'DELETE FROM {table}')
+                for chunk in documents(model, fields, alias, tokenize):
+                    cursor.executemany(
+                        f'INSERT INTO {table} (rowid, body) '
+                        f'VALUES (%s, %s)',
+                        [(pk, ' '.join(terms)) for pk, terms in chunk]
+                    )
+            continue
+        SearchTerm.objects.using(alias).filter(kind=kind).delete()
+        for chunk in documents(model, fields, alias, tokenize):
+            SearchTerm.objects.using(alias).bulk_create(
+                SearchTerm(
+                    kind=kind, term=term, object_id=pk, frequency=frequency
+                )
+                for pk, terms in chunk
+                for term, frequency in Counter(terms).items()
+            )
+
+
+def rebuild_index(apps, schema_editor):
+    """Группы попадают в индекс, а термы поста теперь — основы слов."""
+    if has_fts5(schema_editor):
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE IF NOT EXISTS {GROUP_TABLE} USING '
+                f"fts5(body, tokenize='unicode61 remove_diacritics 0')"
+            )
+    fill_index(apps, schema_editor, INDEXED_FIELDS, tokenize)
+
+
+def restore_unstemmed_index(apps, schema_editor):
+    """Возвращает индекс миграции 0014: целые слова и без групп."""
+    if has_fts5(schema_editor):
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {GROUP_TABLE}')
+    else:
+        SearchTerm = apps.get_model('posts', 'SearchTerm')
+        SearchTerm.objects.using(schema_editor.connection.alias).filter(
+            kind='group'
+        ).delete()
+    fill_index(
+        apps, schema_editor, INDEXED_FIELDS[:2], unstemmed_tokenize
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_searchterm'),
+    ]
+
+    operations = [
+        migrations.RunPython(rebuild_index, restore_unstemmed_index),
+    ]
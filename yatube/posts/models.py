@@ -46,11 +46,33 @@ class Post(ModelWithDate):
         blank=True,
         help_text='Загрузите картинку'
     )
+    updated = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True
+    )
+    # Поддерживается сигналами, как AuthorStats, чинится recount_stats.
+    comments_count = models.PositiveIntegerField(
+        verbose_name='Комментариев',
+        default=0,
+        editable=False
+    )
 
     class Meta:
         ordering = ("-pub_date",)
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
+        # Ленты группы и профиля — диапазон по индексу в порядке
+        # курсора (pub_date, id), без сортировки.
+        indexes = [
+            models.Index(
+                fields=['group', '-pub_date', '-id'],
+                name='post_group_date_idx'
+            ),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='post_author_date_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.text[:SYMBOLS_FOR_PREVIEW]
@@ -83,6 +105,12 @@ class Comment(models.Model):
         ordering = ("created",)
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = [
+            models.Index(
+                fields=['post', 'created', 'id'],
+                name='comment_post_created_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.text[:SYMBOLS_FOR_PREVIEW]
@@ -113,3 +141,146 @@ class Follow(models.Model):
                 fields=["user", "author"], name="unique_follow"
             )
         ]
+        # Обратный к unique_follow: подписчики автора при раскладке
+        # поста по лентам и подсчете популярных авторов.
+        indexes = [
+            models.Index(
+                fields=['author', 'user'], name='follow_author_user_idx'
+            ),
+        ]
+
+
+class TimelineEntry(models.Model):
+    """Запись материализованной ленты подписок пользователя.
+
+    Заполняется при публикации поста (fan-out on write), поэтому
+    страница ленты — это чтение диапазона по индексу
+    (user, pub_date, post).
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='Читатель',
+        related_name='timeline'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        verbose_name='Пост',
+        related_name='timeline_entries'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='Автор поста',
+        related_name='+'
+    )
+    pub_date = models.DateTimeField(verbose_name='Дата публикации')
+
+    class Meta:
+        ordering = ('-pub_date', '-id')
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'], name='unique_timeline_entry'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='timeline_user_date_post_idx'
+            ),
+            models.Index(
+                fields=['user', 'author'], name='timeline_user_author_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'Пост {self.post_id} в ленте {self.user}'
+
+
+class PulledAuthor(models.Model):
+    """Автор с большим числом подписчиков.
+
+    Его посты не раскладываются по лентам при записи, а подтягиваются
+    в ленту подписок при чтении.
+    """
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        verbose_name='Автор',
+        related_name='pulled'
+    )
+    followers = models.PositiveIntegerField(
+        verbose_name='Подписчиков при классификации'
+    )
+    classified = models.DateTimeField(
+        verbose_name='Дата классификации',
+        auto_now=True
+    )
+
+    class Meta:
+        verbose_name = 'Популярный автор'
+        verbose_name_plural = 'Популярные авторы'
+
+    def __str__(self):
+        return f'{self.author} ({self.followers} подписчиков)'
+
+
+class AuthorStats(models.Model):
+    """Денормализованные счетчики автора.
+
+    Поддерживаются сигналами через F()-обновления, расхождения чинит
+    команда recount_stats.
+    """
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        verbose_name='Автор',
+        related_name='stats'
+    )
+    posts_count = models.PositiveIntegerField(
+        verbose_name='Постов', default=0
+    )
+    comments_count = models.PositiveIntegerField(
+        verbose_name='Комментариев', default=0
+    )
+    followers_count = models.PositiveIntegerField(
+        verbose_name='Подписчиков', default=0
+    )
+
+    class Meta:
+        verbose_name = 'Статистика автора'
+        verbose_name_plural = 'Статистика авторов'
+
+    def __str__(self):
+        return f'Статистика {self.author}'
+
+
+class SearchTerm(models.Model):
+    """Запись инвертированного индекса: терм встречается в объекте.
+
+    Используется запасным поисковым индексом, когда у базы нет FTS5.
+    """
+    kind = models.CharField(max_length=16, verbose_name='Тип объекта')
+    term = models.CharField(max_length=64, verbose_name='Терм')
+    object_id = models.PositiveIntegerField(verbose_name='ID объекта')
+    frequency = models.PositiveIntegerField(verbose_name='Частота')
+
+    class Meta:
+        verbose_name = 'Терм поиска'
+        verbose_name_plural = 'Термы поиска'
+        indexes = [
+            models.Index(
+                fields=['kind', 'term'], name='search_kind_term_idx'
+            ),
+            models.Index(
+                fields=['kind', 'object_id'], name='search_kind_object_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.term} в {self.kind} {self.object_id}'
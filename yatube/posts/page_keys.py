@@ -0,0 +1,50 @@
+"""Суррогатные ключи страниц с постами для core.page_cache.
+
+Ключи двух видов. post:<id>, author:<id> и group:<id> помечают
+страницы, где выводится сам объект: текст поста, имя автора,
+название группы. feed:... и comments:<id> помечают страницы со
+списком: появление или удаление поста меняет ленты и счетчик постов
+автора, но не страницы, где выводятся только его имя или группа.
+"""
+
+from core import page_cache
+
+INDEX = 'feed:index'
+
+
+def post(pk):
+    return f'post:{pk}'
+
+
+def author(pk):
+    return f'author:{pk}'
+
+
+def group(pk):
+    return f'group:{pk}'
+
+
+def group_feed(pk):
+    return f'feed:group:{pk}'
+
+
+def author_feed(pk):
+    return f'feed:author:{pk}'
+
+
+def comments(pk):
+    return f'comments:{pk}'
+
+
+def for_posts(posts):
+    """Ключи карточек: пост, его автор и группа."""
+    keys = set()
+    for item in posts:
+        keys.update((post(item.pk), author(item.author_id)))
+        if item.group_id is not None:
+            keys.add(group(item.group_id))
+    return keys
+
+
+def tag_page(request, posts, *keys):
+    page_cache.tag(request, *keys, *for_posts(posts))
@@ -0,0 +1,215 @@
+"""Паджинация по курсору (keyset pagination).
+
+Вместо OFFSET и COUNT(*) страница выбирается условием по паре
+(дата, id) последнего показанного объекта, поэтому любая страница
+стоит столько же, сколько первая.
+"""
+
+import base64
+import binascii
+
+from django.core.paginator import InvalidPage, Page, Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+def encode_cursor(direction, value, pk):
+    """Упаковывает позицию в непрозрачную строку для ?cursor=."""
+    if hasattr(value, 'isoformat'):
+        value = value.isoformat()
+    raw = f'{direction}|{value}|{pk}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token, parse=parse_datetime):
+    """Распаковывает курсор. Бросает InvalidPage на мусорных данных."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        direction, value, pk = raw.split('|')
+        value = parse(value)
+        pk = int(pk)
+    except (binascii.Error, UnicodeError, ValueError):
+        raise InvalidPage('Некорректный курсор')
+    if direction not in (NEXT, PREVIOUS) or value is None:
+        raise InvalidPage('Некорректный курсор')
+    return direction, value, pk
+
+
+class CursorPaginator(Paginator):
+    """Паджинатор по ключу (date_field, key_field) с курсорами.
+
+    Возвращает обычный django Page, но не знает общего числа страниц:
+    number и num_pages подобраны так, чтобы has_next/has_previous
+    работали без COUNT(*). Ссылки строятся по next_cursor
+    и previous_cursor.
+    """
+
+    parse_value = staticmethod(parse_datetime)
+
+    def __init__(self, object_list, per_page, date_field='pub_date',
+                 key_field='id', descending=True):
+        super().__init__(object_list, per_page)
+        self.date_field = date_field
+        self.key_field = key_field
+        self.descending = descending
+        self.cursor = None
+        self.has_next = False
+        self.has_previous = False
+        self.next_cursor = None
+        self.previous_cursor = None
+
+    @property
+    def num_pages(self):
+        return 1 + int(self.has_previous) + int(self.has_next)
+
+    @property
+    def page_range(self):
+        return range(1, self.num_pages + 1)
+
+    def _ordering(self, key_field, reverse=False):
+        descending = self.descending != reverse
+        prefix = '-' if descending else ''
+        return (f'{prefix}{self.date_field}', f'{prefix}{key_field}')
+
+    def _after(self, key_field, date, pk, reverse=False):
+        """Условие «строго после позиции» в выбранном порядке обхода."""
+        lookup = 'lt' if self.descending != reverse else 'gt'
+        return (
+            Q(**{f'{self.date_field}__{lookup}': date})
+            | Q(**{self.date_field: date, f'{key_field}__{lookup}': pk})
+        )
+
+    def _fetch(self, queryset, key_field, date, pk, reverse):
+        """Не больше per_page + 1 объектов после позиции."""
+        queryset = queryset.order_by(*self._ordering(key_field, reverse))
+        if date is not None:
+            queryset = queryset.filter(
+                self._after(key_field, date, pk, reverse)
+            )
+        return list(queryset[:self.per_page + 1])
+
+    def _slice(self, date, pk, reverse):
+        return self._fetch(self.object_list, self.key_field, date, pk,
+                           reverse)
+
+    def _position(self, obj):
+        return getattr(obj, self.date_field), getattr(obj, self.key_field)
+
+    def _cursor(self, direction, obj):
+        return encode_cursor(direction, *self._position(obj))
+
+    def page(self, cursor=None):
+        """Возвращает страницу, начинающуюся после курсора."""
+        direction, date, pk = (
+            decode_cursor(cursor, self.parse_value) if cursor
+            else (NEXT, None, None)
+        )
+        reverse = direction == PREVIOUS
+        self.cursor = cursor or None
+        items = self._slice(date, pk, reverse)
+        has_more = len(items) > self.per_page
+        items = items[:self.per_page]
+        if reverse:
+            items.reverse()
+            self.has_previous, self.has_next = has_more, True
+        else:
+            self.has_previous, self.has_next = date is not None, has_more
+        if items:
+            self.previous_cursor = (
+                self._cursor(PREVIOUS, items[0]) if self.has_previous
+                else None
+            )
+            self.next_cursor = (
+                self._cursor(NEXT, items[-1]) if self.has_next else None
+            )
+        return Page(items, 1 + int(self.has_previous), self)
+
+    def get_page(self, cursor=None):
+        """Как page(), но при битом курсоре отдает первую страницу."""
+        try:
+            return self.page(cursor)
+        except InvalidPage:
+            return self.page()
+
+
+class MergedCursorPaginator(CursorPaginator):
+    """Сливает несколько упорядоченных источников в одну ленту.
+
+    object_list — последовательность троек (queryset, key_field,
+    transform): из каждого источника читается не больше страницы,
+    transform превращает строку источника в итоговый объект,
+    повторы по pk отбрасываются.
+    """
+
+    def _identity(self, obj):
+        return obj.pk
+
+    def _slice(self, date, pk, reverse):
+        merged = {}
+        for queryset, key_field, transform in self.object_list:
+            for row in self._fetch(queryset, key_field, date, pk, reverse):
+                obj = transform(row)
+                merged[self._identity(obj)] = obj
+        items = sorted(
+            merged.values(),
+            key=self._position,
+            reverse=self.descending != reverse,
+        )
+        return items[:self.per_page + 1]
+
+
+class ValuesMixin:
+    """Страницы из словарей .values() вместо объектов моделей.
+
+    В строках должны быть поля ключа date_field и key_field.
+    """
+
+    def _position(self, row):
+        return row[self.date_field], row[self.key_field]
+
+    def _identity(self, row):
+        return row[self.key_field]
+
+
+class ValuesCursorPaginator(ValuesMixin, CursorPaginator):
+    pass
+
+
+class ValuesMergedCursorPaginator(ValuesMixin, MergedCursorPaginator):
+    """Слияние источников .values(); transform приводит строку
+    источника к ключу (date_field, key_field) итоговой ленты."""
+
+
+class RankedCursorPaginator(CursorPaginator):
+    """Паджинатор по рангу для результатов поиска.
+
+    object_list — объект с методом ranked(after, reverse, limit),
+    который отдает пары (ранг, pk) по возрастанию ранга, и атрибутом
+    queryset, из которого поднимаются сами объекты. Ранг сохраняется
+    в атрибуте search_rank объекта.
+    """
+
+    parse_value = staticmethod(float)
+
+    def __init__(self, object_list, per_page):
+        super().__init__(
+            object_list, per_page, date_field='search_rank',
+            descending=False
+        )
+
+    def _slice(self, rank, pk, reverse):
+        after = None if rank is None else (rank, pk)
+        ranked = self.object_list.ranked(after, reverse, self.per_page + 1)
+        objects = self.object_list.queryset.in_bulk(
+            [pk for _, pk in ranked]
+        )
+        items = []
+        for rank, pk in ranked:
+            if pk in objects:
+                objects[pk].search_rank = rank
+                items.append(objects[pk])
+        return items
@@ -0,0 +1,78 @@
+"""Кэш строк постов для пакетного API.
+
+Строка — словарь со всеми полями POST_FIELDS в нотации .values()
+(author__username, group__slug), поэтому одна запись годится для
+любого ?fields=. Запись хранит версии имен авторов и групп из
+feed_cache и при их смене считается промахом; правка или удаление
+поста удаляет его запись сигналом.
+
+rows() читает все записи одним get_many, а промахи — одним in_bulk
+по постам и по одному запросу на их авторов и группы, всегда из
+основной базы (см. core.routers).
+"""
+
+from django.core.cache import cache
+
+from core import routers
+from core.constants import API_POST_TIMEOUT
+from . import feed_cache
+from .models import Group, Post, User
+
+POST_KEY = 'api-post:{}'
+
+
+def post_key(pk):
+    return POST_KEY.format(pk)
+
+
+def _load(ids):
+    posts = Post.objects.only(
+        'text', 'pub_date', 'updated', 'image', 'author', 'group'
+    ).in_bulk(ids)
+    if not posts:
+        return {}
+    usernames = dict(User.objects.filter(
+        pk__in={post.author_id for post in posts.values()}
+    ).values_list('pk', 'username'))
+    group_ids = {post.group_id for post in posts.values()} - {None}
+    slugs = dict(
+        Group.objects.filter(pk__in=group_ids).values_list('pk', 'slug')
+    ) if group_ids else {}
+    return {
+        pk: {
+            'id': pk,
+            'text': post.text,
+            'pub_date': post.pub_date,
+            'updated': post.updated,
+            'image': post.image.name,
+            'author__username': usernames[post.author_id],
+            'group__slug': slugs.get(post.group_id),
+        }
+        for pk, post in posts.items()
+    }
+
+
+def rows(ids):
+    """Строки существующих постов из ids: {id: строка}."""
+    version = feed_cache.versions(*feed_cache.GLOBAL_SCOPES)
+    cached = cache.get_many([post_key(pk) for pk in ids])
+    found = {}
+    for pk in ids:
+        entry = cached.get(post_key(pk))
+        if entry is not None and entry['version'] == version:
+            found[pk] = entry['row']
+    missing = [pk for pk in ids if pk not in found]
+    if missing:
+        routers.pin()
+    loaded = _load(missing)
+    if loaded:
+        cache.set_many({
+            post_key(pk): {'version': version, 'row': row}
+            for pk, row in loaded.items()
+        }, API_POST_TIMEOUT)
+        found.update(loaded)
+    return found
+
+
+def forget(pk):
+    cache.delete(post_key(pk))
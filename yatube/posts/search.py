@@ -0,0 +1,274 @@
+"""Полнотекстовый поиск по постам, комментариям и группам.
+
+Текст приводится к нижнему регистру, «ё» заменяется на «е», русские
+слова сводятся к основе легким стеммером, поэтому «котами» находит
+пост про «кота». Инвертированный индекс обновляется сигналами при
+сохранении и удалении объектов, целиком его пересобирает команда
+reindex_search. На SQLite с FTS5 индекс лежит в виртуальных
+таблицах posts_<kind>_search и ранжируется bm25. На других базах
+работает запасной индекс на Python: таблица SearchTerm
+(терм, объект, частота) и ранжирование tf-idf.
+
+Ранг у обоих индексов тем меньше, чем выше объект в выдаче.
+"""
+
+import functools
+import itertools
+import math
+import re
+from collections import Counter
+
+from django.db import connection, transaction
+from django.db.models import (
+    Case, Count, F, FloatField, Q, Sum, Value, When,
+)
+
+from core.constants import SEARCH_BATCH_SIZE
+from .models import Comment, Group, Post, SearchTerm
+from .stemmer import stem
+
+KINDS = {Post: 'post', Comment: 'comment', Group: 'group'}
+INDEXED_FIELDS = {
+    Post: ('text',),
+    Comment: ('text',),
+    Group: ('title', 'description'),
+}
+MAX_TERM_LENGTH = 64
+
+
+def tokenize(text):
+    """Разбивает текст на основы слов без учета регистра и «ё»."""
+    text = text.casefold().replace('ё', 'е')
+    terms = (stem(word) for word in re.findall(r'\w+', text))
+    return [term for term in terms if len(term) <= MAX_TERM_LENGTH]
+
+
+def document(instance):
+    """Индексируемый текст объекта."""
+    return ' '.join(
+        getattr(instance, field) for field in INDEXED_FIELDS[type(instance)]
+    )
+
+
+def fts_table(kind):
+    return f'posts_{kind}_search'
+
+
+class Fts5Index:
+    """Индекс в виртуальной таблице SQLite FTS5, rowid — pk объекта."""
+
+    def __init__(self, kind, model):
+        self.table = fts_table(kind)
+
+    def add(self, pk, text):
+        self.add_many([(pk, text)])
+
+    def add_many(self, documents):
+        rows = [(pk, ' '.join(tokenize(text))) for pk, text in documents]
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'DELETE FROM {self.table} WHERE rowid = %s',
+                [(pk,) for pk, _ in rows]
+            )
+            cursor.executemany(
+                f'INSERT INTO {self.table} (rowid, body) VALUES (%s, %s)',
+                rows
+            )
+
+    def remove(self, pk):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {self.table} WHERE rowid = %s', [pk]
+            )
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+
+    @staticmethod
+    def _match(terms):
+        return ' '.join('"{}"'.format(term.replace('"', '""'))
+                        for term in terms)
+
+    def filter(self, queryset, terms):
+        meta = queryset.model._meta
+        column = '{}.{}'.format(
+            connection.ops.quote_name(meta.db_table),
+            connection.ops.quote_name(meta.pk.column),
+        )
+        return queryset.extra(
+            where=[
+                f'{column} IN (SELECT rowid FROM {self.table} '
+                f'WHERE {self.table} MATCH %s)'
+            ],
+            params=[self._match(terms)],
+        )
+
+    def ranked(self, terms, after=None, reverse=False, limit=None):
+        rank = f'bm25({self.table})'
+        sql = (
+            f'SELECT {rank}, rowid FROM {self.table} '
+            f'WHERE {self.table} MATCH %s'
+        )
+        params = [self._match(terms)]
+        if after is not None:
+            op = '<' if reverse else '>'
+            sql += (
+                f' AND ({rank} {op} %s'
+                f' OR ({rank} = %s AND rowid {op} %s))'
+            )
+            params += [after[0], after[0], after[1]]
+        order = 'DESC' if reverse else 'ASC'
+        sql += f' ORDER BY {rank} {order}, rowid {order} LIMIT %s'
+        params.append(-1 if limit is None else limit)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return [tuple(row) for row in cursor.fetchall()]
+
+
+class PythonIndex:
+    """Запасной индекс в таблице SearchTerm для баз без FTS5."""
+
+    def __init__(self, kind, model):
+        self.kind = kind
+        self.model = model
+
+    def add(self, pk, text):
+        self.add_many([(pk, text)])
+
+    def add_many(self, documents):
+        documents = list(documents)
+        with transaction.atomic():
+            SearchTerm.objects.filter(
+                kind=self.kind, object_id__in=[pk for pk, _ in documents]
+            ).delete()
+            SearchTerm.objects.bulk_create(
+                (
+                    SearchTerm(
+                        kind=self.kind, term=term, object_id=pk,
+                        frequency=frequency
+                    )
+                    for pk, text in documents
+                    for term, frequency in Counter(tokenize(text)).items()
+                ),
+                batch_size=SEARCH_BATCH_SIZE,
+            )
+
+    def remove(self, pk):
+        SearchTerm.objects.filter(kind=self.kind, object_id=pk).delete()
+
+    def clear(self):
+        SearchTerm.objects.filter(kind=self.kind).delete()
+
+    def _postings(self, terms):
+        return SearchTerm.objects.filter(kind=self.kind, term__in=terms)
+
+    def filter(self, queryset, terms):
+        terms = set(terms)
+        matched = self._postings(terms).values('object_id').annotate(
+            matched=Count('term')
+        ).filter(matched=len(terms)).values('object_id')
+        return queryset.filter(pk__in=matched)
+
+    def ranked(self, terms, after=None, reverse=False, limit=None):
+        """Ранжирует tf-idf в базе: в Python приходит только страница."""
+        terms = sorted(set(terms))
+        df = dict(
+            self._postings(terms).values_list('term').annotate(
+                df=Count('object_id')
+            ).order_by()
+        )
+        if len(df) < len(terms):
+            return []
+        total = self.model._default_manager.count()
+        weight = Case(
+            *(
+                When(term=term, then=Value(math.log(1 + total / df[term])))
+                for term in terms
+            ),
+            output_field=FloatField(),
+        )
+        rows = self._postings(terms).values('object_id').annotate(
+            matched=Count('term'),
+            rank=-Sum(F('frequency') * weight, output_field=FloatField()),
+        ).filter(matched=len(terms))
+        if after is not None:
+            rank, pk = after
+            op = 'lt' if reverse else 'gt'
+            rows = rows.filter(
+                Q(**{f'rank__{op}': rank})
+                | Q(rank=rank, **{f'object_id__{op}': pk})
+            )
+        order = ('-rank', '-object_id') if reverse else ('rank', 'object_id')
+        rows = rows.order_by(*order).values_list('rank', 'object_id')
+        if limit is not None:
+            rows = rows[:limit]
+        return list(rows)
+
+
+@functools.lru_cache(maxsize=None)
+def _has_fts5(database):
+    return fts_table('post') in connection.introspection.table_names()
+
+
+def get_index(model):
+    """Индекс модели: FTS5, если он есть у базы, иначе запасной."""
+    kind = KINDS[model]
+    if (connection.vendor == 'sqlite'
+            and _has_fts5(connection.settings_dict['NAME'])):
+        return Fts5Index(kind, model)
+    return PythonIndex(kind, model)
+
+
+def index_object(instance):
+    get_index(type(instance)).add(instance.pk, document(instance))
+
+
+def remove_object(instance):
+    get_index(type(instance)).remove(instance.pk)
+
+
+def reindex(model, chunk_size=SEARCH_BATCH_SIZE):
+    """Пересобирает индекс модели, читая объекты порциями.
+
+    В памяти одновременно не больше chunk_size документов.
+    Возвращает число проиндексированных объектов.
+    """
+    index = get_index(model)
+    fields = INDEXED_FIELDS[model]
+    rows = model._default_manager.order_by().values_list(
+        'pk', *fields
+    ).iterator(chunk_size=chunk_size)
+    total = 0
+    with transaction.atomic():
+        index.clear()
+        while True:
+            chunk = list(itertools.islice(rows, chunk_size))
+            if not chunk:
+                return total
+            index.add_many(
+                (row[0], ' '.join(row[1:])) for row in chunk
+            )
+            total += len(chunk)
+
+
+def filter_queryset(queryset, query):
+    """Оставляет объекты, где есть все слова запроса. Без ранжирования."""
+    terms = tokenize(query)
+    if not terms:
+        return queryset
+    return get_index(queryset.model).filter(queryset, terms)
+
+
+class SearchResults:
+    """Ранжированная выдача по запросу для RankedCursorPaginator."""
+
+    def __init__(self, queryset, query):
+        self.queryset = queryset
+        self.terms = tokenize(query)
+        self.index = get_index(queryset.model)
+
+    def ranked(self, after=None, reverse=False, limit=None):
+        if not self.terms:
+            return []
+        return self.index.ranked(self.terms, after, reverse, limit)
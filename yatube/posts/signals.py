@@ -0,0 +1,215 @@
+from functools import partial
+
+from django.core.signals import request_started
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core import page_cache
+from . import (feed_cache, page_keys, post_cache, search, stats, thumbnails,
+               timeline)
+from .models import AuthorStats, Comment, Follow, Group, Post, User
+
+
+@receiver(post_save, sender=Post)
+def post_to_timelines(sender, instance, created, **kwargs):
+    """Раскладывает новый пост по лентам подписчиков."""
+    if created:
+        timeline.fan_out(instance)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_timeline(sender, instance, created, **kwargs):
+    """Дозаполняет ленту постами автора, на которого подписались."""
+    if created:
+        timeline.backfill(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def prune_timeline(sender, instance, **kwargs):
+    """Вычищает из ленты посты автора, от которого отписались."""
+    timeline.prune(instance.user_id, instance.author_id)
+
+
+@receiver(post_save, sender=User)
+def create_stats(sender, instance, created, **kwargs):
+    """Заводит пустую статистику новому пользователю."""
+    if created:
+        AuthorStats.objects.get_or_create(author=instance)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Comment)
+@receiver(post_save, sender=Follow)
+def increment_stats(sender, instance, created, **kwargs):
+    """Увеличивает счетчик автора при создании поста/комментария/подписки."""
+    if created:
+        stats.bump(instance.author_id, stats.COUNTER_FOR[sender], 1)
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Comment)
+@receiver(post_delete, sender=Follow)
+def decrement_stats(sender, instance, **kwargs):
+    """Уменьшает счетчик автора при любом удалении, включая каскадное."""
+    stats.bump(instance.author_id, stats.COUNTER_FOR[sender], -1)
+
+
+@receiver(post_save, sender=Comment)
+def increment_post_comments(sender, instance, created, **kwargs):
+    """Увеличивает счетчик комментариев поста."""
+    if created:
+        stats.bump_comments(instance.post_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_post_comments(sender, instance, **kwargs):
+    """Уменьшает счетчик комментариев поста, если пост еще есть."""
+    stats.bump_comments(instance.post_id, -1)
+
+
+@receiver(pre_save, sender=Post)
+def remember_old_values(sender, instance, **kwargs):
+    """Запоминает прежние группу, картинку и текст поста."""
+    old_values = None
+    if instance.pk:
+        old_values = Post.objects.filter(pk=instance.pk).values_list(
+            'group_id', 'image', 'text'
+        ).first()
+    (
+        instance._old_group_id, instance._old_image, instance._old_text
+    ) = old_values or (None, None, None)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_feeds(sender, instance, **kwargs):
+    """Сбрасывает ленты, на которых пост был или появится."""
+    scopes = {
+        feed_cache.scope('index'),
+        feed_cache.scope('profile', instance.author_id),
+    }
+    for group_id in (instance.group_id,
+                     getattr(instance, '_old_group_id', None)):
+        if group_id is not None:
+            scopes.add(feed_cache.scope('group', group_id))
+    feed_cache.bump(*scopes)
+    post_cache.forget(instance.pk)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group_feeds(sender, instance, **kwargs):
+    """Название группы выводится на всех лентах."""
+    feed_cache.bump('groups', feed_cache.scope('group', instance.pk))
+
+
+@receiver(pre_save, sender=User)
+def remember_old_names(sender, instance, update_fields=None, **kwargs):
+    """Запоминает прежнее имя, если сохранение может его изменить."""
+    instance._old_names = None
+    if instance.pk and (
+        update_fields is None
+        or set(update_fields) & set(feed_cache.NAME_FIELDS)
+    ):
+        instance._old_names = User.objects.filter(
+            pk=instance.pk
+        ).values_list(*feed_cache.NAME_FIELDS).first()
+
+
+def name_changed(instance):
+    old_names = getattr(instance, '_old_names', None)
+    return old_names is not None and old_names != tuple(
+        getattr(instance, field) for field in feed_cache.NAME_FIELDS
+    )
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_feeds(sender, instance, **kwargs):
+    """Имя автора выводится на всех лентах; вход на сайт, смена пароля
+    и другие правки без смены имени не в счет."""
+    if name_changed(instance):
+        feed_cache.bump('users', feed_cache.scope('author', instance.pk))
+
+
+@receiver(post_delete, sender=User)
+def invalidate_deleted_user_feeds(sender, instance, **kwargs):
+    feed_cache.bump('users', feed_cache.scope('author', instance.pk))
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def purge_post_pages(sender, instance, **kwargs):
+    """Страницы поста, а если он появился, пропал или сменил группу,
+    то и ленты, где он есть или был."""
+    keys = {page_keys.post(instance.pk)}
+    # У post_delete нет created: удаление меняет ленты, как и создание.
+    listed = kwargs.get('created', True)
+    if listed:
+        keys.update((
+            page_keys.INDEX, page_keys.author_feed(instance.author_id)
+        ))
+    old_group_id = getattr(instance, '_old_group_id', None)
+    if listed or instance.group_id != old_group_id:
+        keys.update(
+            page_keys.group_feed(group_id)
+            for group_id in (instance.group_id, old_group_id)
+            if group_id is not None
+        )
+    page_cache.purge(*keys)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def purge_comment_pages(sender, instance, **kwargs):
+    page_cache.purge(page_keys.comments(instance.post_id))
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def purge_group_pages(sender, instance, **kwargs):
+    page_cache.purge(page_keys.group(instance.pk))
+
+
+@receiver(post_save, sender=User)
+def purge_renamed_author_pages(sender, instance, **kwargs):
+    if name_changed(instance):
+        page_cache.purge(page_keys.author(instance.pk))
+
+
+@receiver(post_delete, sender=User)
+def purge_author_pages(sender, instance, **kwargs):
+    page_cache.purge(page_keys.author(instance.pk))
+
+
+@receiver(post_save, sender=Post)
+def pregenerate_thumbnails(sender, instance, **kwargs):
+    """Ставит новую картинку поста в очередь на миниатюры."""
+    name = instance.image.name
+    if name and name != getattr(instance, '_old_image', None):
+        transaction.on_commit(partial(thumbnails.pregenerate, name))
+
+
+@receiver(request_started)
+def forget_prefetched_thumbnails(sender, **kwargs):
+    """Предзагруженные миниатюры живут не дольше одного запроса."""
+    thumbnails.BatchedKVStore.forget_prefetched()
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Comment)
+@receiver(post_save, sender=Group)
+def update_search_index(sender, instance, **kwargs):
+    """Переиндексирует объект; пост — только если изменился текст."""
+    if sender is Post and instance.text == getattr(
+        instance, '_old_text', None
+    ):
+        return
+    search.index_object(instance)
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Comment)
+@receiver(post_delete, sender=Group)
+def remove_from_search_index(sender, instance, **kwargs):
+    search.remove_object(instance)
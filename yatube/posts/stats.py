@@ -0,0 +1,108 @@
+"""Счетчики постов, комментариев и подписчиков автора
+и комментариев поста."""
+
+from django.db.models import Count, F
+
+from core.constants import STATS_BATCH_SIZE
+from .models import AuthorStats, Comment, Follow, Post, User
+
+COUNTERS = {
+    'posts_count': (Post, 'author'),
+    'comments_count': (Comment, 'author'),
+    'followers_count': (Follow, 'author'),
+}
+COUNTER_FOR = {model: counter for counter, (model, _) in COUNTERS.items()}
+
+
+def bump(author_id, field, delta):
+    """Атомарно сдвигает счетчик автора на delta.
+
+    Если строки статистики еще нет, при увеличении она создается
+    с точными значениями. При уменьшении отсутствие строки значит,
+    что автор удаляется каскадом, и трогать ничего не нужно.
+    """
+    stats = AuthorStats.objects.filter(author_id=author_id)
+    if delta < 0:
+        stats = stats.filter(**{f'{field}__gte': -delta})
+    if not stats.update(**{field: F(field) + delta}) and delta > 0:
+        recount([author_id])
+
+
+def bump_comments(post_id, delta):
+    """Атомарно сдвигает счетчик комментариев поста на delta.
+
+    Если поста уже нет (каскадное удаление), ничего не меняется.
+    """
+    posts = Post.objects.filter(pk=post_id)
+    if delta < 0:
+        posts = posts.filter(comments_count__gte=-delta)
+    posts.update(comments_count=F('comments_count') + delta)
+
+
+def _counts(model, field, author_ids):
+    return dict(
+        model.objects.filter(**{f'{field}__in': author_ids})
+        .values_list(field).annotate(Count('id')).order_by()
+    )
+
+
+def recount(author_ids):
+    """Пересчитывает статистику авторов. Возвращает число исправлений."""
+    counts = {
+        counter: _counts(model, field, author_ids)
+        for counter, (model, field) in COUNTERS.items()
+    }
+    existing = AuthorStats.objects.in_bulk(author_ids)
+    to_create, to_update = [], []
+    for author_id in author_ids:
+        values = {
+            counter: counts[counter].get(author_id, 0) for counter in counts
+        }
+        stats = existing.get(author_id)
+        if stats is None:
+            to_create.append(AuthorStats(author_id=author_id, **values))
+            continue
+        if any(getattr(stats, name) != value
+               for name, value in values.items()):
+            for name, value in values.items():
+                setattr(stats, name, value)
+            to_update.append(stats)
+    AuthorStats.objects.bulk_create(to_create, ignore_conflicts=True)
+    AuthorStats.objects.bulk_update(to_update, list(COUNTERS))
+    return len(to_create) + len(to_update)
+
+
+def recount_comments(post_ids):
+    """Пересчитывает комментарии постов. Возвращает число исправлений."""
+    counts = _counts(Comment, 'post', post_ids)
+    to_update = []
+    for post in Post.objects.filter(pk__in=post_ids).only('comments_count'):
+        count = counts.get(post.pk, 0)
+        if post.comments_count != count:
+            post.comments_count = count
+            to_update.append(post)
+    Post.objects.bulk_update(to_update, ['comments_count'])
+    return len(to_update)
+
+
+def _recount_batches(model, recount_batch):
+    fixed = 0
+    batch = []
+    ids = model.objects.order_by('pk').values_list('pk', flat=True)
+    for pk in ids.iterator(chunk_size=STATS_BATCH_SIZE):
+        batch.append(pk)
+        if len(batch) >= STATS_BATCH_SIZE:
+            fixed += recount_batch(batch)
+            batch = []
+    if batch:
+        fixed += recount_batch(batch)
+    return fixed
+
+
+def recount_all():
+    """Пересчитывает пачками статистику всех пользователей
+    и счетчики комментариев всех постов."""
+    return (
+        _recount_batches(User, recount)
+        + _recount_batches(Post, recount_comments)
+    )
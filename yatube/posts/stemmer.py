@@ -0,0 +1,118 @@
+"""Легкий стеммер для русского языка.
+
+Облегченный вариант алгоритма Snowball: срезаются только окончания
+(деепричастий, возвратных форм, прилагательных и причастий, глаголов,
+существительных, превосходной степени), словообразовательные
+суффиксы не трогаются. Окончания ищутся в области RV — части слова
+после первой гласной. Ожидается слово в нижнем регистре с «е» вместо «ё».
+"""
+
+import re
+
+VOWELS = 'аеиоуыэюя'
+CYRILLIC_WORD = re.compile('[а-я]+')
+
+# Вторая группа окончаний срезается, только если перед ними «а» или «я».
+PERFECTIVE_GERUND = (
+    ('ив', 'ивши', 'ившись', 'ыв', 'ывши', 'ывшись'),
+    ('в', 'вши', 'вшись'),
+)
+REFLEXIVE = (('ся', 'сь'), ())
+ADJECTIVE = (
+    (
+        'ее', 'ие', 'ые', 'ое', 'ими', 'ыми', 'ей', 'ий', 'ый', 'ой',
+        'ем', 'им', 'ым', 'ом', 'его', 'ого', 'ему', 'ому', 'их', 'ых',
+        'ую', 'юю', 'ая', 'яя', 'ою', 'ею',
+    ),
+    (),
+)
+PARTICIPLE = (('ивш', 'ывш', 'ующ'), ('ем', 'нн', 'вш', 'ющ', 'щ'))
+VERB = (
+    (
+        'ила', 'ыла', 'ена', 'ейте', 'уйте', 'ите', 'или', 'ыли', 'ей',
+        'уй', 'ил', 'ыл', 'им', 'ым', 'ен', 'ило', 'ыло', 'ено', 'ят',
+        'ует', 'уют', 'ит', 'ыт', 'ены', 'ить', 'ыть', 'ишь', 'ую', 'ю',
+    ),
+    (
+        'ла', 'на', 'ете', 'йте', 'ли', 'й', 'л', 'ем', 'н', 'ло', 'но',
+        'ет', 'ют', 'ны', 'ть', 'ешь', 'нно',
+    ),
+)
+NOUN = (
+    (
+        'а', 'ев', 'ов', 'ие', 'ье', 'е', 'иями', 'ями', 'ами', 'еи', 'ии',
+        'и', 'ией', 'ей', 'ой', 'ий', 'й', 'иям', 'ям', 'ием', 'ем', 'ам',
+        'ом', 'о', 'у', 'ах', 'иях', 'ях', 'ы', 'ь', 'ию', 'ью', 'ю', 'ия',
+        'ья', 'я',
+    ),
+    (),
+)
+SUPERLATIVE = (('ейше', 'ейш'), ())
+
+
+def _candidates(endings):
+    plain, after_a = endings
+    return sorted(
+        [(ending, False) for ending in plain]
+        + [(ending, True) for ending in after_a],
+        key=lambda candidate: -len(candidate[0]),
+    )
+
+
+ENDINGS = {
+    name: _candidates(endings) for name, endings in (
+        ('gerund', PERFECTIVE_GERUND),
+        ('reflexive', REFLEXIVE),
+        ('adjective', ADJECTIVE),
+        ('participle', PARTICIPLE),
+        ('verb', VERB),
+        ('noun', NOUN),
+        ('superlative', SUPERLATIVE),
+    )
+}
+
+
+def _remove(word, rv, group):
+    """Срезает самое длинное окончание группы из RV или возвращает None."""
+    for ending, after_a in ENDINGS[group]:
+        cut = len(word) - len(ending)
+        if not word.endswith(ending) or cut < rv:
+            continue
+        if after_a and (cut - 1 < rv or word[cut - 1] not in 'ая'):
+            continue
+        return word[:cut]
+    return None
+
+
+def _rv(word):
+    for position, char in enumerate(word):
+        if char in VOWELS:
+            return position + 1
+    return len(word)
+
+
+def stem(word):
+    """Основа русского слова. Прочие слова возвращаются как есть."""
+    if not CYRILLIC_WORD.fullmatch(word):
+        return word
+    rv = _rv(word)
+    stemmed = _remove(word, rv, 'gerund')
+    if stemmed is None:
+        word = _remove(word, rv, 'reflexive') or word
+        stemmed = _remove(word, rv, 'adjective')
+        if stemmed is not None:
+            stemmed = _remove(stemmed, rv, 'participle') or stemmed
+        else:
+            stemmed = (
+                _remove(word, rv, 'verb') or _remove(word, rv, 'noun')
+                or word
+            )
+    word = stemmed
+    if word.endswith('и') and len(word) - 1 >= rv:
+        word = word[:-1]
+    word = _remove(word, rv, 'superlative') or word
+    if word.endswith('нн') and len(word) - 1 >= rv:
+        return word[:-1]
+    if word.endswith('ь') and len(word) - 1 >= rv:
+        return word[:-1]
+    return word
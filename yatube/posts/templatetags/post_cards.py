@@ -0,0 +1,44 @@
+from django import template
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+
+from ..card_cache import render_cards
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def post_cards(context, posts):
+    """Карточки постов страницы через кэш карточек.
+
+    {% post_cards page_obj as cards %}
+    """
+    return render_cards(list(posts), context['request'])
+
+
+class FeedCacheNode(template.Node):
+    def __init__(self, nodelist):
+        self.nodelist = nodelist
+
+    def render(self, context):
+        key = context.get('feed_cache_key')
+        if key is None:
+            return self.nodelist.render(context)
+        fragment_key = make_template_fragment_key('feed', [key])
+        value = cache.get(fragment_key)
+        if value is None:
+            value = self.nodelist.render(context)
+            cache.set(fragment_key, value, context['feed_cache_timeout'])
+        return value
+
+
+@register.tag
+def feed_cache(parser, token):
+    """{% cache %} с ключом и сроком из feed_cache_context.
+
+    {% feed_cache %}...{% endfeed_cache %}; без feed_cache_key
+    содержимое рендерится без кэша.
+    """
+    nodelist = parser.parse(('endfeed_cache',))
+    parser.delete_first_token()
+    return FeedCacheNode(nodelist)
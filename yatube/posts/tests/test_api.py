@@ -0,0 +1,204 @@
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.constants import (API_BATCH_MAX_IDS, COMMENTS_PER_PAGE,
+                            POSTS_PER_PAGE)
+from ..models import Comment, Follow, Group, Post, PulledAuthor, User
+
+
+class ApiTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.star = User.objects.create_user(username='star')
+        PulledAuthor.objects.create(author=cls.star, followers=1)
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        Follow.objects.create(user=cls.reader, author=cls.star)
+        cls.group = Group.objects.create(
+            title='Группа', slug='api', description='-'
+        )
+        for i in range(POSTS_PER_PAGE):
+            for author in (cls.author, cls.star):
+                Post.objects.create(
+                    author=author, group=cls.group, text=f'Пост {i}'
+                )
+        cls.post = Post.objects.filter(author=cls.author).first()
+        for i in range(COMMENTS_PER_PAGE + 1):
+            Comment.objects.create(
+                post=cls.post, author=cls.reader, text=f'Комментарий {i}'
+            )
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def get(self, name, *args, status=HTTPStatus.OK, **params):
+        response = self.client.get(reverse(name, args=args), params)
+        self.assertEqual(response.status_code, status)
+        return response.json()
+
+    def walk(self, name, *args, **params):
+        """Все страницы ленты по курсору next."""
+        data = self.get(name, *args, **params)
+        results = data['results']
+        while data['next']:
+            data = self.get(name, *args, cursor=data['next'], **params)
+            results += data['results']
+        return results
+
+    def test_feeds_match_html_pages(self):
+        feeds = (
+            ('posts:index', 'posts:api_index', ()),
+            ('posts:group_list', 'posts:api_group', (self.group.slug,)),
+            ('posts:profile', 'posts:api_profile', (self.author.username,)),
+            ('posts:follow_index', 'posts:api_follow', ()),
+        )
+        for page, api, args in feeds:
+            with self.subTest(api=api):
+                html = self.client.get(reverse(page, args=args))
+                data = self.get(api, *args)
+                self.assertEqual(
+                    [post['id'] for post in data['results']],
+                    [post.pk for post in html.context['page_obj']],
+                )
+                self.assertIsNone(data['previous'])
+        self.assertEqual(
+            len(self.walk('posts:api_follow')), 2 * POSTS_PER_PAGE
+        )
+        self.assertEqual(
+            len(self.walk('posts:api_profile', self.author.username)),
+            POSTS_PER_PAGE,
+        )
+
+    def test_post_fields(self):
+        post = self.get('posts:api_post', self.post.pk)
+        self.assertEqual(post['id'], self.post.pk)
+        self.assertEqual(post['text'], self.post.text)
+        self.assertEqual(post['author'], 'author')
+        self.assertEqual(post['group'], 'api')
+        self.assertIsNone(post['image'])
+        self.assertEqual(set(post), {'id', 'text', 'pub_date', 'updated',
+                                     'image', 'author', 'group'})
+
+    def test_fields_select_only_needed_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            data = self.get('posts:api_index', fields='text,id')
+        self.assertEqual(list(data['results'][0]), ['text', 'id'])
+        self.assertEqual(len(queries.captured_queries), 1)
+        sql = queries.captured_queries[0]['sql']
+        self.assertNotIn('auth_user', sql)
+        self.assertNotIn('"updated"', sql)
+        data = self.get('posts:api_follow', fields='author')
+        self.assertEqual(
+            {post['author'] for post in data['results']},
+            {'author', 'star'},
+        )
+
+    def test_unknown_field_is_rejected(self):
+        data = self.get('posts:api_index', fields='text,password',
+                        status=HTTPStatus.BAD_REQUEST)
+        self.assertIn('password', data['error'])
+
+    def test_comments_paginate_by_cursor(self):
+        comments = self.walk('posts:api_comments', self.post.pk)
+        self.assertEqual(
+            [comment['text'] for comment in comments],
+            [f'Комментарий {i}' for i in range(COMMENTS_PER_PAGE + 1)],
+        )
+        self.assertEqual(comments[0]['author'], 'reader')
+        self.assertEqual(comments[0]['post'], self.post.pk)
+
+    def test_errors(self):
+        missing = Post.objects.order_by('-pk').first().pk + 1
+        for name, args in (
+            ('posts:api_post', (missing,)),
+            ('posts:api_comments', (missing,)),
+            ('posts:api_group', ('missing',)),
+            ('posts:api_profile', ('missing',)),
+        ):
+            with self.subTest(name=name):
+                self.get(name, *args, status=HTTPStatus.NOT_FOUND)
+        self.client.logout()
+        self.get('posts:api_follow', status=HTTPStatus.UNAUTHORIZED)
+        response = self.client.post(reverse('posts:api_index'))
+        self.assertEqual(response.status_code, HTTPStatus.METHOD_NOT_ALLOWED)
+
+
+class BatchApiTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='batch', description='-'
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author, group=cls.group if i % 2 else None,
+                text=f'Пост {i}'
+            )
+            for i in range(5)
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def batch(self, ids, status=HTTPStatus.OK, **params):
+        params['ids'] = ','.join(map(str, ids))
+        response = self.client.get(reverse('posts:api_batch'), params)
+        self.assertEqual(response.status_code, status)
+        return response.json()
+
+    def test_posts_in_requested_order(self):
+        ids = [post.pk for post in reversed(self.posts)]
+        missing = max(ids) + 1
+        data = self.batch([missing, *ids, ids[0]])
+        self.assertEqual([post['id'] for post in data['results']], ids)
+        self.assertEqual(data['missing'], [missing])
+        self.assertEqual(data['results'][0]['author'], 'author')
+        self.assertEqual(
+            [post['group'] for post in data['results']],
+            [None, 'batch', None, 'batch', None],
+        )
+
+    def test_cache_before_database(self):
+        """Холодный запрос: посты, авторы, группы; теплый — ни одного."""
+        ids = [post.pk for post in self.posts]
+        with CaptureQueriesContext(connection) as cold:
+            self.batch(ids)
+        self.assertEqual(len(cold.captured_queries), 3)
+        with CaptureQueriesContext(connection) as warm:
+            data = self.batch(ids, fields='text')
+        self.assertFalse(warm.captured_queries)
+        self.assertEqual(data['results'][0], {'text': 'Пост 0'})
+        with CaptureQueriesContext(connection) as partial:
+            self.batch([*ids, max(ids) + 1])
+        self.assertEqual(len(partial.captured_queries), 1)
+
+    def test_writes_refresh_cached_posts(self):
+        post = self.posts[0]
+        self.batch([post.pk])
+        post.text = 'Правка'
+        post.save()
+        self.author.username = 'renamed'
+        self.author.save()
+        result = self.batch([post.pk])['results'][0]
+        self.assertEqual(result['text'], 'Правка')
+        self.assertEqual(result['author'], 'renamed')
+        pk = post.pk
+        post.delete()
+        self.assertEqual(self.batch([pk])['missing'], [pk])
+
+    def test_bad_ids(self):
+        for ids in ([], ['x'], range(1, API_BATCH_MAX_IDS + 2)):
+            with self.subTest(ids=ids):
+                self.assertIn(
+                    'error', self.batch(ids, status=HTTPStatus.BAD_REQUEST)
+                )
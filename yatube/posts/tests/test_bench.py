@@ -0,0 +1,78 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..bench import VIEWS, percentile
+from ..models import Comment, Follow, Group, Post, TimelineEntry, User
+
+
+class BenchTest(TestCase):
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([7], 95), 7)
+
+    def test_seed_without_users(self):
+        """Без пользователей посты и комментарии не создаются."""
+        out = StringIO()
+        call_command(
+            'seed_bench', '--users', '0', '--groups', '1', '--posts', '5',
+            '--comments', '5', stdout=out
+        )
+        self.assertIn('posts: 0', out.getvalue())
+        self.assertEqual(Group.objects.count(), 1)
+        self.assertFalse(Post.objects.exists())
+        self.assertFalse(Comment.objects.exists())
+
+    def test_seed_and_run(self):
+        """Сид наполняет базу, прогон мерит все страницы и пишет JSON."""
+        call_command(
+            'seed_bench', '--users', '8', '--groups', '2', '--posts', '40',
+            '--comments', '15', '--follows', '3', '--seed', '1',
+            '--batch-size', '7', stdout=StringIO()
+        )
+        self.assertEqual(User.objects.count(), 8)
+        self.assertEqual(Group.objects.count(), 2)
+        self.assertEqual(Post.objects.count(), 40)
+        self.assertEqual(Comment.objects.count(), 15)
+        self.assertTrue(Follow.objects.exists())
+        self.assertTrue(TimelineEntry.objects.exists())
+        self.assertEqual(len(set(Post.objects.values_list(
+            'pub_date', flat=True
+        ))), 40)
+
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'bench.json')
+            call_command(
+                'bench_views', '--requests', '3', '--warmup', '1',
+                '--output', output, stdout=StringIO()
+            )
+            with open(output, encoding='utf-8') as report:
+                report = json.load(report)
+            out = StringIO()
+            call_command(
+                'bench_views', '--requests', '2', '--warmup', '0',
+                '--view', 'posts:index', '--baseline', output, stdout=out
+            )
+        self.assertEqual(set(report['views']), set(VIEWS))
+        self.assertEqual(report['rows']['posts.post'], 40)
+        for name, result in report['views'].items():
+            self.assertEqual(result['requests'], 3)
+            self.assertLessEqual(
+                result['latency_ms']['p50'], result['latency_ms']['max']
+            )
+            self.assertGreater(result['bytes']['p50'], 0)
+            self.assertGreater(result['throughput_rps'], 0)
+            if name == 'posts:api_batch':
+                # После прогрева посты отдаются из кэша без базы.
+                self.assertEqual(result['queries']['max'], 0)
+            else:
+                self.assertGreater(result['queries']['max'], 0)
+        self.assertIn('posts:index: p50', out.getvalue())
+        self.assertIn('%)', out.getvalue())
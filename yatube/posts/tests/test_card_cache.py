@@ -0,0 +1,93 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import Client, RequestFactory, TestCase
+from django.urls import resolve, reverse
+
+from core.constants import POSTS_PER_PAGE
+from ..card_cache import render_cards
+from ..models import Group, Post, User
+
+
+class PostCardCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='carded', first_name='Иван', last_name='Карточкин'
+        )
+        cls.group = Group.objects.create(
+            title='Группа карточек', slug='cards', description='-'
+        )
+        for i in range(POSTS_PER_PAGE):
+            Post.objects.create(
+                author=cls.user, group=cls.group, text=f'Карточка {i}'
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def follow_page(self):
+        return self.client.get(reverse('posts:profile', args=['carded']))
+
+    def test_cards_rendered_once(self):
+        """Повторный показ берет все карточки одним get_many."""
+        request = RequestFactory().get('/')
+        request.resolver_match = resolve(reverse('posts:index'))
+        posts = list(Post.objects.all())
+        first = render_cards(posts, request)
+        with mock.patch('posts.card_cache.get_template') as get_template:
+            with mock.patch.object(
+                cache, 'get_many', wraps=cache.get_many
+            ) as get_many:
+                second = render_cards(posts, request)
+        get_template.assert_not_called()
+        self.assertEqual(get_many.call_count, 2, 'версии + карточки')
+        self.assertEqual(first, second)
+        self.assertEqual(len(second), POSTS_PER_PAGE)
+
+    def test_edit_and_rename_invalidate_cards(self):
+        """Правка поста и смена имени автора обновляют карточки."""
+        self.follow_page()
+        post = Post.objects.get(text='Карточка 9')
+        self.client.post(
+            reverse('posts:post_edit', args=[post.pk]),
+            {'text': 'Исправленная карточка', 'group': self.group.pk}
+        )
+        response = self.follow_page()
+        self.assertContains(response, 'Исправленная карточка')
+        self.user.first_name = 'Петр'
+        self.user.save()
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Петр Карточкин')
+        self.assertNotContains(response, 'Иван Карточкин')
+
+    def rerendered(self, posts, request):
+        """Сколько карточек пришлось отрендерить заново."""
+        with mock.patch.object(
+            cache, 'set_many', wraps=cache.set_many
+        ) as set_many:
+            render_cards(posts, request)
+        if not set_many.called:
+            return 0
+        return len(set_many.call_args[0][0])
+
+    def test_only_renames_drop_author_cards(self):
+        """Вход и смена пароля не трогают карточки, смена имени
+        сбрасывает только карточки этого автора."""
+        other = User.objects.create_user(username='other')
+        Post.objects.create(author=other, text='Чужая карточка')
+        request = RequestFactory().get('/')
+        request.resolver_match = resolve(reverse('posts:index'))
+        posts = list(Post.objects.select_related('author'))
+        self.assertEqual(self.rerendered(posts, request), len(posts))
+        user = User.objects.get(pk=self.user.pk)
+        user.save(update_fields=['last_login'])
+        user.set_password('новый пароль')
+        user.save()
+        self.assertEqual(self.rerendered(posts, request), 0)
+        user.last_name = 'Открыткин'
+        user.save()
+        self.assertEqual(self.rerendered(posts, request), POSTS_PER_PAGE)
@@ -0,0 +1,66 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.constants import COMMENTS_PER_PAGE
+from ..models import Comment, Post, User
+
+
+class CommentPaginationTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='popular')
+        cls.post = Post.objects.create(author=cls.author, text='Популярный')
+        commenters = [
+            User.objects.create_user(username=f'commenter{i}')
+            for i in range(3)
+        ]
+        Comment.objects.bulk_create(
+            Comment(
+                post=cls.post,
+                author=commenters[i % 3],
+                text=f'Комментарий {i}'
+            )
+            for i in range(COMMENTS_PER_PAGE + 5)
+        )
+        cls.ordered = list(
+            Comment.objects.filter(post=cls.post).order_by('created', 'id')
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_detail_shows_first_chunk_and_more_link(self):
+        """На странице поста первая порция и ссылка на следующую."""
+        response = self.client.get(
+            reverse('posts:post_detail', args=[self.post.pk])
+        )
+        comments = response.context['comments']
+        self.assertEqual(list(comments), self.ordered[:COMMENTS_PER_PAGE])
+        self.assertContains(response, 'Загрузить еще')
+
+    def test_load_more_returns_only_next_chunk(self):
+        """Эндпоинт отдает только следующую порцию без всей страницы."""
+        response = self.client.get(
+            reverse('posts:post_detail', args=[self.post.pk])
+        )
+        cursor = response.context['comments'].paginator.next_cursor
+        chunk = self.client.get(
+            reverse('posts:post_comments', args=[self.post.pk])
+            + f'?cursor={cursor}'
+        )
+        self.assertEqual(
+            list(chunk.context['comments']), self.ordered[COMMENTS_PER_PAGE:]
+        )
+        self.assertTemplateNotUsed(chunk, 'base.html')
+        self.assertNotContains(chunk, 'Загрузить еще')
+
+    def test_comment_authors_loaded_in_bulk(self):
+        """Авторы комментариев не стоят по запросу на комментарий."""
+        url = reverse('posts:post_comments', args=[self.post.pk])
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(url)
+        self.assertLessEqual(len(context.captured_queries), 2)
@@ -0,0 +1,125 @@
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Group, Post, User
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='conditional', description='-'
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Пост'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def pages(self):
+        return (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.author.username]),
+            reverse('posts:post_detail', args=[self.post.pk]),
+        )
+
+    def test_unchanged_page_is_not_modified(self):
+        """Повторный запрос: 304, один запрос к базе, без шаблонов."""
+        for url in self.pages():
+            etag = self.client.get(url)['ETag']
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            with self.subTest(url=url):
+                self.assertEqual(response.status_code,
+                                 HTTPStatus.NOT_MODIFIED)
+                self.assertEqual(len(queries.captured_queries), 1)
+                self.assertFalse(response.templates)
+
+    def assertChanges(self, change, urls):
+        etags = {url: self.client.get(url)['ETag'] for url in urls}
+        change()
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(
+                    url, HTTP_IF_NONE_MATCH=etags[url]
+                )
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_writes_change_validators(self):
+        index, group, profile, detail = self.pages()
+        self.assertChanges(
+            lambda: Post.objects.create(
+                author=self.author, group=self.group, text='Новый'
+            ),
+            (index, group, profile, detail),
+        )
+        self.assertChanges(
+            lambda: Post.objects.filter(pk=self.post.pk).first().save(),
+            (index, group, profile, detail),
+        )
+        self.assertChanges(
+            lambda: Comment.objects.create(
+                post=self.post, author=self.author, text='-'
+            ),
+            (detail,),
+        )
+
+        def rename_group():
+            self.group.title = 'Другая группа'
+            self.group.save()
+        self.assertChanges(rename_group, (index, group, detail))
+
+        def rename_author():
+            self.author.first_name = 'Имя'
+            self.author.save()
+        self.assertChanges(rename_author, (index, group, profile, detail))
+
+    def test_validator_depends_on_user(self):
+        """Шапка и кнопки зависят от пользователя, как и ETag."""
+        reader = Client()
+        reader.force_login(User.objects.create_user(username='reader'))
+        for url in self.pages():
+            etag = self.client.get(url)['ETag']
+            response = reader.get(url, HTTP_IF_NONE_MATCH=etag)
+            with self.subTest(url=url):
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertNotEqual(response['ETag'], etag)
+
+    def test_follow_changes_profile(self):
+        reader = Client()
+        reader.force_login(User.objects.create_user(username='reader'))
+        url = reverse('posts:profile', args=[self.author.username])
+        etag = reader.get(url)['ETag']
+        reader.get(
+            reverse('posts:profile_follow', args=[self.author.username])
+        )
+        response = reader.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_missing_pages_have_no_validator(self):
+        """404 без ETag: повторный запрос не получит 304."""
+        empty = Group.objects.create(title='Пусто', slug='empty')
+        self.assertIn(
+            'ETag',
+            self.client.get(reverse('posts:group_list', args=['empty'])),
+        )
+        empty.delete()
+        for url in (
+            reverse('posts:group_list', args=['empty']),
+            reverse('posts:profile', args=['nobody']),
+            reverse('posts:post_detail', args=[self.post.pk + 100]),
+        ):
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH='*')
+                self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+                self.assertNotIn('ETag', response)
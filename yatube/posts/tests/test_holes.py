@@ -0,0 +1,147 @@
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Follow, Group, Post, User
+from .test_page_cache import PAGES
+
+
+@override_settings(PAGE_CACHE_URL_NAMES=PAGES)
+class HoleTest(TestCase):
+    """Общее тело страницы, дыры — свои у каждого пользователя."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='holes', description='-'
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Пост'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest = Client()
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def get(self, client, name, *args):
+        response = client.get(reverse(name, args=args))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        return response
+
+    def test_users_share_cached_body(self):
+        self.get(self.guest, 'posts:index')
+        response = self.get(self.author_client, 'posts:index')
+        self.assertTrue(hasattr(response.wsgi_request, 'page_cache_hit'))
+        content = response.content.decode()
+        self.assertIn('Пользователь: author', content)
+        self.assertIn('Избранные авторы', content)
+        self.assertNotIn('<!--hole:', content)
+        guest = self.get(self.guest, 'posts:index').content.decode()
+        self.assertNotIn('Пользователь:', guest)
+        self.assertIn('Войти', guest)
+
+    def test_filled_page_matches_direct_rendering(self):
+        for name, args in (('posts:index', ()),
+                           ('posts:profile', (self.author.username,))):
+            self.get(self.guest, name, *args)
+            cached = self.get(self.reader_client, name, *args)
+            with override_settings(PAGE_CACHE_URL_NAMES=()):
+                reader = Client()
+                reader.force_login(self.reader)
+                direct = self.get(reader, name, *args)
+            with self.subTest(name=name):
+                self.assertTrue(
+                    hasattr(cached.wsgi_request, 'page_cache_hit')
+                )
+                self.assertEqual(cached.content, direct.content)
+
+    def test_follow_button_is_per_user(self):
+        args = (self.author.username,)
+        self.get(self.guest, 'posts:profile', *args)
+        own = self.get(self.author_client, 'posts:profile', *args)
+        self.assertNotContains(own, 'Подписаться')
+        self.assertContains(
+            self.get(self.reader_client, 'posts:profile', *args),
+            'Подписаться',
+        )
+        Follow.objects.create(user=self.reader, author=self.author)
+        response = self.get(self.reader_client, 'posts:profile', *args)
+        self.assertTrue(hasattr(response.wsgi_request, 'page_cache_hit'))
+        self.assertContains(response, 'Отписаться')
+
+    def test_post_detail_holes(self):
+        edit_url = reverse('posts:post_edit', args=[self.post.pk])
+        self.get(self.guest, 'posts:post_detail', self.post.pk)
+        author = self.get(self.author_client, 'posts:post_detail',
+                          self.post.pk)
+        self.assertTrue(hasattr(author.wsgi_request, 'page_cache_hit'))
+        self.assertContains(author, edit_url)
+        self.assertContains(author, 'Добавить комментарий')
+        reader = self.get(self.reader_client, 'posts:post_detail',
+                          self.post.pk)
+        self.assertNotContains(reader, edit_url)
+        self.assertContains(reader, 'Добавить комментарий')
+        guest = self.get(self.guest, 'posts:post_detail', self.post.pk)
+        self.assertNotContains(guest, 'Добавить комментарий')
+
+    def test_comment_form_from_cache_passes_csrf(self):
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.reader)
+        self.get(self.guest, 'posts:post_detail', self.post.pk)
+        cookie = self.get(client, 'users:login').cookies['csrftoken'].value
+        response = self.get(client, 'posts:post_detail', self.post.pk)
+        self.assertTrue(hasattr(response.wsgi_request, 'page_cache_hit'))
+        # Попадание берет токен из cookie, а не выдает новый.
+        self.assertEqual(client.cookies['csrftoken'].value, cookie)
+        content = response.content.decode()
+        marker = 'name="csrfmiddlewaretoken" value="'
+        token = content.split(marker, 1)[1].split('"', 1)[0]
+        response = client.post(
+            reverse('posts:add_comment', args=[self.post.pk]),
+            {'text': 'Комментарий', 'csrfmiddlewaretoken': token},
+        )
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        self.assertTrue(self.post.comments.filter(text='Комментарий'))
+
+    def test_etag_differs_between_users(self):
+        self.get(self.guest, 'posts:index')
+        guest_etag = self.get(self.guest, 'posts:index')['ETag']
+        response = self.reader_client.get(
+            reverse('posts:index'), HTTP_IF_NONE_MATCH=guest_etag
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertNotEqual(response['ETag'], guest_etag)
+
+    def test_logged_in_post_detail_answers_conditional_get(self):
+        """Новый токен CSRF в форме комментария не меняет ETag."""
+        url = reverse('posts:post_detail', args=[self.post.pk])
+        etag = self.reader_client.get(url)['ETag']
+        for name in ('hit', 'miss'):
+            if name == 'miss':
+                cache.clear()
+            with self.subTest(name=name):
+                response = self.reader_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(
+                    response.status_code, HTTPStatus.NOT_MODIFIED
+                )
+
+    def test_etag_follows_hole_state(self):
+        """Подписка меняет ETag профиля, даже если тело из кэша."""
+        url = reverse('posts:profile', args=[self.author.username])
+        self.guest.get(url)
+        etag = self.reader_client.get(url)['ETag']
+        Follow.objects.create(user=self.reader, author=self.author)
+        response = self.reader_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertTrue(hasattr(response.wsgi_request, 'page_cache_hit'))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
@@ -0,0 +1,99 @@
+from unittest import skipUnless
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.constants import POSTS_PER_PAGE
+from ..models import Comment, Follow, Group, Post, PulledAuthor, User
+
+FEED_TABLES = ('posts_post', 'posts_comment', 'posts_timelineentry')
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN — SQLite.')
+class FeedIndexTest(TestCase):
+    """Запросы лент читают диапазон индекса и ничего не сортируют."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.star = User.objects.create_user(username='star')
+        PulledAuthor.objects.create(author=cls.star, followers=1)
+        cls.group = Group.objects.create(
+            title='Группа', slug='indexes', description='-'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        Follow.objects.create(user=cls.reader, author=cls.star)
+        for author in (cls.author, cls.star):
+            for i in range(POSTS_PER_PAGE + 1):
+                Post.objects.create(
+                    author=author, group=cls.group, text=f'Пост {i}'
+                )
+        cls.post = Post.objects.filter(author=cls.author).first()
+        Comment.objects.create(post=cls.post, author=cls.reader, text='-')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def feed_queries(self, url):
+        """SQL запросов к таблицам лент, выполненных при открытии url."""
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        queries = [
+            query['sql'] for query in context.captured_queries
+            if 'ORDER BY' in query['sql']
+            and any(f'FROM "{table}"' in query['sql']
+                    for table in FEED_TABLES)
+        ]
+        return response, queries
+
+    def plan(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return [row[-1] for row in cursor.fetchall()]
+
+    def assertUsesIndexes(self, sql):
+        plan = self.plan(sql)
+        for step in plan:
+            self.assertNotIn('TEMP B-TREE', step, plan)
+            if step.startswith('SCAN'):
+                self.assertIn('USING', step, plan)
+
+    def test_feeds(self):
+        pages = (
+            (reverse('posts:index'), 'page_obj'),
+            (reverse('posts:group_list', args=[self.group.slug]), 'page_obj'),
+            (reverse('posts:profile', args=[self.author.username]),
+             'page_obj'),
+            (reverse('posts:follow_index'), 'page_obj'),
+            (reverse('posts:post_detail', args=[self.post.pk]), 'comments'),
+        )
+        for url, page in pages:
+            response, queries = self.feed_queries(url)
+            paginator = response.context[page].paginator
+            if getattr(paginator, 'next_cursor', None):
+                _, more = self.feed_queries(
+                    f'{url}?cursor={paginator.next_cursor}'
+                )
+                queries += more
+            self.assertTrue(queries, url)
+            for sql in queries:
+                with self.subTest(url=url, sql=sql):
+                    self.assertUsesIndexes(sql)
+
+    def test_follow_lookups(self):
+        """Подписка ищется по индексу в обе стороны."""
+        for queryset in (
+            Follow.objects.filter(author=self.star).values('user'),
+            Follow.objects.filter(user=self.reader, author=self.star),
+        ):
+            plan = self.plan(str(queryset.query))
+            self.assertTrue(
+                any('COVERING INDEX' in step for step in plan), plan
+            )
@@ -0,0 +1,158 @@
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.instrumentation import histogram
+from ..models import Comment, Group, Post, User
+
+PAGES = ('posts:index', 'posts:group_list', 'posts:profile',
+         'posts:post_detail')
+
+
+@override_settings(PAGE_CACHE_URL_NAMES=PAGES)
+class PageCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='page-cache', description='-'
+        )
+        cls.other_group = Group.objects.create(
+            title='Другая', slug='page-cache-other', description='-'
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Пост'
+        )
+
+    def setUp(self):
+        cache.clear()
+        histogram.reset()
+        self.client = Client()
+
+    def urls(self):
+        return {
+            'index': reverse('posts:index'),
+            'group': reverse('posts:group_list', args=[self.group.slug]),
+            'other': reverse('posts:group_list',
+                             args=[self.other_group.slug]),
+            'profile': reverse('posts:profile', args=[self.author.username]),
+            'detail': reverse('posts:post_detail', args=[self.post.pk]),
+        }
+
+    def is_hit(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        return (
+            hasattr(response.wsgi_request, 'page_cache_hit')
+            and not queries.captured_queries
+        )
+
+    def test_second_request_is_served_from_cache(self):
+        for url in self.urls().values():
+            with self.subTest(url=url):
+                first = self.client.get(url)
+                self.assertIn('Surrogate-Key', first)
+                self.assertTrue(self.is_hit(url))
+                self.assertEqual(self.client.get(url).content, first.content)
+        self.assertIn('posts:index (page cache)', histogram.snapshot())
+
+    def test_cached_page_answers_conditional_get(self):
+        url = self.urls()['index']
+        etag = self.client.get(url)['ETag']
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        self.assertFalse(queries.captured_queries)
+
+    def test_miss_answers_conditional_get(self):
+        """ETag промаха совпадает с ETag попадания для той же страницы."""
+        for url in self.urls().values():
+            with self.subTest(url=url):
+                etag = self.client.get(url)['ETag']
+                hit = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(hit.status_code, HTTPStatus.NOT_MODIFIED)
+                cache.clear()
+                miss = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertFalse(hasattr(miss.wsgi_request, 'page_cache_hit'))
+                self.assertEqual(miss.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def assertPurges(self, change, stale, fresh=()):
+        urls = self.urls()
+        for name in (*stale, *fresh):
+            self.client.get(urls[name])
+        change()
+        for name in stale:
+            with self.subTest(change=change.__name__, stale=name):
+                self.assertFalse(self.is_hit(urls[name]))
+        for name in fresh:
+            with self.subTest(change=change.__name__, fresh=name):
+                self.assertTrue(self.is_hit(urls[name]))
+
+    def test_writes_purge_tagged_pages(self):
+        def create_post():
+            Post.objects.create(author=self.author, text='Новый')
+        self.assertPurges(
+            create_post, ('index', 'profile', 'detail'), ('group', 'other')
+        )
+
+        def edit_post():
+            self.post.text = 'Правка'
+            self.post.save()
+        self.assertPurges(
+            edit_post, ('index', 'group', 'profile', 'detail'), ('other',)
+        )
+
+        def move_post():
+            self.post.group = self.other_group
+            self.post.save()
+        self.assertPurges(move_post, ('group', 'other'))
+
+        def comment():
+            Comment.objects.create(
+                post=self.post, author=self.author, text='-'
+            )
+        self.assertPurges(comment, ('detail',), ('index', 'profile'))
+
+        def rename_group():
+            self.other_group.title = 'Новое имя'
+            self.other_group.save()
+        self.assertPurges(rename_group, ('index', 'other'), ('group',))
+
+        def rename_author():
+            self.author.first_name = 'Имя'
+            self.author.save()
+        self.assertPurges(
+            rename_author, ('index', 'profile', 'detail'), ('group',)
+        )
+
+        def log_in():
+            self.author.save(update_fields=['last_login'])
+        self.assertPurges(log_in, (), ('index', 'profile'))
+
+    def test_delete_purges_feeds(self):
+        post = Post.objects.create(
+            author=self.author, group=self.group, text='Удалить'
+        )
+        self.assertPurges(post.delete, ('index', 'group', 'profile'))
+
+    def test_messages_cookie_bypasses_cache(self):
+        url = self.urls()['index']
+        self.client.get(url)
+        self.client.cookies['messages'] = '-'
+        self.assertFalse(self.is_hit(url))
+
+    def test_pages_with_csrf_token_are_not_stored(self):
+        url = reverse('users:login')
+        with override_settings(
+            PAGE_CACHE_URL_NAMES=(*PAGES, 'users:login')
+        ):
+            client = Client()
+            self.assertIn('csrftoken', client.get(url).cookies)
+            response = client.get(url)
+            self.assertFalse(hasattr(response.wsgi_request, 'page_cache_hit'))
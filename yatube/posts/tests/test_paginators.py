@@ -0,0 +1,69 @@
+from django.core.paginator import InvalidPage, Page
+from django.test import TestCase
+from django.urls import reverse
+
+from core.constants import POSTS_PER_PAGE
+from ..models import Post, User
+from ..paginators import CursorPaginator, decode_cursor, encode_cursor
+
+
+class CursorPaginatorTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='cursor_author')
+        Post.objects.bulk_create(
+            Post(author=cls.user, text=f'Пост {i}') for i in range(25)
+        )
+        cls.ordered = list(Post.objects.order_by('-pub_date', '-id'))
+
+    def test_walks_all_pages_forward_and_back(self):
+        """Курсоры ведут по всем постам без пропусков и повторов."""
+        paginator = CursorPaginator(Post.objects.all(), POSTS_PER_PAGE)
+        page = paginator.page()
+        seen = list(page)
+        while paginator.next_cursor:
+            page = paginator.page(paginator.next_cursor)
+            seen.extend(page)
+        self.assertEqual(seen, self.ordered)
+        self.assertFalse(page.has_next())
+        self.assertTrue(page.has_previous())
+        back = paginator.page(paginator.previous_cursor)
+        self.assertEqual(list(back), self.ordered[10:20])
+        self.assertIsInstance(back, Page)
+
+    def test_first_page_has_no_previous(self):
+        """На первой странице нет ссылки назад."""
+        paginator = CursorPaginator(Post.objects.all(), POSTS_PER_PAGE)
+        page = paginator.page()
+        self.assertFalse(page.has_previous())
+        self.assertTrue(page.has_next())
+        self.assertIsNone(paginator.previous_cursor)
+
+    def test_page_costs_one_query(self):
+        """Страница стоит один запрос, без COUNT(*)."""
+        paginator = CursorPaginator(Post.objects.all(), POSTS_PER_PAGE)
+        cursor = paginator.page().paginator.next_cursor
+        with self.assertNumQueries(1):
+            page = paginator.page(cursor)
+            page.has_next()
+            page.has_previous()
+
+    def test_cursor_round_trip_and_garbage(self):
+        """Курсор распаковывается обратно, мусор отвергается."""
+        post = self.ordered[0]
+        token = encode_cursor('n', post.pub_date, post.pk)
+        self.assertEqual(
+            decode_cursor(token), ('n', post.pub_date, post.pk)
+        )
+        for bad in ('', 'мусор', '!!!', encode_cursor('x', post.pub_date, 1)):
+            with self.subTest(bad=bad):
+                with self.assertRaises(InvalidPage):
+                    decode_cursor(bad)
+
+    def test_bad_cursor_in_url_shows_first_page(self):
+        """Битый ?cursor= в адресе дает первую страницу, а не ошибку."""
+        response = self.client.get(reverse('posts:index') + '?cursor=xyz')
+        self.assertEqual(
+            list(response.context['page_obj']), self.ordered[:10]
+        )
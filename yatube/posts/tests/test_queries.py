@@ -0,0 +1,64 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.constants import POSTS_PER_PAGE
+from ..models import Follow, Group, Post, User
+
+
+class FeedQueryCountTest(TestCase):
+    """Стоимость страницы ленты не растет с числом постов на ней."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='queries', description='-'
+        )
+        cls.authors = [
+            User.objects.create_user(
+                username=f'author{i}', first_name='Имя', last_name=f'{i}'
+            )
+            for i in range(POSTS_PER_PAGE)
+        ]
+        for author in cls.authors:
+            Follow.objects.create(user=cls.reader, author=author)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def pages(self):
+        return (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.authors[0].username]),
+            reverse('posts:follow_index'),
+        )
+
+    def queries(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(url)
+        return len(context.captured_queries)
+
+    def add_posts(self, count):
+        for author in self.authors[:count]:
+            Post.objects.create(author=author, group=self.group, text='-')
+            if author != self.authors[0]:
+                Post.objects.create(
+                    author=self.authors[0], group=self.group, text='-'
+                )
+
+    def test_feeds_cost_constant_queries(self):
+        """Один пост и полная страница стоят одинаково запросов."""
+        self.add_posts(1)
+        single = {url: self.queries(url) for url in self.pages()}
+        self.add_posts(POSTS_PER_PAGE)
+        for url in self.pages():
+            with self.subTest(url=url):
+                self.assertEqual(self.queries(url), single[url])
+                self.assertLessEqual(single[url], 8)
@@ -0,0 +1,147 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.admin.sites import site
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from django.urls import reverse
+
+from core.constants import POSTS_PER_PAGE
+from ..models import Comment, Group, Post, User
+from ..search import PythonIndex, get_index, tokenize
+
+
+class TokenizeTest(SimpleTestCase):
+    def test_case_yo_and_inflections(self):
+        """Регистр, «ё» и окончания не мешают совпадению."""
+        self.assertEqual(
+            tokenize('ЁЖИКИ любят котов'), ['ежик', 'люб', 'кот']
+        )
+        self.assertEqual(tokenize('Ежик любила кота'), tokenize(
+            'ёжиками любят котами'
+        ))
+        self.assertEqual(tokenize('Django 2.2'), ['django', '2', '2'])
+
+
+class SearchTest(TestCase):
+    """Поиск на индексе FTS5 (тестовая база — SQLite)."""
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='writer')
+        self.best = Post.objects.create(
+            author=self.author, text='Кот, кот и еще раз кот'
+        )
+        self.other = Post.objects.create(
+            author=self.author, text='Кот и пес'
+        )
+        self.dog = Post.objects.create(author=self.author, text='Только пес')
+
+    def search(self, query, cursor=None):
+        params = {'q': query}
+        if cursor:
+            params['cursor'] = cursor
+        return self.client.get(reverse('posts:search'), params)
+
+    def test_backend(self):
+        self.assertNotIsInstance(get_index(Post), PythonIndex)
+
+    def test_results_are_ranked(self):
+        """Находятся посты со всеми словами, самый подходящий первым."""
+        response = self.search('кот')
+        self.assertEqual(
+            list(response.context['page_obj']), [self.best, self.other]
+        )
+        response = self.search('ПЕС кот')
+        self.assertEqual(list(response.context['page_obj']), [self.other])
+
+    def test_inflected_forms_match(self):
+        response = self.search('Котами')
+        self.assertEqual(
+            list(response.context['page_obj']), [self.best, self.other]
+        )
+
+    def test_empty_query_and_no_results(self):
+        self.assertIsNone(self.search('').context['page_obj'])
+        self.assertContains(self.search('жираф'), 'ничего не найдено')
+
+    def test_results_are_paginated_by_cursor(self):
+        """Следующая страница выдачи продолжает, а не повторяет первую."""
+        for i in range(POSTS_PER_PAGE):
+            Post.objects.create(author=self.author, text=f'кот номер {i}')
+        first = self.search('кот')
+        paginator = first.context['page_obj'].paginator
+        self.assertEqual(len(first.context['page_obj']), POSTS_PER_PAGE)
+        self.assertContains(first, '?q=%D0%BA%D0%BE%D1%82&amp;cursor=')
+        second = self.search('кот', paginator.next_cursor)
+        seen = list(first.context['page_obj']) + list(
+            second.context['page_obj']
+        )
+        self.assertEqual(len(seen), POSTS_PER_PAGE + 2)
+        self.assertEqual(len(set(seen)), len(seen))
+        back = self.search(
+            'кот', second.context['page_obj'].paginator.previous_cursor
+        )
+        self.assertEqual(
+            list(back.context['page_obj']), list(first.context['page_obj'])
+        )
+
+    def test_index_follows_edit_and_delete(self):
+        self.dog.text = 'Теперь тут кот'
+        self.dog.save()
+        self.assertIn(self.dog, self.search('кот').context['page_obj'])
+        self.assertNotIn(self.dog, self.search('пес').context['page_obj'])
+        self.best.delete()
+        self.assertEqual(
+            list(self.search('кот').context['page_obj']),
+            [self.other, self.dog]
+        )
+
+    def test_admin_search_uses_index(self):
+        """Поиск в админке постов и комментариев идет через индекс."""
+        Comment.objects.create(post=self.dog, author=self.author, text='Гав')
+        request = RequestFactory().get('/')
+        group = Group.objects.create(
+            title='Любители кошек', slug='cats', description='Про котов'
+        )
+        for model, query, expected in (
+            (Post, 'пес', {self.other.pk, self.dog.pk}),
+            (Comment, 'гав', {self.dog.comments.get().pk}),
+            (Group, 'коты', {group.pk}),
+        ):
+            admin = site._registry[model]
+            with mock.patch('posts.search.get_index',
+                            wraps=get_index) as index:
+                queryset, distinct = admin.get_search_results(
+                    request, model.objects.all(), query
+                )
+            index.assert_called_once_with(model)
+            self.assertEqual({obj.pk for obj in queryset}, expected)
+            self.assertFalse(distinct)
+
+    def test_reindex_command(self):
+        """Команда пересобирает индекс порциями с нуля."""
+        get_index(Post).clear()
+        self.assertEqual(len(self.search('кот').context['page_obj']), 0)
+        out = StringIO()
+        call_command('reindex_search', '--kind', 'post', '--chunk-size', '2',
+                     stdout=out)
+        self.assertIn('проиндексировано 3', out.getvalue())
+        self.assertEqual(
+            list(self.search('кот').context['page_obj']),
+            [self.best, self.other]
+        )
+
+
+class PythonSearchTest(SearchTest):
+    """Те же сценарии на запасном индексе без FTS5."""
+
+    def setUp(self):
+        patcher = mock.patch('posts.search._has_fts5', return_value=False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        super().setUp()
+
+    def test_backend(self):
+        self.assertIsInstance(get_index(Post), PythonIndex)
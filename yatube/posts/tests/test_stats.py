@@ -0,0 +1,106 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import AuthorStats, Comment, Follow, Post, User
+
+
+class AuthorStatsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='counted')
+        cls.reader = User.objects.create_user(username='counter')
+
+    def stats(self):
+        return AuthorStats.objects.get(author=self.author)
+
+    def test_counters_follow_creates_and_deletes(self):
+        """Счетчики растут при создании и падают при удалении."""
+        post = Post.objects.create(author=self.author, text='Пост')
+        Comment.objects.create(author=self.author, post=post, text='Комм')
+        Follow.objects.create(user=self.reader, author=self.author)
+        stats = self.stats()
+        self.assertEqual(
+            (stats.posts_count, stats.comments_count, stats.followers_count),
+            (1, 1, 1)
+        )
+        Follow.objects.filter(author=self.author).delete()
+        Post.objects.filter(pk=post.pk).delete()
+        stats = self.stats()
+        self.assertEqual(
+            (stats.posts_count, stats.comments_count, stats.followers_count),
+            (0, 0, 0),
+            'Каскадное удаление комментариев тоже должно учитываться'
+        )
+
+    def test_user_delete_cascades_cleanly(self):
+        """Удаление пользователя не оставляет статистику-сироту."""
+        user = User.objects.create_user(username='gone')
+        post = Post.objects.create(author=user, text='Пост')
+        Comment.objects.create(author=self.author, post=post, text='Комм')
+        user.delete()
+        self.assertFalse(AuthorStats.objects.filter(author_id=user.pk))
+        self.assertEqual(self.stats().comments_count, 0)
+
+    def test_recount_stats_repairs_drift(self):
+        """recount_stats возвращает счетчики к реальным значениям."""
+        Post.objects.create(author=self.author, text='Пост')
+        AuthorStats.objects.filter(author=self.author).update(
+            posts_count=42, followers_count=7
+        )
+        AuthorStats.objects.filter(author=self.reader).delete()
+        out = StringIO()
+        call_command('recount_stats', stdout=out)
+        self.assertEqual(self.stats().posts_count, 1)
+        self.assertEqual(self.stats().followers_count, 0)
+        self.assertTrue(AuthorStats.objects.filter(author=self.reader))
+        self.assertIn('Исправлено записей статистики: 2', out.getvalue())
+
+    def test_profile_reads_stored_counter(self):
+        """Профиль показывает сохраненный счетчик без COUNT по постам."""
+        Post.objects.create(author=self.author, text='Пост')
+        AuthorStats.objects.filter(author=self.author).update(posts_count=99)
+        response = self.client.get(
+            reverse('posts:profile', args=[self.author.username])
+        )
+        self.assertContains(response, 'Всего постов: 99')
+
+
+class PostCommentsCountTest(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='commented')
+        self.post = Post.objects.create(author=self.author, text='Пост')
+
+    def count(self):
+        self.post.refresh_from_db(fields=['comments_count'])
+        return self.post.comments_count
+
+    def test_counter_follows_creates_and_deletes(self):
+        comments = [
+            Comment.objects.create(
+                author=self.author, post=self.post, text=str(i)
+            )
+            for i in range(3)
+        ]
+        self.assertEqual(self.count(), 3)
+        comments[0].delete()
+        self.assertEqual(self.count(), 2)
+
+    def test_recount_stats_repairs_post_counter(self):
+        Comment.objects.create(author=self.author, post=self.post, text='-')
+        Post.objects.filter(pk=self.post.pk).update(comments_count=42)
+        out = StringIO()
+        call_command('recount_stats', stdout=out)
+        self.assertEqual(self.count(), 1)
+        self.assertIn('Исправлено записей статистики: 1', out.getvalue())
+
+    def test_post_detail_reads_stored_counter(self):
+        """Страница поста и ее ETag не считают комментарии COUNT-ом."""
+        url = reverse('posts:post_detail', args=[self.post.pk])
+        etag = self.client.get(url)['ETag']
+        Post.objects.filter(pk=self.post.pk).update(comments_count=7)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'Комментариев: 7')
@@ -0,0 +1,155 @@
+import shutil
+import tempfile
+import threading
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import (
+    Client, SimpleTestCase, TransactionTestCase, override_settings
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from sorl.thumbnail import default, get_thumbnail
+
+from core.constants import POSTS_PER_PAGE
+from core.tasks import Worker, worker
+from .. import feed_cache
+from ..models import Post, User
+from ..thumbnails import pregenerate, prefetch_thumbnails
+from .user_creation import UserCreateTest
+
+
+class QueuedThumbnailTest(UserCreateTest):
+
+    @override_settings(TASKS_ALWAYS_EAGER=False)
+    def test_request_never_resizes(self):
+        """Страница не масштабирует картинку, а ставит ее в очередь."""
+        with mock.patch('posts.thumbnails.worker.submit') as submit:
+            with mock.patch.object(default.engine, 'create') as create:
+                response = self.guest_client.get(
+                    reverse('posts:post_detail', args=[self.post.pk])
+                )
+        create.assert_not_called()
+        self.assertTrue(submit.called)
+        self.assertIn('960x339', submit.call_args[0][0])
+        self.assertContains(response, self.post.image.url)
+
+    def test_pregenerated_thumbnail_is_served(self):
+        """После фоновой генерации тег отдает готовую миниатюру."""
+        pregenerate(self.post.image.name)
+        with mock.patch.object(default.engine, 'create') as create:
+            thumbnail = get_thumbnail(
+                self.post.image, '960x339', crop='center', upscale=True
+            )
+        create.assert_not_called()
+        self.assertNotEqual(thumbnail.name, self.post.image.name)
+        self.assertTrue(thumbnail.exists())
+        response = self.guest_client.get(
+            reverse('posts:post_detail', args=[self.post.pk])
+        )
+        self.assertContains(response, thumbnail.url)
+
+    def test_page_thumbnails_resolved_in_one_query(self):
+        """Миниатюры страницы ленты ищутся одним запросом, а не десятью."""
+        posts = [
+            Post.objects.create(
+                author=self.user, text='-', image=f'posts/page{i}.gif'
+            )
+            for i in range(POSTS_PER_PAGE)
+        ]
+
+        def lookup():
+            for post in posts:
+                get_thumbnail(
+                    post.image, '960x339', crop='center', upscale=True
+                )
+
+        with mock.patch('posts.thumbnails.worker.submit'):
+            cache.clear()
+            with CaptureQueriesContext(connection) as single:
+                lookup()
+            cache.clear()
+            with CaptureQueriesContext(connection) as batched:
+                prefetch_thumbnails(posts)
+                lookup()
+        self.assertEqual(len(single.captured_queries), POSTS_PER_PAGE)
+        self.assertEqual(len(batched.captured_queries), 1)
+
+
+@override_settings(TASKS_ALWAYS_EAGER=False)
+class BackgroundThumbnailTest(TransactionTestCase):
+    """Настоящий фоновый поток: миниатюра доходит до закэшированных лент."""
+
+    def setUp(self):
+        cache.clear()
+        media = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        media_settings = override_settings(MEDIA_ROOT=media)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+        author = User.objects.create_user(username='painter')
+        image = SimpleUploadedFile(
+            'background.gif',
+            b'GIF89a\x01\x00\x01\x00\x80\x00\x00\x00\x00\x00'
+            b'\xff\xff\xff!\xf9\x04\x00\x00\x00\x00\x00,\x00\x00'
+            b'\x00\x00\x01\x00\x01\x00\x00\x02\x02D\x01\x00;',
+            content_type='image/gif',
+        )
+        # Очередь заполнит первый просмотр, а не сохранение поста.
+        with mock.patch('posts.thumbnails.pregenerate'):
+            self.post = Post.objects.create(
+                author=author, text='Картинка', image=image
+            )
+
+    def test_cached_feed_switches_to_thumbnail(self):
+        client = Client()
+        url = reverse('posts:index')
+        original = self.post.image.url
+        self.assertContains(client.get(url), original)
+        worker.join()
+        response = client.get(url)
+        self.assertNotContains(response, f'src="{original}"')
+        self.assertContains(response, settings.MEDIA_URL + 'cache/')
+
+    def test_ready_thumbnail_does_not_save_post(self):
+        """Сбрасываются карточка и ETag поста, но не версия ленты."""
+        client = Client()
+        url = reverse('posts:index')
+        etag = client.get(url)['ETag']
+        index_version = feed_cache.versions(feed_cache.scope('index'))
+        updated = self.post.updated
+        worker.join()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.updated, updated)
+        self.assertEqual(
+            feed_cache.versions(feed_cache.scope('index')), index_version
+        )
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, settings.MEDIA_URL + 'cache/')
+
+
+@override_settings(TASKS_ALWAYS_EAGER=False)
+class WorkerTest(SimpleTestCase):
+
+    def test_runs_in_background_and_dedupes(self):
+        """Задачи выполняются в отдельном потоке, дубли отбрасываются."""
+        worker = Worker('test-worker')
+        release = threading.Event()
+        threads = []
+
+        def job():
+            release.wait(5)
+            threads.append(threading.current_thread().name)
+
+        self.assertTrue(worker.submit('job', job))
+        self.assertFalse(worker.submit('job', job))
+        release.set()
+        worker.join()
+        self.assertEqual(threads, ['test-worker'])
+        self.assertTrue(worker.submit('job', job))
+        worker.join()
+        self.assertEqual(len(threads), 2)
@@ -0,0 +1,185 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.constants import POSTS_PER_PAGE
+from ..models import Follow, Post, PulledAuthor, TimelineEntry, User
+from ..timeline import classify_authors
+
+
+class TimelineTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='writer')
+        cls.old_post = Post.objects.create(
+            author=cls.author, text='Старый пост'
+        )
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def feed(self):
+        response = self.client.get(reverse('posts:follow_index'))
+        return list(response.context['page_obj'])
+
+    def test_follow_backfills_and_new_posts_fan_out(self):
+        """Подписка дозаполняет ленту, новые посты попадают в нее сразу."""
+        self.client.get(
+            reverse('posts:profile_follow', args=[self.author.username])
+        )
+        self.assertEqual(self.feed(), [self.old_post])
+        new_post = Post.objects.create(author=self.author, text='Новый')
+        self.assertEqual(self.feed(), [new_post, self.old_post])
+        entry = TimelineEntry.objects.get(user=self.reader, post=new_post)
+        self.assertEqual(entry.pub_date, new_post.pub_date)
+
+    def test_unfollow_prunes_timeline(self):
+        """Отписка убирает посты автора из ленты."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.client.get(
+            reverse('posts:profile_unfollow', args=[self.author.username])
+        )
+        self.assertEqual(self.feed(), [])
+        self.assertFalse(
+            TimelineEntry.objects.filter(user=self.reader).exists()
+        )
+
+    def test_deleted_post_leaves_timeline(self):
+        """Удаленный пост пропадает из ленты каскадом."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        Post.objects.filter(pk=self.old_post.pk).delete()
+        self.assertEqual(self.feed(), [])
+
+    def test_feed_does_not_join_follows(self):
+        """Лента читается из TimelineEntry без join с Follow."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        entries = TimelineEntry.objects.filter(user=self.reader)
+        self.assertNotIn('posts_follow', str(entries.query))
+        self.assertEqual(entries.count(), 1)
+
+
+class HybridTimelineTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.star = User.objects.create_user(username='star')
+        cls.author = User.objects.create_user(username='writer')
+        Follow.objects.create(user=cls.reader, author=cls.star)
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        for i in range(POSTS_PER_PAGE):
+            Post.objects.create(author=cls.star, text=f'Звезда {i}')
+            Post.objects.create(author=cls.author, text=f'Автор {i}')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def feed(self):
+        """Все посты ленты, пройденные по курсорам."""
+        url = reverse('posts:follow_index')
+        response = self.client.get(url)
+        posts = list(response.context['page_obj'])
+        paginator = response.context['page_obj'].paginator
+        while paginator.next_cursor:
+            response = self.client.get(f'{url}?cursor={paginator.next_cursor}')
+            posts.extend(response.context['page_obj'])
+            paginator = response.context['page_obj'].paginator
+        return posts
+
+    def expected(self):
+        return list(Post.objects.exclude(author=self.reader).order_by(
+            '-pub_date', '-id'
+        ))
+
+    def test_pulled_author_is_merged_at_read_time(self):
+        """Посты популярного автора подтягиваются и сливаются по дате."""
+        fan = User.objects.create_user(username='fan')
+        Follow.objects.create(user=fan, author=self.star)
+        call_command('classify_authors', threshold=2, stdout=StringIO())
+        self.assertEqual(
+            list(PulledAuthor.objects.values_list('author', flat=True)),
+            [self.star.pk]
+        )
+        self.assertFalse(
+            TimelineEntry.objects.filter(author=self.star).exists()
+        )
+        new_post = Post.objects.create(author=self.star, text='Свежее')
+        self.assertFalse(
+            TimelineEntry.objects.filter(post=new_post).exists()
+        )
+        self.assertEqual(self.feed(), self.expected())
+
+    def test_demoted_author_is_backfilled(self):
+        """Автор, потерявший подписчиков, снова раскладывается по лентам."""
+        PulledAuthor.objects.create(author=self.star, followers=1)
+        TimelineEntry.objects.filter(author=self.star).delete()
+        call_command('classify_authors', threshold=2, stdout=StringIO())
+        self.assertFalse(PulledAuthor.objects.exists())
+        self.assertEqual(
+            TimelineEntry.objects.filter(
+                user=self.reader, author=self.star
+            ).count(),
+            POSTS_PER_PAGE
+        )
+        self.assertEqual(self.feed(), self.expected())
+
+    def test_thresholds_have_hysteresis(self):
+        """Автор между порогами остается там, где был."""
+        self.assertEqual(classify_authors(2, push_threshold=1), (0, 0))
+        self.assertFalse(PulledAuthor.objects.exists())
+        PulledAuthor.objects.create(author=self.star, followers=2)
+        self.assertEqual(classify_authors(2, push_threshold=1), (0, 0))
+        self.assertTrue(PulledAuthor.objects.filter(author=self.star))
+        self.assertEqual(classify_authors(3, push_threshold=2), (0, 1))
+        self.assertFalse(PulledAuthor.objects.exists())
+
+    def test_demotion_backfills_in_one_query(self):
+        """Число запросов не зависит от подписчиков."""
+        fans = [
+            User.objects.create_user(username=f'fan{i}') for i in range(20)
+        ]
+        Follow.objects.bulk_create(
+            Follow(user=fan, author=self.star) for fan in fans
+        )
+        PulledAuthor.objects.create(author=self.star, followers=21)
+        TimelineEntry.objects.filter(author=self.star).delete()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(classify_authors(100), (0, 1))
+        inserts = [
+            query for query in queries.captured_queries
+            if 'posts_timelineentry' in query['sql']
+        ]
+        self.assertEqual(len(inserts), 1)
+        for user in (self.reader, *fans):
+            self.assertEqual(
+                TimelineEntry.objects.filter(
+                    user=user, author=self.star
+                ).count(),
+                POSTS_PER_PAGE,
+            )
+
+    def test_backfill_copies_whole_history(self):
+        """Подписка и понижение переносят все посты, а не последние."""
+        prolific = User.objects.create_user(username='prolific')
+        Post.objects.bulk_create(
+            Post(author=prolific, text=f'Пост {i}') for i in range(1000)
+        )
+        fan = User.objects.create_user(username='fan')
+        Follow.objects.create(user=fan, author=prolific)
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=fan).count(), 1000
+        )
+        PulledAuthor.objects.create(author=prolific, followers=1)
+        TimelineEntry.objects.filter(author=prolific).delete()
+        classify_authors(2)
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=fan).count(), 1000
+        )
@@ -0,0 +1,98 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+from io import StringIO
+
+from django.core.files.storage import default_storage
+from django.core.management import CommandError, call_command
+
+from ..models import Comment, Follow, Group, Post, TimelineEntry, User
+from ..search import SearchResults
+from ..transfer import keep_dates
+from .user_creation import TEMP_MEDIA_ROOT, UserCreateTest
+
+
+class TransferTest(UserCreateTest):
+
+    def setUp(self):
+        super().setUp()
+        self.reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=self.reader, author=self.user)
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+
+    def test_export_then_import_restores_site(self):
+        """Выгрузка в пустую базу восстанавливает данные и производные."""
+        post = Post.objects.get()
+        call_command(
+            'export_yatube', self.directory, '--chunk-size', '1',
+            stdout=StringIO()
+        )
+        with open(os.path.join(self.directory, 'yatube.jsonl'),
+                  encoding='utf-8') as lines:
+            models = [json.loads(line)['model'] for line in lines]
+        self.assertEqual(models, [
+            'auth.user', 'auth.user', 'posts.group', 'posts.post',
+            'posts.comment', 'posts.follow',
+        ])
+        User.objects.all().delete()
+        Group.objects.all().delete()
+        shutil.rmtree(TEMP_MEDIA_ROOT)
+
+        call_command(
+            'import_yatube', self.directory, '--batch-size', '1',
+            stdout=StringIO()
+        )
+        restored = Post.objects.select_related('author__stats').get()
+        self.assertEqual(
+            (restored.pk, restored.text, restored.pub_date,
+             restored.image.name),
+            (post.pk, post.text, post.pub_date, post.image.name)
+        )
+        self.assertTrue(default_storage.exists(restored.image.name))
+        self.assertEqual(Comment.objects.get().text, self.comment.text)
+        self.assertEqual(restored.author.stats.posts_count, 1)
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.reader, post=restored
+        ).exists())
+        results = SearchResults(Group.objects.all(), 'художественное')
+        self.assertEqual(results.ranked()[0][1], restored.group_id)
+
+    def test_import_conflict_changes_nothing(self):
+        call_command('export_yatube', self.directory, stdout=StringIO())
+        with self.assertRaises(CommandError):
+            call_command('import_yatube', self.directory, stdout=StringIO())
+        self.assertEqual(Post.objects.count(), 1)
+        self.assertEqual(User.objects.count(), 2)
+
+    def test_failed_import_removes_copied_images(self):
+        """Картинки, скопированные до отката транзакции, удаляются."""
+        call_command('export_yatube', self.directory, stdout=StringIO())
+        with open(os.path.join(self.directory, 'yatube.jsonl'), 'a',
+                  encoding='utf-8') as lines:
+            lines.write('{"model": "posts.unknown", "fields": {}}\n')
+        image = Post.objects.get().image.name
+        User.objects.all().delete()
+        Group.objects.all().delete()
+        default_storage.delete(image)
+        with self.assertRaises(CommandError):
+            call_command('import_yatube', self.directory, stdout=StringIO())
+        self.assertFalse(default_storage.exists(image))
+
+    def test_keep_dates_only_in_its_thread(self):
+        """Пока идет загрузка, посты других потоков получают дату."""
+        field = Post._meta.get_field('pub_date')
+        dates = []
+
+        def create():
+            dates.append(field.pre_save(Post(), add=True))
+
+        with keep_dates(Post):
+            self.assertIsNone(field.pre_save(Post(), add=True))
+            thread = threading.Thread(target=create)
+            thread.start()
+            thread.join()
+        self.assertIsNotNone(dates[0])
+        self.assertNotIn('pre_save', vars(field))
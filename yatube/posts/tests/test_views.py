@@ -2,7 +2,6 @@ from django import forms
 from django.core.cache import cache
 from django.core.paginator import Page
 from django.db.models.fields.files import ImageFieldFile
-from django.db.models.query import QuerySet
 from django.test import Client
 from django.urls import reverse
 
@@ -64,8 +63,9 @@ class TestingPaginator(UserCreateTest):
         for page in self.pages:
             with self.subTest(page=page):
                 response1 = self.client.get(page)
-                response2 = self.client.get(page + '?page=2')
                 context = response1.context['page_obj']
+                next_cursor = context.paginator.next_cursor
+                response2 = self.client.get(page + f'?cursor={next_cursor}')
                 self.assertEqual(
                     len(response1.context['page_obj']),
                     POSTS_PER_PAGE,
@@ -141,7 +141,7 @@ class PostsPagesTests(UserCreateTest):
         comments_in_response = response.context['comments']
         form_in_response = response.context['form']
         post_text = comments_in_response[0].text
-        self.assertIsInstance(comments_in_response, QuerySet)
+        self.assertIsInstance(comments_in_response, Page)
         self.assertEqual(post_text, 'Лалала' * 5)
         self.assertIsInstance(form_in_response, CommentForm)
 
@@ -224,23 +224,52 @@ class PostsOnCreationTest(UserCreateTest):
 class CacheTest(UserCreateTest):
 
     def test_cache(self):
-        """Главная страница работает с кэшем корректно."""
-        author = self.user
-        response = self.guest_client.get(
-            reverse('posts:index')
-        )
-        Post.objects.filter(
-            text='Блаблабла' * 100,
-            author=author,
-        ).delete()
-        response1 = self.guest_client.get(
-            reverse('posts:index')
-        )
+        """Главная страница отдается из кэша, пока посты не менялись."""
+        # Первый просмотр готовит миниатюры и сбрасывает ленты с постом.
+        self.guest_client.get(reverse('posts:index'))
+        response = self.guest_client.get(reverse('posts:index'))
+        Post.objects.filter(pk=self.post.pk).update(text='Мимо сигналов')
+        response1 = self.guest_client.get(reverse('posts:index'))
         self.assertEqual(response.content, response1.content)
         cache.clear()
         response_new = self.guest_client.get(reverse('posts:index'))
         self.assertNotEqual(response.content, response_new.content)
 
+    def test_cache_invalidated_on_write(self):
+        """Изменения постов и групп сразу видны на всех лентах."""
+        group_page = reverse(
+            'posts:group_list', kwargs={'slug': self.group.slug}
+        )
+        profile_page = reverse(
+            'posts:profile', kwargs={'username': self.user.username}
+        )
+        for page in (reverse('posts:index'), group_page, profile_page):
+            self.guest_client.get(page)
+        self.group.title = 'Переименованная группа'
+        self.group.save()
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertContains(response, 'Переименованная группа')
+        Post.objects.get(pk=self.post.pk).delete()
+        for page in (reverse('posts:index'), group_page, profile_page):
+            with self.subTest(page=page):
+                response = self.guest_client.get(page)
+                self.assertNotContains(response, 'Блаблабла')
+
+    def test_cache_varies_by_page(self):
+        """Разные страницы ленты не делят один фрагмент."""
+        Post.objects.bulk_create(
+            Post(author=self.user, text=f'Лента {i}')
+            for i in range(POSTS_PER_PAGE)
+        )
+        self.guest_client.get(reverse('posts:index'))
+        response = self.guest_client.get(reverse('posts:index'))
+        cursor = response.context['page_obj'].paginator.next_cursor
+        second = self.guest_client.get(
+            reverse('posts:index') + f'?cursor={cursor}'
+        )
+        self.assertContains(second, 'Блаблабла')
+        self.assertNotContains(response, 'Блаблабла')
+
 
 class FollowSystemTest(UserCreateTest):
 
@@ -0,0 +1,181 @@
+"""Миниатюры картинок постов, подготовленные заранее.
+
+Шаблонный тег {% thumbnail %} через QueuedThumbnailBackend только
+ищет готовую миниатюру в key-value хранилище sorl. Если ее нет,
+генерация ставится в фоновую очередь, а страница получает исходную
+картинку. Сохранение поста с новой картинкой сразу ставит в очередь
+все размеры из THUMBNAIL_PRESETS. Готовая миниатюра сбрасывает
+карточки, фрагменты лент, ETag и страницы постов с этой картинкой,
+где вместо нее осталась исходная картинка. Сами посты не сохраняются.
+
+BatchedKVStore позволяет разрешить миниатюры всей страницы ленты
+одним get_many к кэшу и одним запросом к базе вместо запроса
+на каждую картинку.
+"""
+
+import threading
+
+from django.conf import settings
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile
+from sorl.thumbnail.kvstores import cached_db_kvstore
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+from core import page_cache
+from core.instrumentation import timer
+from core.tasks import worker
+from . import feed_cache, page_keys
+from .models import Post
+
+
+class QueuedThumbnailBackend(ThumbnailBackend):
+    """Бэкенд sorl, который не масштабирует картинки внутри запроса."""
+
+    def full_options(self, source, options):
+        """Опции со значениями по умолчанию, как в ThumbnailBackend."""
+        options = dict(options)
+        if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(thumbnail_settings, attr)
+            if value != getattr(default_settings, attr):
+                options.setdefault(key, value)
+        return options
+
+    def thumbnail_file(self, source, geometry_string, options):
+        name = self._get_thumbnail_filename(
+            source, geometry_string, self.full_options(source, options)
+        )
+        return ImageFile(name, default.storage)
+
+    def get_thumbnail(self, file_, geometry_string, **options):
+        if not file_:
+            raise ValueError('falsey file_ argument in get_thumbnail()')
+        with timer('thumbnail'):
+            source = ImageFile(file_)
+            thumbnail = self.thumbnail_file(source, geometry_string, options)
+            cached = default.kvstore.get(thumbnail)
+            if cached:
+                return cached
+            enqueue(source.name, geometry_string, options)
+            return source
+
+    def generate(self, file_, geometry_string, **options):
+        """Создает миниатюру по-настоящему. Вызывается из очереди."""
+        return super().get_thumbnail(file_, geometry_string, **options)
+
+
+class BatchedKVStore(cached_db_kvstore.KVStore):
+    """cached_db хранилище sorl с пакетной предзагрузкой ключей.
+
+    prefetch() складывает найденные значения в память потока, каждое
+    значение отдается ровно одному следующему чтению этого ключа.
+    Непрочитанное забывается с началом следующего запроса.
+    """
+
+    _local = threading.local()
+
+    @classmethod
+    def forget_prefetched(cls):
+        cls._local.values = {}
+
+    @property
+    def _prefetched(self):
+        if not hasattr(self._local, 'values'):
+            self._local.values = {}
+        return self._local.values
+
+    def prefetch(self, image_files):
+        keys = [add_prefix(image_file.key) for image_file in image_files]
+        if not keys:
+            return
+        found = self.cache.get_many(keys)
+        missing = [key for key in keys if key not in found]
+        if missing:
+            rows = dict(KVStoreModel.objects.filter(
+                key__in=missing
+            ).values_list('key', 'value'))
+            loaded = {
+                key: rows.get(key, cached_db_kvstore.EMPTY_VALUE)
+                for key in missing
+            }
+            self.cache.set_many(
+                loaded, thumbnail_settings.THUMBNAIL_CACHE_TIMEOUT
+            )
+            found.update(loaded)
+        self._prefetched.update(found)
+
+    def _get_raw(self, key):
+        if key in self._prefetched:
+            value = self._prefetched.pop(key)
+            if value == cached_db_kvstore.EMPTY_VALUE:
+                return None
+            return value
+        return super()._get_raw(key)
+
+    def _set_raw(self, key, value):
+        self._prefetched.pop(key, None)
+        super()._set_raw(key, value)
+
+    def _delete_raw(self, *keys):
+        for key in keys:
+            self._prefetched.pop(key, None)
+        super()._delete_raw(*keys)
+
+
+def prefetch_thumbnails(posts):
+    """Одним пакетом разрешает миниатюры картинок всех постов."""
+    backend, kvstore = default.backend, default.kvstore
+    if not (isinstance(backend, QueuedThumbnailBackend)
+            and isinstance(kvstore, BatchedKVStore)):
+        return
+    kvstore.prefetch([
+        backend.thumbnail_file(ImageFile(post.image), geometry, options)
+        for post in posts if post.image
+        for geometry, options in settings.THUMBNAIL_PRESETS
+    ])
+
+
+def refresh_posts(name):
+    """Сбрасывает кэш постов с картинкой name без сохранения постов.
+
+    Версия карточки поста входит в ключи карточек, фрагментов лент
+    и в ETag; страницы с постом помечены ключом post:<id>. Общие
+    версии лент не меняются.
+    """
+    ids = list(Post.objects.filter(image=name).values_list('pk', flat=True))
+    if not ids:
+        return
+    feed_cache.bump(*map(feed_cache.card_scope, ids))
+    page_cache.purge(*map(page_keys.post, ids))
+
+
+def _generate(name, geometry_string, options):
+    backend = default.backend
+    if not isinstance(backend, QueuedThumbnailBackend):
+        backend.get_thumbnail(name, geometry_string, **options)
+        return
+    thumbnail = backend.thumbnail_file(
+        ImageFile(name), geometry_string, options
+    )
+    if default.kvstore.get(thumbnail):
+        return
+    backend.generate(name, geometry_string, **options)
+    refresh_posts(name)
+
+
+def enqueue(name, geometry_string, options):
+    key = ('thumbnail', name, geometry_string, tuple(sorted(options.items())))
+    return worker.submit(key, _generate, name, geometry_string, options)
+
+
+def pregenerate(name):
+    """Ставит в очередь все размеры миниатюр для картинки."""
+    for geometry_string, options in settings.THUMBNAIL_PRESETS:
+        enqueue(name, geometry_string, options)
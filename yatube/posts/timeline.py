@@ -0,0 +1,209 @@
+"""Лента подписок: гибрид fan-out on write и fan-out on read.
+
+Посты обычных авторов раскладываются по лентам подписчиков при
+публикации, подписка дозаполняет ленту постами автора, отписка их
+вычищает. Посты популярных авторов (PulledAuthor) в ленты не пишутся,
+а подтягиваются при чтении и сливаются с лентой по pub_date.
+
+Дозаполнение переносит все посты автора одним INSERT ... SELECT
+сразу для всех подписчиков.
+"""
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count
+
+from core.constants import TIMELINE_BATCH_SIZE
+from .feeds import card_fields, feed_posts
+from .models import Follow, Post, PulledAuthor, TimelineEntry
+
+
+def _bulk_insert(entries):
+    """Вставляет записи ленты пачками, не держа их все в памяти."""
+    batch = []
+    for entry in entries:
+        batch.append(entry)
+        if len(batch) >= TIMELINE_BATCH_SIZE:
+            TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def is_pulled(author_id):
+    return PulledAuthor.objects.filter(author_id=author_id).exists()
+
+
+def fan_out(post):
+    """Добавляет пост в ленты всех подписчиков обычного автора."""
+    if is_pulled(post.author_id):
+        return
+    follower_ids = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True)
+    _bulk_insert(
+        TimelineEntry(
+            user_id=user_id,
+            post_id=post.pk,
+            author_id=post.author_id,
+            pub_date=post.pub_date,
+        )
+        for user_id in follower_ids.iterator(chunk_size=TIMELINE_BATCH_SIZE)
+    )
+
+
+def backfill(user_id, author_id):
+    """Переносит в ленту читателя уже опубликованные посты автора."""
+    if is_pulled(author_id):
+        return
+    _backfill(author_id, user_id)
+
+
+def _backfill(author_id, user_id=None):
+    """Переносит все посты автора в ленты его подписчиков.
+
+    С user_id — в ленту одного подписчика. Записи, которые уже есть
+    в ленте, пропускаются.
+    """
+    ops = connection.ops
+    follow = Follow._meta.db_table
+    post = Post._meta.db_table
+    sql = (
+        f'{ops.insert_statement(ignore_conflicts=True)} '
+        f'{TimelineEntry._meta.db_table} '
+        f'(user_id, post_id, author_id, pub_date) '
+        f'SELECT {follow}.user_id, {post}.id, {post}.author_id, '
+        f'{post}.pub_date FROM {follow} INNER JOIN {post} '
+        f'ON {post}.author_id = {follow}.author_id '
+        f'WHERE {follow}.author_id = %s'
+    )
+    params = [author_id]
+    if user_id is not None:
+        sql += f' AND {follow}.user_id = %s'
+        params.append(user_id)
+    sql += ' ' + ops.ignore_conflicts_suffix_sql(ignore_conflicts=True)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def rebuild(threshold=None):
+    """Дозаполняет ленты по всем подпискам, например после импорта."""
+    classify_authors(threshold)
+    authors = Follow.objects.filter(author__pulled__isnull=True).values_list(
+        'author_id', flat=True
+    ).distinct().order_by()
+    for author_id in authors.iterator(chunk_size=TIMELINE_BATCH_SIZE):
+        _backfill(author_id)
+
+
+def prune(user_id, author_id):
+    """Убирает из ленты читателя посты автора, от которого он отписался."""
+    TimelineEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def _entry_post(entry):
+    return entry.post
+
+
+def _same_post(post):
+    return post
+
+
+def timeline_sources(user):
+    """Источники ленты для MergedCursorPaginator.
+
+    Записанная заранее лента и посты каждого популярного автора,
+    на которого подписан пользователь. Все источники упорядочены по
+    (pub_date, id поста), поэтому сливаются постранично. Отдельный
+    источник на автора читает диапазон индекса (author, pub_date, id);
+    общий запрос с author IN (...) пришлось бы сортировать целиком.
+    """
+    pushed = TimelineEntry.objects.filter(user=user).select_related(
+        'post__author', 'post__group'
+    ).only('pub_date', 'post', *card_fields('post__'))
+    return (
+        (pushed, 'post_id', _entry_post),
+        *(
+            (feed_posts(author_id=author_id), 'id', _same_post)
+            for author_id in _pulled_authors(user)
+        ),
+    )
+
+
+def timeline_values(user, *fields):
+    """Те же источники для ValuesMergedCursorPaginator.
+
+    Строки .values() с полями поста fields (в нотации Post, например
+    author__username) и ключом (pub_date, id).
+    """
+    prefixed = [f'post__{field}' for field in fields]
+
+    def entry_row(row):
+        post = {field: row[name] for field, name in zip(fields, prefixed)}
+        post.update(id=row['post_id'], pub_date=row['pub_date'])
+        return post
+
+    pushed = TimelineEntry.objects.filter(user=user).values(
+        'pub_date', 'post_id', *prefixed
+    )
+    return (
+        (pushed, 'post_id', entry_row),
+        *(
+            (
+                Post.objects.filter(author_id=author_id).values(
+                    'id', 'pub_date', *fields
+                ),
+                'id',
+                _same_post,
+            )
+            for author_id in _pulled_authors(user)
+        ),
+    )
+
+
+def _pulled_authors(user):
+    return Follow.objects.filter(
+        user=user, author__pulled__isnull=False
+    ).values_list('author_id', flat=True)
+
+
+def classify_authors(threshold=None, push_threshold=None):
+    """Пересчитывает, кто из авторов популярный.
+
+    Популярным автор становится с threshold подписчиков, а перестает
+    им быть, когда их меньше push_threshold (по умолчанию
+    TIMELINE_PUSH_THRESHOLD, но не больше threshold). Новые популярные
+    авторы перестают занимать место в лентах, бывшим популярным ленты
+    подписчиков дозаполняются. Возвращает пару (число повышенных,
+    число пониженных).
+    """
+    if threshold is None:
+        threshold = settings.TIMELINE_PULL_THRESHOLD
+    if push_threshold is None:
+        push_threshold = min(settings.TIMELINE_PUSH_THRESHOLD, threshold)
+    counts = dict(
+        Follow.objects.values('author').annotate(
+            followers=Count('id')
+        ).filter(
+            followers__gte=push_threshold
+        ).values_list('author', 'followers')
+    )
+    current = set(PulledAuthor.objects.values_list('author_id', flat=True))
+    pulled = {
+        author_id for author_id, followers in counts.items()
+        if author_id in current or followers >= threshold
+    }
+    for author_id in pulled:
+        with transaction.atomic():
+            PulledAuthor.objects.update_or_create(
+                author_id=author_id,
+                defaults={'followers': counts[author_id]},
+            )
+            if author_id not in current:
+                TimelineEntry.objects.filter(author_id=author_id).delete()
+    demoted = current - pulled
+    for author_id in demoted:
+        with transaction.atomic():
+            _backfill(author_id)
+            PulledAuthor.objects.filter(author_id=author_id).delete()
+    return len(pulled - current), len(demoted)
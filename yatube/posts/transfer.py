@@ -0,0 +1,219 @@
+"""Выгрузка и загрузка данных сайта в формате JSON Lines.
+
+Каждая строка файла — одна запись {"model": ..., "fields": {...}},
+модели идут в порядке зависимостей: пользователи, группы, посты,
+комментарии, подписки. Выгрузка читает таблицы итератором порциями,
+загрузка пишет bulk_create пачками, поэтому память не зависит от
+объема данных. Картинки постов копируются в папку media рядом
+с файлом потоково. Ленты, счетчики и поисковый индекс не выгружаются,
+а пересобираются после загрузки.
+"""
+
+import datetime
+import json
+import os
+import shutil
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.management.color import no_style
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+
+from core.constants import TRANSFER_BATCH_SIZE
+from . import feed_cache, search, stats, timeline
+from .models import Comment, Follow, Group, Post, User
+
+MODELS = (User, Group, Post, Comment, Follow)
+DATA_FILE = 'yatube.jsonl'
+MEDIA_DIR = 'media'
+
+
+class _Encoder(DjangoJSONEncoder):
+    """Даты целиком: DjangoJSONEncoder обрезает их до миллисекунд,
+    а курсоры лент сравнивают pub_date точно."""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def _attnames(model):
+    return [field.attname for field in model._meta.concrete_fields]
+
+
+def _copy(source, destination):
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    with open(destination, 'wb') as target:
+        shutil.copyfileobj(source, target)
+
+
+def export_data(directory, chunk_size=TRANSFER_BATCH_SIZE):
+    """Выгружает данные в directory. Возвращает счетчик записей."""
+    os.makedirs(directory, exist_ok=True)
+    counts = Counter()
+    with open(os.path.join(directory, DATA_FILE), 'w',
+              encoding='utf-8') as out:
+        for model in MODELS:
+            label = model._meta.label_lower
+            rows = model._default_manager.order_by('pk').values(
+                *_attnames(model)
+            )
+            for row in rows.iterator(chunk_size=chunk_size):
+                out.write(json.dumps(
+                    {'model': label, 'fields': row},
+                    cls=_Encoder, ensure_ascii=False
+                ) + '\n')
+                counts[label] += 1
+                image = row.get('image')
+                if image and default_storage.exists(image):
+                    with default_storage.open(image, 'rb') as source:
+                        _copy(source, os.path.join(
+                            directory, MEDIA_DIR, image
+                        ))
+                    counts['images'] += 1
+    return counts
+
+
+_kept = threading.local()
+_wrapped = Counter()
+_wrapped_lock = threading.Lock()
+
+
+def _keeping_pre_save(field):
+    original = type(field).pre_save
+
+    def pre_save(model_instance, add):
+        if id(field) in getattr(_kept, 'fields', ()):
+            return getattr(model_instance, field.attname)
+        return original(field, model_instance, add)
+    return pre_save
+
+
+@contextmanager
+def keep_dates(model):
+    """Не дает auto_now и auto_now_add затереть даты из выгрузки.
+
+    Поля модели общие для всех потоков, поэтому их флаги не меняются:
+    на время блока pre_save полей заменяется оберткой, которая
+    оставляет дату объекта только в потоке внутри keep_dates.
+    """
+    # Поля сравниваются по creation_counter, а у наследников абстрактной
+    # модели он общий, поэтому поля различаются по id.
+    fields = {
+        id(field): field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False)
+        or getattr(field, 'auto_now_add', False)
+    }
+    with _wrapped_lock:
+        for key, field in fields.items():
+            if not _wrapped[key]:
+                field.pre_save = _keeping_pre_save(field)
+            _wrapped[key] += 1
+    outer = getattr(_kept, 'fields', frozenset())
+    _kept.fields = outer | fields.keys()
+    try:
+        yield
+    finally:
+        _kept.fields = outer
+        with _wrapped_lock:
+            for key, field in fields.items():
+                _wrapped[key] -= 1
+                if not _wrapped[key]:
+                    del _wrapped[key]
+                    del field.pre_save
+
+
+def _restore_image(directory, name, written):
+    """Кладет картинку из выгрузки в хранилище и возвращает ее имя.
+
+    Имена новых файлов добавляются в written.
+    """
+    path = os.path.join(directory, MEDIA_DIR, name)
+    if default_storage.exists(name) or not os.path.exists(path):
+        return name
+    with open(path, 'rb') as source:
+        name = default_storage.save(name, File(source))
+    written.append(name)
+    return name
+
+
+def _build(model, fields, directory, written):
+    values = {
+        name: model._meta.get_field(name).to_python(value)
+        for name, value in fields.items()
+    }
+    if values.get('image'):
+        values['image'] = _restore_image(
+            directory, values['image'], written
+        )
+    return model(**values)
+
+
+def _flush(model, batch, counts):
+    if batch:
+        with keep_dates(model):
+            model._default_manager.bulk_create(batch)
+        counts[model._meta.label_lower] += len(batch)
+
+
+def import_data(directory, batch_size=TRANSFER_BATCH_SIZE):
+    """Загружает выгрузку из directory. Возвращает счетчик записей.
+
+    Загрузка идет одной транзакцией: при конфликте ключей
+    или битой строке база остается нетронутой, а уже скопированные
+    в хранилище картинки удаляются.
+    """
+    models = {model._meta.label_lower: model for model in MODELS}
+    counts = Counter()
+    model, batch = None, []
+    written = []
+    try:
+        with transaction.atomic(), open(
+            os.path.join(directory, DATA_FILE), encoding='utf-8'
+        ) as lines:
+            for number, line in enumerate(lines, 1):
+                record = json.loads(line)
+                if record['model'] not in models:
+                    raise ValueError(
+                        f'Строка {number}: неизвестная модель '
+                        f'{record["model"]}'
+                    )
+                if models[record['model']] is not model:
+                    _flush(model, batch, counts)
+                    model, batch = models[record['model']], []
+                batch.append(
+                    _build(model, record['fields'], directory, written)
+                )
+                if len(batch) >= batch_size:
+                    _flush(model, batch, counts)
+                    batch = []
+            _flush(model, batch, counts)
+            with connection.cursor() as cursor:
+                for sql in connection.ops.sequence_reset_sql(
+                    no_style(), MODELS
+                ):
+                    cursor.execute(sql)
+    except Exception:
+        for name in written:
+            default_storage.delete(name)
+        raise
+    rebuild_derived()
+    return counts
+
+
+def rebuild_derived(pull_threshold=None):
+    """Пересобирает ленты, счетчики и индекс поиска после bulk_create.
+
+    bulk_create не шлет сигналов, поэтому то, что обычно
+    поддерживается ими, приходится восстановить целиком.
+    """
+    timeline.rebuild(pull_threshold)
+    stats.recount_all()
+    for model in search.INDEXED_FIELDS:
+        search.reindex(model)
+    feed_cache.bump(*feed_cache.GLOBAL_SCOPES)
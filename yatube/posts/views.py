@@ -1,35 +1,62 @@
+from urllib.parse import urlencode
+
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
 from django.shortcuts import get_object_or_404, redirect, render
+from django.views.decorators.http import condition
 
-from core.constants import POSTS_PER_PAGE
+from core.constants import COMMENTS_PER_PAGE, POSTS_PER_PAGE
+from . import conditional, page_keys
+from .feed_cache import feed_cache_context
+from .feeds import feed_posts
 from .forms import CommentForm, PostForm
 from .models import Comment, Follow, Group, Post, User
+from .paginators import (CursorPaginator, MergedCursorPaginator,
+                         RankedCursorPaginator)
+from .search import SearchResults
+from .timeline import timeline_sources
 
 
-def paginising(post_list, posts_per_page, request):
-    paginator = Paginator(post_list, posts_per_page)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+def paginising(post_list, posts_per_page, request,
+               paginator_class=CursorPaginator):
+    paginator = paginator_class(post_list, posts_per_page)
+    cursor = request.GET.get('cursor')
+    page_obj = paginator.get_page(cursor)
     return page_obj
 
 
+def paginate_comments(post, request):
+    comments = Comment.objects.select_related('author').filter(post=post)
+    paginator = CursorPaginator(
+        comments, COMMENTS_PER_PAGE, date_field='created', descending=False
+    )
+    return paginator.get_page(request.GET.get('cursor'))
+
+
+@condition(etag_func=conditional.index_etag)
 def index(request):
-    post_list = Post.objects.select_related("author")
+    post_list = feed_posts()
     page_obj = paginising(post_list, POSTS_PER_PAGE, request)
+    page_keys.tag_page(request, page_obj, page_keys.INDEX)
     context = {
-        'page_obj': page_obj
+        'page_obj': page_obj,
+        **feed_cache_context(page_obj, 'index'),
     }
     return render(request, 'posts/index.html', context)
 
 
+@condition(etag_func=conditional.group_etag)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = Post.objects.select_related('group').filter(group=group)
+    posts = feed_posts(group=group)
     page_obj = paginising(posts, POSTS_PER_PAGE, request)
+    page_keys.tag_page(
+        request, page_obj,
+        page_keys.group(group.pk), page_keys.group_feed(group.pk),
+    )
     context = {
         'group': group,
         'page_obj': page_obj,
+        **feed_cache_context(page_obj, 'group', group.pk),
     }
     return render(request, 'posts/group_list.html', context)
 
@@ -40,38 +67,55 @@ def all_groups(request):
     return render(request, 'posts/all_groups.html', context)
 
 
+@condition(etag_func=conditional.profile_etag)
 def profile(request, username):
-    author = User.objects.get(username=username)
-    posts_by_author = Post.objects.select_related('author').filter(
-        author=author
+    author = get_object_or_404(
+        User.objects.select_related('stats'), username=username
     )
+    posts_by_author = feed_posts(author=author)
     page_obj = paginising(posts_by_author, POSTS_PER_PAGE, request)
-    following = (
-        request.user.is_authenticated
-        and request.user != author
-        and Follow.objects.filter(user=request.user, author=author).exists()
+    page_keys.tag_page(
+        request, page_obj,
+        page_keys.author(author.pk), page_keys.author_feed(author.pk),
     )
     context = {
         'author': author,
         'page_obj': page_obj,
-        'following': following
+        **feed_cache_context(page_obj, 'profile', author.pk),
     }
     return render(request, 'posts/profile.html', context)
 
 
+@condition(etag_func=conditional.post_detail_etag)
 def post_detail(request, post_id):
-    post = Post.objects.get(id=post_id)
+    post = get_object_or_404(
+        Post.objects.select_related('author__stats', 'group'), id=post_id
+    )
     author = post.author
-    comments = Comment.objects.select_related('post').filter(post=post)
+    comments = paginate_comments(post, request)
+    page_keys.tag_page(
+        request, [post],
+        page_keys.author_feed(author.pk), page_keys.comments(post.pk),
+        *(page_keys.author(comment.author_id) for comment in comments),
+    )
     context = {
         'post': post,
         'author': author,
-        'form': CommentForm(),
-        'comments': comments
+        'comments': comments,
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+def post_comments(request, post_id):
+    """Следующая порция комментариев для кнопки «Загрузить еще»."""
+    post = get_object_or_404(Post, id=post_id)
+    context = {
+        'post': post,
+        'comments': paginate_comments(post, request),
+    }
+    return render(request, 'includes/comments_list.html', context)
+
+
 @login_required
 def create_post(request):
     if request.method == 'POST':
@@ -119,12 +163,32 @@ def add_comment(request, post_id):
     return redirect('posts:post_detail', post_id=post_id)
 
 
+def search(request):
+    query = request.GET.get('q', '').strip()
+    page_obj = None
+    if query:
+        page_obj = paginising(
+            SearchResults(feed_posts(), query),
+            POSTS_PER_PAGE,
+            request,
+            paginator_class=RankedCursorPaginator,
+        )
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+        'query_prefix': urlencode({'q': query}) + '&',
+    }
+    return render(request, 'posts/search.html', context)
+
+
 @login_required
 def follow_index(request):
-    posts = Post.objects.select_related('author').filter(
-        author__following__user=request.user
+    page_obj = paginising(
+        timeline_sources(request.user),
+        POSTS_PER_PAGE,
+        request,
+        paginator_class=MergedCursorPaginator,
     )
-    page_obj = paginising(posts, POSTS_PER_PAGE, request)
     context = {'page_obj': page_obj}
     return render(request, 'posts/follow.html', context)
 
@@ -1,8 +1,19 @@
 import os
 
+from core.caches import caches_from_env
+from core.database import database_from_env, replicas_from_env
+
 
 POSTS_PER_PAGE = 10
 
+# Авторы с таким числом подписчиков и больше не раскладывают посты
+# по лентам при записи: их посты подтягиваются при чтении ленты.
+# Обратно к раскладке автор возвращается, только когда подписчиков
+# меньше TIMELINE_PUSH_THRESHOLD: автор у порога не переезжает
+# туда и обратно при каждой классификации.
+TIMELINE_PULL_THRESHOLD = 10000
+TIMELINE_PUSH_THRESHOLD = 8000
+
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
@@ -34,6 +45,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.InstrumentationMiddleware',
+    'core.middleware.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -41,6 +54,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.PageCacheMiddleware',
+    'core.middleware.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'yatube.urls'
@@ -66,12 +81,23 @@ TEMPLATES = [
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
 
+# База выбирается переменными окружения DB_*, см. core/database.py.
+# По умолчанию — SQLite в режиме WAL в файле db.sqlite3.
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
-    }
+    'default': database_from_env(os.environ, BASE_DIR),
 }
+DATABASES.update(replicas_from_env(os.environ, DATABASES['default']))
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+
+# Алиасы из DATABASES, в которые уходит чтение при GET-запросах.
+# После записи пользователь читает из основной базы еще
+# REPLICA_PIN_SECONDS секунд, чтобы увидеть свои изменения, пока
+# реплика догоняет.
+DATABASE_REPLICAS = [
+    alias for alias in DATABASES if alias != 'default'
+]
+REPLICA_PIN_SECONDS = 15
 
 
 auth = 'UserAttributeSimilarityValidator'
@@ -119,8 +145,39 @@ STATIC_URL = '/static/'
 STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)
 
 
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
-}
+# True — фоновые задачи core.tasks выполняются сразу, в вызывающем
+# потоке.
+TASKS_ALWAYS_EAGER = False
+
+# Профилирование: имена URL, доля запросов к ним, шаг снятия стеков
+# в секундах (таймер ядра обычно не точнее 4 мс) и папка для
+# свернутых стеков. Пустой список выключает.
+PROFILE_URL_NAMES = ()
+PROFILE_SAMPLE_RATE = 0.01
+PROFILE_INTERVAL = 0.005
+PROFILE_DIR = os.path.join(BASE_DIR, 'profiles')
+
+# Кэш целых страниц: имена URL и срок хранения в секундах. Пустой
+# список выключает.
+PAGE_CACHE_URL_NAMES = (
+    'posts:index',
+    'posts:group_list',
+    'posts:profile',
+    'posts:post_detail',
+    'about:author',
+    'about:tech',
+)
+PAGE_CACHE_TIMEOUT = 60 * 10
+
+THUMBNAIL_BACKEND = 'posts.thumbnails.QueuedThumbnailBackend'
+THUMBNAIL_KVSTORE = 'posts.thumbnails.BatchedKVStore'
+
+# Размеры миниатюр, которые готовятся в фоне сразу после сохранения
+# поста. Должны совпадать с вызовами {% thumbnail %} в шаблонах.
+THUMBNAIL_PRESETS = (
+    ('960x339', {'crop': 'center', 'upscale': True}),
+)
+
+# Кэш выбирается переменными окружения CACHE_*, см. core/caches.py.
+# По умолчанию — файл SQLite, общий для всех процессов.
+CACHES = caches_from_env(os.environ, BASE_DIR, default='sqlite')
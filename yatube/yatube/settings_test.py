@@ -0,0 +1,23 @@
+"""Настройки для тестов: manage.py test и pytest.
+
+Реплики выключены: это зеркала основной базы, которые не видят
+транзакцию теста. Фоновые задачи выполняются сразу, в вызывающем
+потоке. Кэш страниц выключен: попадание не вызывает view и не
+оставляет контекста и шаблонов, тесты кэша включают его сами.
+Кэш — память процесса.
+"""
+
+import os
+
+from core.caches import caches_from_env
+
+from .settings import *  # noqa: F401,F403
+from .settings import BASE_DIR
+
+DATABASE_REPLICAS = []
+
+TASKS_ALWAYS_EAGER = True
+
+PAGE_CACHE_URL_NAMES = ()
+
+CACHES = caches_from_env(os.environ, BASE_DIR, default='locmem')